@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List
-from src.models.knowledge_base import KnowledgeBaseArticle
+from typing import Iterator, List, Optional
+from src.models.knowledge_base import KnowledgeBaseArticle, SyncCheckpoint, SyncReport
 
 class BaseKnowledgeBaseConnector(ABC):
     """
@@ -13,3 +13,32 @@ class BaseKnowledgeBaseConnector(ABC):
         Fetch articles from the knowledge base and return a list of KnowledgeBaseArticle objects.
         """
         pass
+
+    def fetch_changed_articles(self, checkpoint: SyncCheckpoint) -> List[KnowledgeBaseArticle]:
+        """
+        Fetch only the articles that were added or updated since `checkpoint`.
+
+        Connectors without change tracking return every article.
+        """
+        return self.fetch_articles()
+
+    def iter_articles(self, report: Optional[SyncReport] = None) -> Iterator[KnowledgeBaseArticle]:
+        """
+        Yield articles one at a time, so that large sources need not fit in memory.
+
+        If a `report` is given, the listed article ids and any articles that could
+        not be listed or fetched are recorded in it.
+        """
+        articles = self.fetch_articles()
+        if report is not None:
+            report.listed_ids = {article.id for article in articles}
+        yield from articles
+
+    def iter_changed_articles(
+        self, checkpoint: SyncCheckpoint, report: Optional[SyncReport] = None
+    ) -> Iterator[KnowledgeBaseArticle]:
+        """
+        Streaming counterpart of `fetch_changed_articles`. Failures are recorded in
+        `report`, if one is given.
+        """
+        yield from self.fetch_changed_articles(checkpoint)
@@ -1,32 +1,106 @@
 import datetime
+import itertools
 import logging
-from typing import List
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from atlassian import Confluence
 from atlassian.errors import ApiError
 from pydantic import HttpUrl
+from requests import HTTPError, Response
 
 from adapters.knowledge_base.base import BaseKnowledgeBaseConnector
-from models.knowledge_base import KnowledgeBaseArticle
+from core.config import CONFLUENCE_FETCH_CONCURRENCY, CONFLUENCE_MAX_RETRIES
+from models.knowledge_base import KnowledgeBaseArticle, SyncCheckpoint, SyncReport
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# CQL dates have minute precision and are interpreted in the timezone of the API
+# user, so the `lastmodified` filter reaches back further than the last sync.
+# Pages that did not actually change are skipped by their version number.
+CQL_LASTMODIFIED_OVERLAP = datetime.timedelta(hours=24)
+CQL_PAGE_SIZE = 100
+# Responses that ask the client to slow down and retry later.
+RETRY_STATUS_CODES = (429, 503)
+
+
+class RateLimitGate:
+    """
+    Pauses every page fetch while Confluence asks clients to back off.
+
+    `observe` is installed as a response hook on the Confluence session, so every
+    response carrying `Retry-After` (or reporting an exhausted rate limit) pauses
+    all workers, not only the one that received it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self) -> None:
+        """Blocks until the current pause, if any, is over."""
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def observe(self, response: Response, *args, **kwargs) -> None:
+        delay = parse_retry_after(response)
+        if delay is None and response.headers.get("X-RateLimit-Remaining") == "0":
+            delay = 1.0
+        if delay:
+            logger.warning(f"Confluence rate limit reached. Pausing requests for {delay:.1f}s.")
+            self.pause(delay)
+
+
+def parse_retry_after(response: Optional[Response]) -> Optional[float]:
+    """Returns the Retry-After delay of a response in seconds, if it has a numeric one."""
+    if response is None:
+        return None
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
 
 class ConfluenceConnector(BaseKnowledgeBaseConnector):
     """
     Connector for fetching articles from Confluence.
     """
 
-    def __init__(self, url: str, api_key: str, space_key: str, username: str):
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        space_key: str,
+        username: str,
+        max_workers: int = CONFLUENCE_FETCH_CONCURRENCY,
+        max_retries: int = CONFLUENCE_MAX_RETRIES,
+    ):
         self.url = url
         self.api_key = api_key
         self.space_key = space_key
         self.username = username
+        self.max_workers = max_workers
+        self.max_retries = max_retries
         self.confluence = Confluence(
             url=self.url, username=self.username, password=self.api_key, cloud=True
         )
+        self.rate_limit = RateLimitGate()
+        session = getattr(self.confluence, "session", None)
+        if session is not None:
+            session.hooks["response"].append(self.rate_limit.observe)
 
     def _convert_to_article(self, content: dict) -> KnowledgeBaseArticle:
         """
@@ -37,6 +111,9 @@ class ConfluenceConnector(BaseKnowledgeBaseConnector):
         last_updated_dt = datetime.datetime.fromisoformat(
             last_updated_str.replace("Z", "+00:00")
         )
+        metadata = {}
+        if "number" in content["version"]:
+            metadata["version"] = content["version"]["number"]
         return KnowledgeBaseArticle(
             id=content["id"],
             source="Confluence",
@@ -46,6 +123,7 @@ class ConfluenceConnector(BaseKnowledgeBaseConnector):
             service=content["space"]["key"],
             owner_team=content["space"]["name"],
             last_updated=last_updated_dt,
+            metadata=metadata,
         )
 
     def fetch_articles(self) -> List[KnowledgeBaseArticle]:
@@ -53,7 +131,15 @@ class ConfluenceConnector(BaseKnowledgeBaseConnector):
         Fetch articles from Confluence and return a list of KnowledgeBaseArticle objects.
         Handles errors gracefully if a page or the space is not found.
         """
-        articles = []
+        return list(self.iter_articles())
+
+    def iter_articles(self, report: Optional[SyncReport] = None) -> Iterator[KnowledgeBaseArticle]:
+        """
+        Yield every article in the space while the next pages are fetched concurrently.
+
+        Pages that cannot be listed or fetched are logged and skipped; they are
+        recorded in `report`, if one is given, together with the listed page ids.
+        """
         try:
             logger.info(f"Fetching pages from Confluence space: {self.space_key}...")
             pages = self.confluence.get_all_pages_from_space(self.space_key)
@@ -62,26 +148,151 @@ class ConfluenceConnector(BaseKnowledgeBaseConnector):
                 f"Error fetching pages from space '{self.space_key}': {e}. "
                 f"Please check if the space exists and you have permissions."
             )
-            return articles  # Return empty list if space is not accessible
+            if report is not None:
+                report.listing_failed = True
+            return  # Yield nothing if space is not accessible
+
+        page_ids = [page_summary["id"] for page_summary in pages]
+        if report is not None:
+            report.listed_ids = set(page_ids)
+        count = 0
+        for article in self._iter_pages(page_ids, report):
+            count += 1
+            yield article
+        logger.info(f"Successfully fetched {count} articles from Confluence.")
+
+    def fetch_changed_articles(self, checkpoint: SyncCheckpoint) -> List[KnowledgeBaseArticle]:
+        """
+        Fetch only the pages whose version differs from the one recorded in the checkpoint.
+        """
+        return list(self.iter_changed_articles(checkpoint))
+
+    def iter_changed_articles(
+        self, checkpoint: SyncCheckpoint, report: Optional[SyncReport] = None
+    ) -> Iterator[KnowledgeBaseArticle]:
+        """
+        Yield only the pages whose version differs from the one recorded in the checkpoint.
+
+        After a first sync, candidate pages are found with a CQL `lastmodified` query,
+        so the number of API calls grows with the number of changes rather than with
+        the size of the space. Without a previous sync, the space listing (with
+        versions) is used instead. Deleted pages are not detected; run a full sync
+        to remove them. Listing and fetch failures are recorded in `report`.
+        """
+        try:
+            if checkpoint.last_sync is None:
+                logger.info(f"No previous sync of space '{self.space_key}'. Listing all pages...")
+                candidates = self._list_page_versions()
+            else:
+                since = checkpoint.last_sync - CQL_LASTMODIFIED_OVERLAP
+                logger.info(
+                    f"Searching space '{self.space_key}' for pages modified since {since:%Y-%m-%d %H:%M}..."
+                )
+                candidates = self._search_page_versions(since)
+        except ApiError as e:
+            logger.error(
+                f"Error listing changed pages in space '{self.space_key}': {e}. "
+                f"Please check if the space exists and you have permissions."
+            )
+            if report is not None:
+                report.listing_failed = True
+            return
+
+        changed = [
+            page_id
+            for page_id, version in candidates.items()
+            if version is None or checkpoint.versions.get(page_id) != version
+        ]
+        logger.info(
+            f"{len(changed)} of {len(candidates)} candidate pages in space '{self.space_key}' changed."
+        )
+        count = 0
+        for article in self._iter_pages(changed, report):
+            count += 1
+            yield article
+        logger.info(f"Successfully fetched {count} changed articles from Confluence.")
 
-        for page_summary in pages:
-            page_id = page_summary["id"]
+    def _list_page_versions(self) -> Dict[str, Optional[int]]:
+        pages = self.confluence.get_all_pages_from_space(self.space_key, expand="version")
+        return {page["id"]: page.get("version", {}).get("number") for page in pages}
+
+    def _search_page_versions(self, since: datetime.datetime) -> Dict[str, Optional[int]]:
+        cql = (
+            f'space = "{self.space_key}" AND type = page '
+            f'AND lastmodified >= "{since:%Y-%m-%d %H:%M}"'
+        )
+        versions: Dict[str, Optional[int]] = {}
+        start = 0
+        while True:
+            response = self.confluence.cql(
+                cql, start=start, limit=CQL_PAGE_SIZE, expand="content.version"
+            )
+            results = (response or {}).get("results", [])
+            for result in results:
+                content = result.get("content", {})
+                if "id" in content:
+                    versions[content["id"]] = content.get("version", {}).get("number")
+            if len(results) < CQL_PAGE_SIZE:
+                return versions
+            start += len(results)
+
+    def _iter_pages(
+        self, page_ids: Iterable[str], report: Optional[SyncReport] = None
+    ) -> Iterator[KnowledgeBaseArticle]:
+        """
+        Fetches pages on a thread pool and yields them in order.
+
+        At most a few pages per worker are fetched ahead of the consumer, so memory
+        use does not depend on the size of the space. Pages that could not be
+        fetched are skipped and recorded in `report`.
+        """
+        page_ids = iter(page_ids)
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="confluence-fetch"
+        )
+        pending = deque(
+            (page_id, executor.submit(self._fetch_page, page_id))
+            for page_id in itertools.islice(page_ids, self.max_workers * 4)
+        )
+        try:
+            while pending:
+                page_id, future = pending.popleft()
+                article = future.result()
+                next_id = next(page_ids, None)
+                if next_id is not None:
+                    pending.append((next_id, executor.submit(self._fetch_page, next_id)))
+                if article is not None:
+                    yield article
+                elif report is not None:
+                    report.failed_ids.append(page_id)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _fetch_page(self, page_id: str) -> Optional[KnowledgeBaseArticle]:
+        for attempt in range(self.max_retries + 1):
+            self.rate_limit.wait()
             try:
                 content = self.confluence.get_page_by_id(
                     page_id, expand="body.storage,version,space"
                 )
-
-                if content is None:
+            except HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    delay = parse_retry_after(e.response) or 2 ** attempt
+                    logger.warning(
+                        f"Page ID '{page_id}' was rate limited (HTTP {status}). Retrying in {delay:.1f}s."
+                    )
+                    self.rate_limit.pause(delay)
                     continue
-
-                article = self._convert_to_article(content)
-                articles.append(article)
-
+                logger.warning(f"Could not fetch content for page ID '{page_id}': {e}. Skipping page.")
+                return None
             except ApiError as e:
                 logger.warning(
                     f"Could not fetch content for page ID '{page_id}'. Status: {e.args[0]}. Reason: {e.reason}. Skipping page."
                 )
-                continue  # Skip to the next page
+                return None  # Skip to the next page
 
-        logger.info(f"Successfully fetched {len(articles)} articles from Confluence.")
-        return articles
+            if content is None:
+                return None
+            return self._convert_to_article(content)
+        return None
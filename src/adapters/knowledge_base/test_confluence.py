@@ -1,33 +1,22 @@
 
 import datetime
-from unittest.mock import MagicMock, patch
+import threading
+import time
+from unittest.mock import MagicMock
+
+import requests
 
 from pydantic import HttpUrl
 
-from src.adapters.knowledge_base.confluence import ConfluenceConnector
-from src.models.knowledge_base import KnowledgeBaseArticle
+from adapters.knowledge_base.confluence import RateLimitGate
+from models.knowledge_base import KnowledgeBaseArticle, SyncCheckpoint, SyncReport
 
 
-def get_mock_confluence_connector():
-    """
-    Creates a mock ConfluenceConnector for testing purposes.
-    """
-    with patch("src.adapters.knowledge_base.confluence.Confluence") as mock_confluence_client:
-        connector = ConfluenceConnector(
-            url="http://fake-confluence.com",
-            api_key="fake_api_key",
-            space_key="FAKE",
-            username="fake_user",
-        )
-        connector.confluence = mock_confluence_client
-        return connector
-
-def test_convert_to_article():
+def test_convert_to_article(confluence_connector):
     """
     Test suite for the _convert_to_article method.
     """
     # Arrange
-    connector = get_mock_confluence_connector()
     mock_page_content = {
         "id": "12345",
         "title": "Test Page",
@@ -51,18 +40,17 @@ def test_convert_to_article():
     print(expected_article)
 
     # Act
-    article = connector._convert_to_article(mock_page_content)
+    article = confluence_connector._convert_to_article(mock_page_content)
     print(article)
 
     # Assert
     assert article.model_dump() == expected_article.model_dump()
 
-def test_fetch_articles_success():
+def test_fetch_articles_success(confluence_connector):
     """
     Test suite for the fetch_articles method.
     """
     # Arrange
-    connector = get_mock_confluence_connector()
     mock_page_summary = {"id": "12345"}
     mock_page_content = {
         "id": "12345",
@@ -73,29 +61,165 @@ def test_fetch_articles_success():
         "version": {"when": "2025-07-08T10:00:00.000Z"},
     }
 
-    connector.confluence.get_all_pages_from_space.return_value = [mock_page_summary]
-    connector.confluence.get_page_by_id.return_value = mock_page_content
+    confluence_connector.confluence.get_all_pages_from_space.return_value = [mock_page_summary]
+    confluence_connector.confluence.get_page_by_id.return_value = mock_page_content
 
     # Act
-    articles = connector.fetch_articles()
+    articles = confluence_connector.fetch_articles()
 
     # Assert
     assert len(articles) == 1
     assert articles[0].title == "Test Page"
-    connector.confluence.get_all_pages_from_space.assert_called_once_with("FAKE")
-    connector.confluence.get_page_by_id.assert_called_once_with("12345", expand="body.storage,version,space")
+    confluence_connector.confluence.get_all_pages_from_space.assert_called_once_with("FAKE")
+    confluence_connector.confluence.get_page_by_id.assert_called_once_with("12345", expand="body.storage,version,space")
 
-def test_fetch_articles_api_error():
+def test_fetch_articles_api_error(confluence_connector):
     """
     Test that fetch_articles handles ApiError gracefully.
     """
     # Arrange
-    connector = get_mock_confluence_connector()
     from atlassian.errors import ApiError
-    connector.confluence.get_all_pages_from_space.side_effect = ApiError("Fake API Error", response=MagicMock(status_code=404))
+    confluence_connector.confluence.get_all_pages_from_space.side_effect = ApiError("Fake API Error", response=MagicMock(status_code=404))
 
     # Act
-    articles = connector.fetch_articles()
+    articles = confluence_connector.fetch_articles()
 
     # Assert
     assert len(articles) == 0
+
+def test_convert_to_article_records_version(confluence_connector, make_page_content):
+    article = confluence_connector._convert_to_article(make_page_content("1", 4))
+
+    assert article.metadata == {"version": 4}
+
+def test_fetch_changed_articles_first_sync_lists_versions(confluence_connector, make_page_content):
+    """
+    Without a previous sync, the space listing is compared against the checkpoint versions.
+    """
+    confluence_connector.confluence.get_all_pages_from_space.return_value = [
+        {"id": "1", "version": {"number": 3}},
+        {"id": "2", "version": {"number": 1}},
+    ]
+    confluence_connector.confluence.get_page_by_id.side_effect = lambda page_id, expand: make_page_content(page_id, 1)
+    checkpoint = SyncCheckpoint(source_key="FAKE", versions={"1": 3})
+
+    articles = confluence_connector.fetch_changed_articles(checkpoint)
+
+    confluence_connector.confluence.get_all_pages_from_space.assert_called_once_with("FAKE", expand="version")
+    assert [article.id for article in articles] == ["2"]
+
+def test_fetch_changed_articles_uses_cql_after_first_sync(confluence_connector, make_page_content):
+    """
+    After a sync, only pages returned by the lastmodified query with a new version are fetched.
+    """
+    confluence_connector.confluence.cql.return_value = {
+        "results": [
+            {"content": {"id": "1", "version": {"number": 3}}},
+            {"content": {"id": "2", "version": {"number": 6}}},
+        ]
+    }
+    confluence_connector.confluence.get_page_by_id.side_effect = lambda page_id, expand: make_page_content(page_id, 6)
+    checkpoint = SyncCheckpoint(
+        source_key="FAKE",
+        last_sync=datetime.datetime(2025, 7, 9, 12, 30, tzinfo=datetime.timezone.utc),
+        versions={"1": 3, "2": 5},
+    )
+
+    articles = confluence_connector.fetch_changed_articles(checkpoint)
+
+    confluence_connector.confluence.get_all_pages_from_space.assert_not_called()
+    cql = confluence_connector.confluence.cql.call_args[0][0]
+    assert 'space = "FAKE"' in cql
+    assert 'lastmodified >= "2025-07-08 12:30"' in cql
+    confluence_connector.confluence.get_page_by_id.assert_called_once_with("2", expand="body.storage,version,space")
+    assert [article.metadata["version"] for article in articles] == [6]
+
+def test_fetch_changed_articles_pages_through_cql_results(confluence_connector):
+    first_page = {"results": [{"content": {"id": str(i), "version": {"number": 1}}} for i in range(100)]}
+    second_page = {"results": [{"content": {"id": "100", "version": {"number": 1}}}]}
+    confluence_connector.confluence.cql.side_effect = [first_page, second_page]
+    confluence_connector.confluence.get_page_by_id.return_value = None
+    checkpoint = SyncCheckpoint(
+        source_key="FAKE",
+        last_sync=datetime.datetime(2025, 7, 9, tzinfo=datetime.timezone.utc),
+    )
+
+    confluence_connector.fetch_changed_articles(checkpoint)
+
+    assert confluence_connector.confluence.cql.call_args_list[1][1]["start"] == 100
+    assert confluence_connector.confluence.get_page_by_id.call_count == 101
+
+def test_iter_articles_fetches_pages_concurrently_in_order(confluence_connector, make_page_content):
+    confluence_connector.max_workers = 4
+    confluence_connector.confluence.get_all_pages_from_space.return_value = [{"id": str(i)} for i in range(8)]
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+
+    def get_page_by_id(page_id, expand):
+        with lock:
+            in_flight.append(page_id)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.remove(page_id)
+        return make_page_content(page_id, 1)
+
+    confluence_connector.confluence.get_page_by_id.side_effect = get_page_by_id
+
+    start = time.monotonic()
+    articles = list(confluence_connector.iter_articles())
+    elapsed = time.monotonic() - start
+
+    assert [article.id for article in articles] == [str(i) for i in range(8)]
+    assert max(max_in_flight) == 4
+    assert elapsed < 0.3
+
+def test_rate_limited_page_is_retried_after_retry_after(confluence_connector, make_page_content):
+    response = requests.Response()
+    response.status_code = 429
+    response.headers["Retry-After"] = "0.1"
+    confluence_connector.confluence.get_page_by_id.side_effect = [
+        requests.HTTPError("Too Many Requests", response=response),
+        make_page_content("1", 1),
+    ]
+
+    start = time.monotonic()
+    articles = list(confluence_connector._iter_pages(["1"]))
+
+    assert time.monotonic() - start >= 0.1
+    assert [article.id for article in articles] == ["1"]
+
+def test_iter_articles_reports_listed_and_failed_pages(confluence_connector, make_page_content):
+    confluence_connector.max_retries = 0
+    confluence_connector.confluence.get_all_pages_from_space.return_value = [{"id": "1"}, {"id": "2"}]
+    response = requests.Response()
+    response.status_code = 503
+
+    def get_page_by_id(page_id, expand):
+        if page_id == "2":
+            raise requests.HTTPError("Service Unavailable", response=response)
+        return make_page_content(page_id, 1)
+
+    confluence_connector.confluence.get_page_by_id.side_effect = get_page_by_id
+    report = SyncReport()
+
+    articles = list(confluence_connector.iter_articles(report=report))
+
+    assert [article.id for article in articles] == ["1"]
+    assert report.listed_ids == {"1", "2"}
+    assert report.failed_ids == ["2"]
+    assert not report.complete
+
+def test_rate_limit_gate_pauses_on_exhausted_limit():
+    gate = RateLimitGate()
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["X-RateLimit-Remaining"] = "0"
+    response.headers["Retry-After"] = "0.1"
+
+    gate.observe(response)
+    start = time.monotonic()
+    gate.wait()
+
+    assert time.monotonic() - start >= 0.09
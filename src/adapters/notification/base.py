@@ -3,5 +3,16 @@ from models.canonical import CanonicalAlert
 
 class BaseNotificationAdapter(ABC):
     @abstractmethod
-    def send(self, alert: CanonicalAlert, explanation: str):
+    def send(self, alert: CanonicalAlert, explanation: str, occurrences: int = 1):
+        """
+        Sends the explanation for an alert. `occurrences` is the number of duplicate
+        alerts that were coalesced into this investigation.
+        """
         pass
+
+    def send_status_change(self, alert: CanonicalAlert, notice: str):
+        """
+        Sends the notice of a resolved or acknowledged alert. Sends it like an
+        explanation unless the adapter has a dedicated format.
+        """
+        self.send(alert, notice)
@@ -0,0 +1,345 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import (
+    NOTIFICATION_BACKOFF_SECONDS,
+    NOTIFICATION_MAX_BACKOFF_SECONDS,
+    NOTIFICATION_MAX_RETRIES,
+    NOTIFICATION_POOL_SIZE,
+    NOTIFICATION_TIMEOUT_SECONDS,
+    SLACK_RATE_LIMIT_BURST,
+    SLACK_RATE_LIMIT_PER_SECOND,
+)
+from core.telemetry import NOTIFICATION_SEND_DURATION, alert_context, current_alert_id, timed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket limiting how often a destination is called.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens, i.e. the allowed burst.
+
+        Raises:
+            ValueError: If `rate` is not positive.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until a token is available and takes it."""
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self) -> float:
+        """
+        Takes a token if one is available without blocking.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until the next one.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._blocked_until and self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+
+    def block(self, seconds: float) -> None:
+        """Stops handing out tokens for `seconds`, e.g. after a Retry-After response."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0
+            self._blocked_until = max(self._blocked_until, now + seconds)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+
+@dataclass(order=True)
+class _Delivery:
+    due_at: float
+    sequence: int
+    url: str = field(compare=False)
+    payload: Dict[str, Any] = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+    alert_id: Optional[str] = field(default=None, compare=False)
+
+
+class NotificationDispatcher:
+    """
+    Delivers webhook notifications in the background.
+
+    Payloads are queued by `submit` and sent by `pool_size` worker threads over a
+    keep-alive connection pool. Every destination URL has its own token bucket; a
+    delivery to a URL that is out of tokens (or paused) is put back in the queue
+    until its next token, so it never holds up other URLs. Transient
+    failures (timeouts, connection errors, 429 and 5xx) go to a retry queue with
+    exponential backoff and jitter; a 429 response also pauses the destination for
+    its Retry-After period. Other 4xx responses are dropped and logged.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float = SLACK_RATE_LIMIT_PER_SECOND,
+        burst: float = SLACK_RATE_LIMIT_BURST,
+        max_retries: int = NOTIFICATION_MAX_RETRIES,
+        backoff_seconds: float = NOTIFICATION_BACKOFF_SECONDS,
+        max_backoff_seconds: float = NOTIFICATION_MAX_BACKOFF_SECONDS,
+        timeout: float = NOTIFICATION_TIMEOUT_SECONDS,
+        pool_size: int = NOTIFICATION_POOL_SIZE,
+        session: Optional[requests.Session] = None,
+    ):
+        """
+        Initializes the NotificationDispatcher.
+
+        Args:
+            rate_per_second (float): Sustained sends per second allowed per URL.
+            burst (float): Sends allowed in a burst per URL.
+            max_retries (int): Retries before a notification is dropped.
+            backoff_seconds (float): Delay before the first retry; doubled on each retry.
+            max_backoff_seconds (float): Upper bound for the retry delay.
+            timeout (float): Timeout in seconds for a single HTTP request.
+            pool_size (int): Number of worker threads and keep-alive connections per host.
+            session (Optional[requests.Session]): Session to use instead of a new one.
+        """
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout = timeout
+        self.pool_size = max(1, pool_size)
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._pending: List[_Delivery] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def submit(self, url: str, payload: Dict[str, Any]) -> None:
+        """
+        Queues a JSON payload for delivery to `url` and returns immediately.
+        """
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("NotificationDispatcher is stopped.")
+            heapq.heappush(
+                self._pending,
+                _Delivery(
+                    time.monotonic(), next(self._sequence), url, payload,
+                    alert_id=current_alert_id(),
+                ),
+            )
+            self._ensure_worker()
+            self._condition.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every queued notification, including retries, has been handled.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Delivers what is still queued (waiting at most `timeout`) and stops the worker.
+        """
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._stopping = True
+            if not flushed:
+                logger.warning(
+                    f"NotificationDispatcher stopped with {len(self._pending)} undelivered notifications."
+                )
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self.session.close()
+
+    def stats(self) -> dict:
+        with self._condition:
+            pending = len(self._pending) + self._in_flight
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "pending": pending,
+        }
+
+    def _ensure_worker(self) -> None:
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.pool_size:
+            thread = threading.Thread(
+                target=self._run,
+                name=f"notification-dispatcher-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _bucket(self, url: str) -> TokenBucket:
+        bucket = self._buckets.get(url)
+        if bucket is None:
+            bucket = self._buckets[url] = TokenBucket(self.rate_per_second, self.burst)
+        return bucket
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping:
+                        return
+                    now = time.monotonic()
+                    if self._pending and self._pending[0].due_at <= now:
+                        delivery = heapq.heappop(self._pending)
+                        wait = self._bucket(delivery.url).try_acquire()
+                        if wait > 0:
+                            # Rate limited: try again at the URL's next token.
+                            delivery.due_at = now + wait
+                            heapq.heappush(self._pending, delivery)
+                            continue
+                        self._in_flight += 1
+                        break
+                    self._condition.wait(
+                        self._pending[0].due_at - now if self._pending else None
+                    )
+
+            try:
+                retry_in = self._deliver(delivery)
+            except Exception as e:
+                logger.exception(f"Unexpected error while sending notification: {e}")
+                retry_in = None
+
+            with self._condition:
+                self._in_flight -= 1
+                if retry_in is not None:
+                    delivery.due_at = time.monotonic() + retry_in
+                    heapq.heappush(self._pending, delivery)
+                self._condition.notify_all()
+
+    def _deliver(self, delivery: _Delivery) -> Optional[float]:
+        """
+        Sends one notification; the caller took a token for its URL. Returns the
+        delay before a retry, or None when done.
+        """
+        delivery.attempts += 1
+        retry_after = None
+        try:
+            with alert_context(delivery.alert_id), timed(
+                "notification.send", NOTIFICATION_SEND_DURATION
+            ) as fields:
+                fields["attempt"] = delivery.attempts
+                response = self.session.post(delivery.url, json=delivery.payload, timeout=self.timeout)
+                fields["status"] = response.status_code
+                if response.status_code >= 300:
+                    fields["outcome"] = f"http_{response.status_code // 100}xx"
+        except requests.RequestException as e:
+            reason = str(e)
+        else:
+            if response.status_code < 300:
+                self._count("sent")
+                return None
+            reason = f"HTTP {response.status_code}: {response.text[:200]}"
+            if response.status_code == 429:
+                retry_after = self._parse_retry_after(response)
+                with self._condition:
+                    self._bucket(delivery.url).block(retry_after)
+            elif response.status_code < 500:
+                self._count("failed")
+                logger.error(f"Notification rejected, not retrying. {reason}")
+                return None
+
+        if delivery.attempts > self.max_retries:
+            self._count("failed")
+            logger.error(
+                f"Dropping notification after {delivery.attempts} attempts. Last error: {reason}"
+            )
+            return None
+
+        self._count("retried")
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = min(
+                self.max_backoff_seconds, self.backoff_seconds * 2 ** (delivery.attempts - 1)
+            )
+            delay = random.uniform(delay / 2, delay)
+        logger.warning(
+            f"Notification attempt {delivery.attempts} failed ({reason}). Retrying in {delay:.1f}s."
+        )
+        return delay
+
+    def _count(self, counter: str) -> None:
+        # The counters are updated by several worker threads.
+        with self._condition:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _parse_retry_after(self, response: requests.Response) -> float:
+        try:
+            return max(0.0, float(response.headers.get("Retry-After", "")))
+        except ValueError:
+            return self.backoff_seconds
+
+
+_shared_dispatcher: Optional[NotificationDispatcher] = None
+_shared_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Returns the process-wide NotificationDispatcher, creating it on first use."""
+    global _shared_dispatcher
+    if _shared_dispatcher is None:
+        with _shared_dispatcher_lock:
+            if _shared_dispatcher is None:
+                _shared_dispatcher = NotificationDispatcher()
+    return _shared_dispatcher
@@ -1,10 +1,50 @@
-import requests
+from typing import Optional
 from core.config import SLACK_WEBHOOK_URL
 from models.canonical import CanonicalAlert
+from services.firing_alerts import RESOLVED, alert_state
 from .base import BaseNotificationAdapter
+from .dispatcher import NotificationDispatcher, get_notification_dispatcher
 
 class SlackAdapter(BaseNotificationAdapter):
-    def send(self, alert: CanonicalAlert, explanation: str):
+    def __init__(
+        self,
+        dispatcher: Optional[NotificationDispatcher] = None,
+        webhook_url: Optional[str] = SLACK_WEBHOOK_URL,
+    ):
+        self.dispatcher = dispatcher or get_notification_dispatcher()
+        self.webhook_url = webhook_url
+
+    def send(self, alert: CanonicalAlert, explanation: str, occurrences: int = 1):
+        # Delivery, rate limiting and retries happen in the background dispatcher.
+        self.dispatcher.submit(self.webhook_url, self.build_message(alert, explanation, occurrences))
+
+    def send_status_change(self, alert: CanonicalAlert, notice: str):
+        self.dispatcher.submit(self.webhook_url, self.build_status_message(alert, notice))
+
+    def build_status_message(self, alert: CanonicalAlert, notice: str) -> dict:
+        resolved = alert_state(alert.status) == RESOLVED
+        icon, label = ("✅", "Resolved") if resolved else ("👀", "Acknowledged")
+        return {
+            "text": f"{icon} {label}: {alert.title}",
+            "blocks": [
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": f"{icon} *{label}: {alert.title}*\n{notice}"
+                    }
+                },
+                {
+                    "type": "context",
+                    "elements": [
+                        {"type": "mrkdwn", "text": f"Service: `{alert.service}`"},
+                        {"type": "mrkdwn", "text": f"Source: {alert.source_system}"}
+                    ]
+                }
+            ]
+        }
+
+    def build_message(self, alert: CanonicalAlert, explanation: str, occurrences: int = 1) -> dict:
         slack_message = {
             "text": f"🚨 New Alert: {alert.title}",
             "blocks": [
@@ -43,4 +83,11 @@ class SlackAdapter(BaseNotificationAdapter):
                 }
             ]
         }
-        requests.post(SLACK_WEBHOOK_URL, json=slack_message)
+        if occurrences > 1:
+            slack_message["blocks"][-1]["elements"].append(
+                {
+                    "type": "mrkdwn",
+                    "text": f"Fired {occurrences} times during this investigation"
+                }
+            )
+        return slack_message
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from benchmarks.stubs import StubWebhookSink
+from .dispatcher import NotificationDispatcher, TokenBucket
+
+
+def make_dispatcher(**overrides) -> NotificationDispatcher:
+    settings = dict(rate_per_second=100, burst=10, max_retries=3, backoff_seconds=0.01, timeout=2)
+    settings.update(overrides)
+    return NotificationDispatcher(**settings)
+
+
+def test_submit_delivers_in_background():
+    with StubWebhookSink(latency=0.2) as sink:
+        dispatcher = make_dispatcher()
+
+        start = time.monotonic()
+        dispatcher.submit(sink.url, {"text": "hello"})
+        submit_duration = time.monotonic() - start
+
+        assert dispatcher.flush(timeout=5)
+        dispatcher.stop()
+
+    assert submit_duration < 0.1
+    assert sink.delivered == [{"text": "hello"}]
+    assert dispatcher.stats()["sent"] == 1
+
+
+def test_transient_failures_are_retried():
+    with StubWebhookSink(statuses=[500, 503]) as sink:
+        dispatcher = make_dispatcher()
+        dispatcher.submit(sink.url, {"text": "hello"})
+        assert dispatcher.flush(timeout=5)
+        dispatcher.stop()
+
+    assert len(sink.requests) == 3
+    assert sink.delivered == [{"text": "hello"}]
+    assert dispatcher.stats() == {"sent": 1, "retried": 2, "failed": 0, "pending": 0}
+
+
+def test_rate_limited_send_honors_retry_after():
+    with StubWebhookSink(statuses=[429], retry_after=0.3) as sink:
+        dispatcher = make_dispatcher()
+        start = time.monotonic()
+        dispatcher.submit(sink.url, {"text": "hello"})
+        assert dispatcher.flush(timeout=5)
+        elapsed = time.monotonic() - start
+        dispatcher.stop()
+
+    assert elapsed >= 0.3
+    assert sink.delivered == [{"text": "hello"}]
+
+
+def test_client_errors_and_exhausted_retries_are_dropped():
+    with StubWebhookSink(statuses=[400, 500, 500]) as sink:
+        dispatcher = make_dispatcher(max_retries=1)
+        dispatcher.submit(sink.url, {"text": "bad request"})
+        dispatcher.submit(sink.url, {"text": "server down"})
+        assert dispatcher.flush(timeout=5)
+        dispatcher.stop()
+
+    assert sink.delivered == []
+    assert dispatcher.stats()["failed"] == 2
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # Two tokens come from the burst, the other two take 1/20 s each.
+    assert 0.08 <= elapsed < 0.5
+
+
+def test_paused_destination_does_not_hold_up_others():
+    with StubWebhookSink(statuses=[429], retry_after=1.0) as paused, StubWebhookSink() as other:
+        dispatcher = make_dispatcher(burst=1)
+        dispatcher.submit(paused.url, {"text": "paused"})
+        dispatcher.submit(paused.url, {"text": "waits for its token"})
+        time.sleep(0.1)  # let the first delivery be rate limited
+
+        start = time.monotonic()
+        dispatcher.submit(other.url, {"text": "other"})
+        while not other.delivered and time.monotonic() - start < 2:
+            time.sleep(0.01)
+        elapsed = time.monotonic() - start
+
+        assert dispatcher.flush(timeout=5)
+        dispatcher.stop()
+
+    assert elapsed < 0.5
+    assert other.delivered == [{"text": "other"}]
+    assert len(paused.delivered) == 2
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
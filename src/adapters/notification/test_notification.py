@@ -3,9 +3,9 @@ from unittest.mock import patch, MagicMock
 from .slack import SlackAdapter
 from models.canonical import CanonicalAlert
 
-@patch('requests.post')
-def test_slack_send(mock_post):
-    adapter = SlackAdapter()
+def test_slack_send():
+    mock_dispatcher = MagicMock()
+    adapter = SlackAdapter(dispatcher=mock_dispatcher, webhook_url="http://slack.example.com/hook")
     alert = CanonicalAlert(
         service="test-service",
         severity="critical",
@@ -24,15 +24,60 @@ def test_slack_send(mock_post):
 
     adapter.send(alert, explanation)
 
-    mock_post.assert_called_once()
+    mock_dispatcher.submit.assert_called_once()
 
-    args, kwargs = mock_post.call_args
+    args, kwargs = mock_dispatcher.submit.call_args
 
-    assert 'json' in kwargs
-    slack_message = kwargs['json']
+    assert args[0] == "http://slack.example.com/hook"
+    slack_message = args[1]
 
     assert slack_message['text'] == f"🚨 New Alert: {alert.title}"
     assert slack_message['blocks'][0]['text']['text'] == f"🚨 {alert.title}"
     assert slack_message['blocks'][1]['fields'][0]['text'] == f"*Service:*\n`{alert.service}`"
     assert slack_message['blocks'][1]['fields'][1]['text'] == f"*Severity:*\n`{alert.severity.upper()}`"
     assert slack_message['blocks'][3]['text']['text'] == f"*What's Happening (Explained by AI):*\n{explanation}"
+
+
+def test_slack_send_reports_occurrences():
+    mock_dispatcher = MagicMock()
+    adapter = SlackAdapter(dispatcher=mock_dispatcher)
+    alert = CanonicalAlert(
+        service="test-service",
+        severity="critical",
+        title="Test Alert",
+        environment="test",
+        status="firing",
+        timestamp="2025-07-03T12:00:00Z",
+        details={},
+        link_to_source="http://example.com/source",
+        raw_payload={"data": "test"}
+    )
+
+    adapter.send(alert, "This is an explanation.", occurrences=7)
+
+    slack_message = mock_dispatcher.submit.call_args[0][1]
+    context_texts = [element['text'] for element in slack_message['blocks'][-1]['elements']]
+    assert "Fired 7 times during this investigation" in context_texts
+
+
+def test_slack_send_status_change():
+    mock_dispatcher = MagicMock()
+    adapter = SlackAdapter(dispatcher=mock_dispatcher, webhook_url="http://slack.example.com/hook")
+    alert = CanonicalAlert(
+        service="test-service",
+        severity="critical",
+        title="Test Alert",
+        environment="test",
+        status="resolved",
+        timestamp="2025-07-03T13:00:00Z",
+        details={},
+        link_to_source="http://example.com/source",
+        raw_payload={"data": "test"}
+    )
+
+    adapter.send_status_change(alert, "Resolved 1h 0m after firing.")
+
+    args, kwargs = mock_dispatcher.submit.call_args
+    assert args[0] == "http://slack.example.com/hook"
+    assert args[1]['text'] == f"✅ Resolved: {alert.title}"
+    assert args[1]['blocks'][0]['text']['text'] == f"✅ *Resolved: {alert.title}*\nResolved 1h 0m after firing."
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+from core.config import validate_config
+
+if TYPE_CHECKING:
+    from adapters.notification.dispatcher import NotificationDispatcher
+    from core.llm_client import LLMClient
+    from services.alert_queue import AlertQueue
+    from services.alert_service import AlertService
+    from services.explanation_cache import ExplanationCache
+    from services.firing_alerts import FiringAlertRegistry
+    from services.graph_checkpoints import GraphCheckpointStore
+    from services.graph_service import GraphService
+    from services.stream_broker import ExplanationStreamBroker
+    from services.vector_db_service import VectorDBService
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Builds, warms up and shuts down the services behind the API.
+
+    Nothing is constructed on import. `start` validates the configuration, then
+    builds the services, loads the embedding model and the vector index and
+    starts the alert queue on a background task, so the server answers health
+    checks while it warms up. `ready` turns true once all of that succeeded.
+    """
+
+    def __init__(self):
+        self.llm_client: Optional["LLMClient"] = None
+        self.vector_db_service: Optional["VectorDBService"] = None
+        self.explanation_cache: Optional["ExplanationCache"] = None
+        self.stream_broker: Optional["ExplanationStreamBroker"] = None
+        self.firing_alerts: Optional["FiringAlertRegistry"] = None
+        self.notification_dispatcher: Optional["NotificationDispatcher"] = None
+        self.graph_checkpoints: Optional["GraphCheckpointStore"] = None
+        self.graph_service: Optional["GraphService"] = None
+        self.alert_service: Optional["AlertService"] = None
+        self.alert_queue: Optional["AlertQueue"] = None
+        self.ready = False
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self._startup: Optional[asyncio.Task] = None
+
+    async def start(self, wait: bool = False) -> None:
+        """
+        Validates the configuration and starts warming up the services.
+
+        Args:
+            wait (bool): Wait until the services are ready instead of warming them
+                up in the background.
+
+        Raises:
+            ValueError: If the configuration is invalid.
+        """
+        validate_config()
+        self._startup = asyncio.create_task(self._start_services(), name="service-startup")
+        if wait:
+            await self._startup
+
+    async def stop(self) -> None:
+        """
+        Stops the alert queue, flushes pending notifications and closes the
+        checkpoint store, the explanation cache, the vector service and the LLM client.
+        """
+        self.ready = False
+        if self._startup is not None and not self._startup.done():
+            self._startup.cancel()
+            await asyncio.gather(self._startup, return_exceptions=True)
+        if self.alert_queue is not None:
+            await self.alert_queue.stop()
+        if self.notification_dispatcher is not None:
+            await asyncio.to_thread(self.notification_dispatcher.stop, 30)
+        # Closed only once no investigation can use them any more.
+        for name in ("graph_checkpoints", "explanation_cache", "vector_db_service", "llm_client"):
+            service = getattr(self, name)
+            if service is None:
+                continue
+            try:
+                await asyncio.to_thread(service.close)
+                if name == "llm_client":
+                    await service.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close {name}. Error: {e}")
+
+    def build(self) -> None:
+        """
+        Constructs the services. Blocking: opens Chroma and loads the embedding model.
+        """
+        # Imported here, so that importing the API does not import LangGraph,
+        # the LLM SDK, Chroma or the embedding model.
+        from adapters.ingestion.unified import UnifiedWebhookAdapter
+        from adapters.notification.dispatcher import get_notification_dispatcher
+        from adapters.notification.slack import SlackAdapter
+        from core.llm import get_llm_client
+        from services.alert_queue import AlertQueue
+        from services.alert_service import AlertService
+        from services.explanation_cache import ExplanationCache
+        from services.firing_alerts import FiringAlertRegistry
+        from services.graph_checkpoints import GraphCheckpointStore
+        from services.graph_service import GraphService
+        from services.incident_history import IncidentHistory
+        from services.stream_broker import ExplanationStreamBroker
+        from services.vector_db_service import get_vector_db_service
+
+        self.llm_client = get_llm_client()
+        self.vector_db_service = get_vector_db_service()
+        self.explanation_cache = ExplanationCache()
+        self.stream_broker = ExplanationStreamBroker()
+        self.firing_alerts = FiringAlertRegistry()
+        self.notification_dispatcher = get_notification_dispatcher()
+        self.graph_checkpoints = GraphCheckpointStore()
+        self.graph_service = GraphService(
+            vector_db_service=self.vector_db_service,
+            explanation_cache=self.explanation_cache,
+            stream_broker=self.stream_broker,
+            checkpoint_store=self.graph_checkpoints,
+            incident_history=IncidentHistory(self.vector_db_service),
+        )
+        self.alert_service = AlertService(
+            ingestion_adapter=UnifiedWebhookAdapter(),
+            notification_adapter=SlackAdapter(dispatcher=self.notification_dispatcher),
+            graph_service=self.graph_service,
+            stream_broker=self.stream_broker,
+            firing_alerts=self.firing_alerts,
+        )
+        self.alert_queue = AlertQueue(alert_service=self.alert_service)
+
+    def warm_up(self) -> None:
+        """
+        Runs a dummy embedding and vector query and loads the prompt tokenizer. Blocking.
+        """
+        self.vector_db_service.warm_up()
+        self.graph_service.context_assembler.tokenizer
+
+    def status(self) -> dict:
+        return {"ready": self.ready, "error": self.error, "timings": dict(self.timings)}
+
+    async def _start_services(self) -> None:
+        try:
+            await self._timed("build", asyncio.to_thread(self.build))
+            await self._timed("warm_up", asyncio.to_thread(self.warm_up))
+            await self.alert_queue.start()
+            self.ready = True
+            logger.info(f"Services are ready ({self.timings}).")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = str(e)
+            logger.exception(f"Failed to start the services. Error: {e}")
+
+    async def _timed(self, step: str, awaitable) -> None:
+        started = time.perf_counter()
+        await awaitable
+        self.timings[f"{step}_seconds"] = round(time.perf_counter() - started, 3)
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from api.container import ServiceContainer
+
+
+class FakeContainer(ServiceContainer):
+    """Builds mocks instead of the real services; warming up waits for `warm`."""
+
+    def __init__(self):
+        super().__init__()
+        self.warm = threading.Event()
+
+    def build(self):
+        self.alert_queue = MagicMock(start=AsyncMock(), stop=AsyncMock())
+        self.alert_queue.stats.return_value = {"depth": 0}
+        self.notification_dispatcher = MagicMock()
+        self.graph_checkpoints = MagicMock()
+        self.explanation_cache = MagicMock()
+        self.vector_db_service = MagicMock()
+        self.llm_client = MagicMock(aclose=AsyncMock())
+
+    def warm_up(self):
+        if not self.warm.wait(timeout=5):
+            raise TimeoutError("Never warmed up.")
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out."
+        time.sleep(0.01)
+
+
+def test_readyz_turns_green_once_warm():
+    container = FakeContainer()
+
+    with (
+        patch.object(main, "container", container),
+        patch("api.container.validate_config"),
+        TestClient(main.app) as client,
+    ):
+        assert client.get("/readyz").status_code == 503
+        assert client.get("/api/v1/webhook/queue").status_code == 503
+
+        container.warm.set()
+        wait_for(lambda: client.get("/readyz").status_code == 200)
+
+        assert client.get("/api/v1/webhook/queue").json() == {"depth": 0}
+        container.alert_queue.start.assert_awaited_once()
+
+    assert not container.ready
+    container.alert_queue.stop.assert_awaited_once()
+    container.notification_dispatcher.stop.assert_called_once_with(30)
+    for service in (container.graph_checkpoints, container.explanation_cache, container.vector_db_service):
+        service.close.assert_called_once()
+    container.llm_client.close.assert_called_once()
+    container.llm_client.aclose.assert_awaited_once()
+
+
+def test_failed_warm_up_is_reported():
+    container = FakeContainer()
+    container.warm_up = MagicMock(side_effect=RuntimeError("model not found"))
+
+    with patch("api.container.validate_config"):
+        asyncio.run(container.start(wait=True))
+
+    assert not container.ready
+    assert container.status()["error"] == "model not found"
+
+
+def test_start_rejects_missing_configuration():
+    container = FakeContainer()
+
+    with patch("api.container.validate_config", side_effect=ValueError("LLM_API_KEY")):
+        with pytest.raises(ValueError):
+            asyncio.run(container.start())
@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def services():
+    services = MagicMock(ready=True)
+    main.app.state.container = services
+    yield services
+    del main.app.state.container
+
+
+@pytest.fixture
+def client(services):
+    # Without the context manager the lifespan, which builds the real services, is not run.
+    return TestClient(main.app)
+
+
+def test_retry_of_a_running_investigation_is_rejected(services, client):
+    services.graph_service.run_active.return_value = True
+
+    response = client.post("/api/v1/webhook/alerts/a1/retry")
+
+    assert response.status_code == 409
+    services.graph_service.claim_retry.assert_not_called()
+    services.alert_queue.submit.assert_not_called()
+
+
+def test_retry_queues_a_failed_investigation(services, client):
+    services.graph_service.run_active.return_value = False
+    services.alert_queue.depth = 1
+
+    services.graph_service.claim_retry.return_value = None
+    assert client.post("/api/v1/webhook/alerts/a1/retry").status_code == 404
+
+    alert = MagicMock()
+    services.graph_service.claim_retry.return_value = alert
+    response = client.post("/api/v1/webhook/alerts/a1/retry")
+
+    assert response.status_code == 202
+    services.alert_queue.submit.assert_called_once_with(alert, alert_id="a1")
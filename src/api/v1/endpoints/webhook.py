@@ -1,28 +1,116 @@
-from fastapi import APIRouter, Request, HTTPException
-from services.alert_service import AlertService
-from adapters.ingestion.unified import UnifiedWebhookAdapter
-from adapters.notification.slack import SlackAdapter
-from services.graph_service import GraphService
-from services.vector_db_service import VectorDBService
-from core.config import DB_PATH, DB_COLLECTION_NAME
+import json
+import logging
+import uuid
 
-router = APIRouter()
+from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.responses import StreamingResponse
+from api.container import ServiceContainer
+from services.alert_queue import AlertQueueFullError
+
+# Configure logging
+logger = logging.getLogger(__name__)
 
-vector_db_service = VectorDBService(db_path=DB_PATH, collection_name=DB_COLLECTION_NAME)
-graph_service = GraphService(vector_db_service=vector_db_service)
+router = APIRouter()
 
-alert_service = AlertService(
-    ingestion_adapter=UnifiedWebhookAdapter(),
-    notification_adapter=SlackAdapter(),
-    graph_service=graph_service,
-)
+def get_services(request: Request) -> ServiceContainer:
+    """Returns the app's services, or answers 503 while they are warming up."""
+    container = getattr(request.app.state, "container", None)
+    if container is None or not container.ready:
+        raise HTTPException(status_code=503, detail="Service is starting", headers={"Retry-After": "5"})
+    return container
 
-@router.post("/webhook")
-async def receive_unified_webhook(request: Request):
+@router.post("/webhook", status_code=202)
+async def receive_unified_webhook(request: Request, services: ServiceContainer = Depends(get_services)):
     try:
         raw_alert = await request.json()
-        alert_service.process_alert(raw_alert)
-        return {"status": "success", "explanation_sent_to_slack": True}
+        canonical_alert = services.alert_service.normalize(raw_alert)
+        if services.alert_service.is_status_change(canonical_alert):
+            # Resolutions and acknowledgements are answered from the firing alert's
+            # record without an investigation, so they skip the queue.
+            alert_id = uuid.uuid4().hex
+            services.stream_broker.open(alert_id)
+            services.alert_service.handle_status_change(canonical_alert, alert_id)
+            return {"status": "accepted", "alert_id": alert_id, "queue_depth": services.alert_queue.depth}
+        alert_id = services.alert_queue.submit(canonical_alert)
+        services.stream_broker.open(alert_id)
+        return {"status": "accepted", "alert_id": alert_id, "queue_depth": services.alert_queue.depth}
+    except AlertQueueFullError as e:
+        logger.warning(f"Rejected alert: {e}")
+        raise HTTPException(status_code=503, detail="Alert queue is full", headers={"Retry-After": "5"})
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.exception(f"An error occurred: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@router.post("/alerts/{alert_id}/retry", status_code=202)
+async def retry_alert(alert_id: str, services: ServiceContainer = Depends(get_services)):
+    """
+    Retries a failed investigation. It continues from the last completed workflow
+    node, so a failure while generating the response costs one more LLM call.
+    Investigations that are running, or whose retry is queued, answer 409.
+    """
+    if services.graph_service.run_active(alert_id):
+        raise HTTPException(status_code=409, detail="The investigation of this alert is still running")
+    canonical_alert = services.graph_service.claim_retry(alert_id)
+    if canonical_alert is None:
+        raise HTTPException(status_code=404, detail="No failed investigation for this alert id")
+    try:
+        services.alert_queue.submit(canonical_alert, alert_id=alert_id)
+    except AlertQueueFullError as e:
+        logger.warning(f"Rejected retry of alert {alert_id}: {e}")
+        services.graph_service.release_retry(alert_id)
+        raise HTTPException(status_code=503, detail="Alert queue is full", headers={"Retry-After": "5"})
+    services.stream_broker.open(alert_id)
+    return {"status": "accepted", "alert_id": alert_id, "queue_depth": services.alert_queue.depth}
+
+@router.get("/queue")
+async def get_queue_status(services: ServiceContainer = Depends(get_services)):
+    return services.alert_queue.stats()
+
+@router.get("/cache")
+async def get_cache_stats(services: ServiceContainer = Depends(get_services)):
+    return services.explanation_cache.stats()
+
+@router.get("/notifications")
+async def get_notification_stats(services: ServiceContainer = Depends(get_services)):
+    return services.notification_dispatcher.stats()
+
+@router.get("/alerts/{alert_id}/explanation")
+async def get_alert_explanation(alert_id: str, services: ServiceContainer = Depends(get_services)):
+    """
+    Returns the explanation of an investigated alert, linked from its resolution notice.
+    """
+    firing = services.firing_alerts.get(alert_id)
+    if firing is None:
+        raise HTTPException(status_code=404, detail="Unknown alert id")
+    return {
+        "alert_id": firing.alert_id,
+        "title": firing.title,
+        "fired_at": firing.fired_at.isoformat(),
+        "acknowledged": firing.acknowledged,
+        "resolved": firing.resolved,
+        "investigating": firing.investigating,
+        "explanation": firing.explanation,
+    }
+
+@router.get("/alerts/{alert_id}/stream")
+async def stream_alert_explanation(alert_id: str, services: ServiceContainer = Depends(get_services)):
+    """
+    Streams the explanation of an alert as Server-Sent Events: a `token` event per
+    generated text delta, then a `done` event with the full text (or an `error` event).
+    """
+    stream_broker = services.stream_broker
+    if not stream_broker.has(alert_id):
+        raise HTTPException(status_code=404, detail="Unknown alert id")
+
+    async def events():
+        try:
+            async for event, data in stream_broker.subscribe(alert_id):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except KeyError:
+            yield f"event: error\ndata: {json.dumps('Stream expired')}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
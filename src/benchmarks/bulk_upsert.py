@@ -0,0 +1,67 @@
+"""
+Measures the ingestion throughput of `VectorDBService.bulk_upsert`.
+
+Upserts generated chunks with different numbers of embedding worker processes
+and reports documents and embeddings per second and the peak RSS.
+
+Usage (from the `src` directory):
+    python -m benchmarks.bulk_upsert --documents 5000 --workers 1 4 8
+"""
+import argparse
+import resource
+import tempfile
+from typing import Iterator
+
+from models.knowledge_base import KnowledgeBaseArticle
+from services.vector_db_service import VectorDBService
+
+
+def _articles(num_documents: int, run: int) -> Iterator[KnowledgeBaseArticle]:
+    # The run number keeps the embedding cache from serving earlier runs.
+    for index in range(num_documents):
+        yield KnowledgeBaseArticle(
+            id=f"{index}::chunk-0",
+            source="benchmark",
+            title=f"Runbook {index}",
+            content=(
+                f"Runbook {index} (run {run}): how to investigate high CPU usage on "
+                f"service-{index % 17}. Check the pods, the recent deployments and the "
+                f"database connection pool before scaling the deployment."
+            ),
+            metadata={"parent_id": str(index), "chunk_index": 0},
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as db_path:
+        for run, workers in enumerate(args.workers):
+            service = VectorDBService(
+                db_path=db_path,
+                collection_name=f"benchmark-{run}",
+                embedding_cache_path="",
+                embedding_workers=workers,
+            )
+            try:
+                stats = service.bulk_upsert(
+                    _articles(args.documents, run), batch_size=args.batch_size
+                )
+            finally:
+                service.close()
+            peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(
+                f"workers={workers:<3} documents={stats['documents']:<7} "
+                f"time={stats['seconds']:8.1f} s  "
+                f"{stats['documents_per_second']:9.1f} docs/s  "
+                f"{stats['embeddings_per_second']:9.1f} embeddings/s  "
+                f"peak RSS={peak_rss_mb:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compares the embedding backends on latency, throughput, memory and retrieval.
+
+Every backend is loaded in a fresh process, so the reported load time and peak
+RSS are its own. Single-query latency and batch throughput are measured on
+generated runbook snippets, and each backend's top-k results for a set of
+queries are compared against those of the first (reference) backend.
+
+Usage (from the `src` directory):
+    python -m benchmarks.embedding_backends --backends sentence-transformers onnx-int8 --threads 4
+"""
+import argparse
+import multiprocessing
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+from services.embedding_backends import EMBEDDING_BACKENDS, create_embedding_function
+
+_SERVICES = ["auth-api", "payments", "search", "checkout", "inventory", "gateway", "billing"]
+_SYMPTOMS = [
+    "high CPU usage", "memory leak", "disk almost full", "elevated 5xx error rate",
+    "slow database queries", "pod crash loop", "certificate expiry", "queue backlog",
+]
+_ACTIONS = [
+    "check the recent deployments and roll back if needed",
+    "inspect the connection pool and the slow query log",
+    "scale the deployment and watch the saturation dashboards",
+    "restart the affected pods after capturing a heap dump",
+    "rotate the certificate and reload the ingress",
+]
+
+
+def _corpus(num_documents: int) -> List[str]:
+    return [
+        f"Runbook {index}: {_SYMPTOMS[index % len(_SYMPTOMS)]} on "
+        f"{_SERVICES[index % len(_SERVICES)]}. To investigate, "
+        f"{_ACTIONS[index % len(_ACTIONS)]}. Escalate to the owning team if the "
+        f"alert keeps firing for more than {5 + index % 25} minutes."
+        for index in range(num_documents)
+    ]
+
+
+def _queries(num_queries: int) -> List[str]:
+    return [
+        f"{_SYMPTOMS[index % len(_SYMPTOMS)]} alert firing on "
+        f"{_SERVICES[(index * 3) % len(_SERVICES)]} in production"
+        for index in range(num_queries)
+    ]
+
+
+def _measure(backend: str, threads: int, corpus: List[str], queries: List[str]) -> Dict:
+    started = time.perf_counter()
+    embedding_function = create_embedding_function(backend, threads=threads)
+    embedding_function(["warm-up"])
+    load_seconds = time.perf_counter() - started
+
+    latencies = []
+    query_embeddings = []
+    for query in queries:
+        started = time.perf_counter()
+        query_embeddings.append(embedding_function([query])[0])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    corpus_embeddings = embedding_function(corpus)
+    throughput = len(corpus) / (time.perf_counter() - started)
+
+    return {
+        "load_seconds": load_seconds,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0],
+        "throughput": throughput,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "queries": np.asarray(query_embeddings, dtype=np.float32),
+        "corpus": np.asarray(corpus_embeddings, dtype=np.float32),
+    }
+
+
+def _top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--backends", nargs="+", choices=list(EMBEDDING_BACKENDS), default=list(EMBEDDING_BACKENDS)
+    )
+    parser.add_argument("--threads", type=int, default=0, help="0 = the backend's default")
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = _corpus(args.documents)
+    queries = _queries(args.queries)
+    results = {}
+    for backend in args.backends:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[backend] = executor.submit(
+                _measure, backend, args.threads, corpus, queries
+            ).result()
+
+    reference = args.backends[0]
+    reference_top_k = _top_k(results[reference]["queries"], results[reference]["corpus"], args.k)
+    for backend, result in results.items():
+        top_k = _top_k(result["queries"], result["corpus"], args.k)
+        overlap = np.mean(
+            [len(set(a) & set(b)) / args.k for a, b in zip(top_k, reference_top_k)]
+        )
+        cosine = np.mean(np.sum(result["corpus"] * results[reference]["corpus"], axis=1))
+        print(
+            f"{backend:<22} load={result['load_seconds']:6.1f} s  "
+            f"query p50={result['p50_ms']:7.2f} ms p95={result['p95_ms']:7.2f} ms  "
+            f"{result['throughput']:8.1f} docs/s  peak RSS={result['peak_rss_mb']:7.1f} MB  "
+            f"top-{args.k} overlap with {reference}={overlap:.3f}  mean cosine={cosine:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
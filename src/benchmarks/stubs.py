@@ -0,0 +1,295 @@
+"""
+Offline stand-ins for the external services the pipeline talks to.
+
+The servers run in a background thread on localhost. Together with the hash
+embedding function they are used by the tests and the benchmarks, so neither
+needs network access, credentials or model downloads.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class _StubServer:
+    """Base class running a ThreadingHTTPServer on a free localhost port."""
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self):
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.requests: List[Dict[str, Any]] = []
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "_StubServer":
+        stub = self
+
+        class Handler(self.handler_class):
+            def log_message(self, format, *args):
+                pass
+
+        Handler.stub = stub
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _OpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; with Nagle's algorithm the body
+    # waits for the client's delayed ACK and every response takes 40 ms longer.
+    disable_nagle_algorithm = True
+    stub: "StubOpenAIServer"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.stub._handle(self, body)
+
+
+class StubOpenAIServer(_StubServer):
+    """
+    A deterministic OpenAI-compatible chat completion server.
+
+    Every completion answers with `reply` after `latency` seconds, streamed word by
+    word when the request asks for a stream. The first
+    `fail_first` requests are answered with `fail_status` instead, with a short
+    Retry-After so that client retries are exercised quickly.
+    """
+
+    handler_class = _OpenAIHandler
+
+    def __init__(
+        self,
+        reply: str = "Stub explanation.",
+        latency: float = 0.0,
+        fail_first: int = 0,
+        fail_status: int = 429,
+    ):
+        super().__init__()
+        self.reply = reply
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]) -> None:
+        with self._lock:
+            self.requests.append(body)
+            attempt = len(self.requests)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if attempt <= self.fail_first:
+                self._send_json(
+                    handler,
+                    {"error": {"message": "stubbed failure", "type": "stub_error"}},
+                    status=self.fail_status,
+                    headers={"retry-after-ms": "10"},
+                )
+                return
+            if body.get("stream"):
+                self._send_stream(handler, body)
+            else:
+                self._send_json(handler, self._completion(body))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        prompt_tokens = sum(
+            len(str(message.get("content") or "").split()) for message in body.get("messages", [])
+        )
+        completion_tokens = len(self.reply.split())
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or "stub-model",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _send_stream(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        words = self.reply.split(" ")
+        for index, word in enumerate(words):
+            delta = word if index == len(words) - 1 else word + " "
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model") or "stub-model",
+                "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+            }
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {**chunk, "choices": [], "usage": self._completion(body)["usage"]}
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+        handler.close_connection = True
+
+    @staticmethod
+    def _send_json(
+        handler: BaseHTTPRequestHandler,
+        payload: Dict[str, Any],
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    stub: "StubWebhookSink"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.stub._handle(self, body)
+
+
+class StubWebhookSink(_StubServer):
+    """
+    A local HTTP endpoint standing in for a Slack incoming webhook.
+
+    Records every JSON payload it receives. Responses are taken from `statuses`
+    in order (200 once exhausted); a 429 response carries `Retry-After: retry_after`.
+    """
+
+    handler_class = _WebhookHandler
+
+    def __init__(self, statuses: Optional[List[int]] = None, retry_after: float = 0, latency: float = 0.0):
+        super().__init__()
+        self.statuses = list(statuses or [])
+        self.retry_after = retry_after
+        self.latency = latency
+        self.delivered: List[Dict[str, Any]] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/webhook"
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests.append(body)
+            status = self.statuses.pop(0) if self.statuses else 200
+            if status < 300:
+                self.delivered.append(body)
+        data = b"ok" if status < 300 else b"error"
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/plain")
+        handler.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            handler.send_header("Retry-After", str(self.retry_after))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+class HashEmbeddingFunction:
+    """
+    A deterministic stand-in for the sentence embedding model.
+
+    Every text is mapped to a unit vector seeded by its hash, so identical texts
+    get identical embeddings. `cost_seconds` burns CPU per text to imitate model
+    inference. The class is picklable and can run in embedding worker processes.
+    """
+
+    def __init__(self, dimension: int = 384, cost_seconds: float = 0.0):
+        self.dimension = dimension
+        self.cost_seconds = cost_seconds
+        self.calls = 0
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        self.calls += 1
+        return [self._embed(text) for text in input]
+
+    def embed_query(self, input: List[str]) -> List[np.ndarray]:
+        return self(input)
+
+    # The identity Chroma records for a collection's embedding function.
+    @staticmethod
+    def name() -> str:
+        return "hash_stub"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dimension": self.dimension, "cost_seconds": self.cost_seconds}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "HashEmbeddingFunction":
+        return HashEmbeddingFunction(**config)
+
+    def is_legacy(self) -> bool:
+        return False
+
+    def default_space(self) -> str:
+        return "cosine"
+
+    def supported_spaces(self) -> List[str]:
+        return ["cosine", "l2", "ip"]
+
+    def _embed(self, text: str) -> np.ndarray:
+        if self.cost_seconds:
+            deadline = time.process_time() + self.cost_seconds
+            while time.process_time() < deadline:
+                pass
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+        return vector / np.linalg.norm(vector)
@@ -0,0 +1,363 @@
+"""
+Runs the component benchmarks and compares them against a stored baseline.
+
+Every component runs offline: embeddings come from the hash stand-in (unless
+`--embedding-backend` names a real model), the LLM is a local stub
+OpenAI-compatible server and Slack is a local HTTP sink.
+
+Components:
+    normalize     UnifiedWebhookAdapter.normalize throughput
+    vector_query  VectorDBService.query_documents latency per collection size
+    embedding     embedding throughput, uncached and through the embedding cache
+    graph         GraphService.run latency, in total and per workflow node
+    slack         SlackAdapter.send delivery throughput to the local sink
+    scheduling    AlertQueue wait per severity during a burst of low severity alerts
+
+Usage (from the `src` directory):
+    python -m benchmarks.suite --save benchmarks/baselines/laptop.json
+    python -m benchmarks.suite --compare benchmarks/baselines/laptop.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from adapters.ingestion.unified import UnifiedWebhookAdapter
+from benchmarks.stubs import HashEmbeddingFunction, StubOpenAIServer, StubWebhookSink
+from models.knowledge_base import KnowledgeBaseArticle
+
+# A metric is {"value": float, "unit": str, "better": "lower" | "higher"}.
+Metric = Dict[str, object]
+
+RAW_ALERT = {
+    "title": "Auth-API CPU usage critical",
+    "environment": "production",
+    "service": "auth-api",
+    "severity": "Critical",
+    "status": "firing",
+    "timestamp": "2025-07-03T10:00:00Z",
+    "details": {"metric": "CPUUtilization", "current_value": "95%", "threshold": "90%", "condition": "5m"},
+    "link_to_source": "http://my-grafana.com/d/abcdefg/my-dashboard?orgId=1&viewPanel=2",
+    "runbook_url": "http://my-runbook.com/cpu-usage",
+    "owner_team": "backend-dev",
+    "tags": {"region": "us-east-1"},
+    "image_url": "http://my-grafana.com/render/d-solo/abcdefg/my-dashboard?orgId=1&panelId=2",
+}
+
+
+def _metric(value: float, unit: str, better: str) -> Metric:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _latency_metrics(prefix: str, timings_ms: List[float]) -> Dict[str, Metric]:
+    ordered = sorted(timings_ms)
+    return {
+        f"{prefix}_p50_ms": _metric(statistics.median(ordered), "ms", "lower"),
+        f"{prefix}_p95_ms": _metric(ordered[max(0, int(len(ordered) * 0.95) - 1)], "ms", "lower"),
+    }
+
+
+def _time_calls(call: Callable[[], object], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _articles(count: int) -> List[KnowledgeBaseArticle]:
+    return [
+        KnowledgeBaseArticle(
+            id=str(index),
+            source="benchmark",
+            title=f"Runbook {index}",
+            content=(
+                f"Runbook {index}: how to investigate high CPU usage on service-{index % 17}. "
+                f"Check the pods, the recent deployments and the database connection pool."
+            ),
+            tags=[f"service-{index % 17}"],
+        )
+        for index in range(count)
+    ]
+
+
+def _vector_db_service(db_path: str, embedding_backend: Optional[str], name: str):
+    from services.vector_db_service import VectorDBService
+
+    if embedding_backend:
+        return VectorDBService(
+            db_path=db_path, collection_name=name, embedding_cache_path="",
+            embedding_workers=1, embedding_backend=embedding_backend,
+        )
+    return VectorDBService(
+        db_path=db_path, collection_name=name, embedding_cache_path="",
+        embedding_function=HashEmbeddingFunction(),
+    )
+
+
+def bench_normalize(quick: bool, embedding_backend: Optional[str]) -> Dict[str, Metric]:
+    adapter = UnifiedWebhookAdapter()
+    iterations = 2000 if quick else 20000
+    started = time.perf_counter()
+    for _ in range(iterations):
+        adapter.normalize(RAW_ALERT)
+    return {"alerts_per_second": _metric(iterations / (time.perf_counter() - started), "alerts/s", "higher")}
+
+
+def bench_vector_query(quick: bool, embedding_backend: Optional[str]) -> Dict[str, Metric]:
+    sizes = [100, 1000] if quick else [100, 1000, 10000]
+    iterations = 20 if quick else 100
+    results = {}
+    with tempfile.TemporaryDirectory() as db_path:
+        for size in sizes:
+            service = _vector_db_service(db_path, embedding_backend, f"benchmark-{size}")
+            service.bulk_upsert(_articles(size))
+            service.warm_up()
+            # Distinct queries, so that the embedding cache does not serve them.
+            queries = iter(range(iterations))
+            timings = _time_calls(
+                lambda: service.query_documents(
+                    [f"high CPU usage on service-{next(queries)}"], n_results=5
+                ),
+                iterations,
+            )
+            results.update(_latency_metrics(f"query_{size}_docs", timings))
+    return results
+
+
+def bench_embedding(quick: bool, embedding_backend: Optional[str]) -> Dict[str, Metric]:
+    from services.embedding_cache import CachedEmbeddingFunction
+
+    if embedding_backend:
+        from services.embedding_backends import create_embedding_function
+
+        embedding_function = create_embedding_function(embedding_backend)
+    else:
+        embedding_function = HashEmbeddingFunction()
+    texts = [article.content for article in _articles(256 if quick else 2048)]
+    embedding_function(["warm-up"])
+
+    started = time.perf_counter()
+    embedding_function(texts)
+    uncached = len(texts) / (time.perf_counter() - started)
+
+    cache = CachedEmbeddingFunction(embedding_function, memory_size=len(texts))
+    cache(texts)
+    started = time.perf_counter()
+    cache(texts)
+    cached = len(texts) / (time.perf_counter() - started)
+    return {
+        "texts_per_second": _metric(uncached, "texts/s", "higher"),
+        "cached_texts_per_second": _metric(cached, "texts/s", "higher"),
+    }
+
+
+def bench_graph(quick: bool, embedding_backend: Optional[str], llm_latency: float = 0.02) -> Dict[str, Metric]:
+    from core import llm
+    from core.llm_client import LLMClient
+    from services.graph_service import GraphService
+
+    iterations = 5 if quick else 30
+    node_timings: Dict[str, List[float]] = {}
+    totals = []
+    with tempfile.TemporaryDirectory() as db_path, StubOpenAIServer(
+        reply="Check the CPU of the auth-api pods.", latency=llm_latency
+    ) as stub:
+        service = _vector_db_service(db_path, embedding_backend, "benchmark-graph")
+        service.bulk_upsert(_articles(500))
+        graph_service = GraphService(vector_db_service=service)
+        alert = UnifiedWebhookAdapter().normalize(RAW_ALERT)
+        previous_client = llm.client
+        llm.client = LLMClient(api_key="stub", base_url=stub.base_url, max_retries=0)
+        try:
+            for _ in range(iterations):
+                state = {"alert": alert, "alert_id": None, "plan": [], "retrieved_documents": [], "response": ""}
+                started = last = time.perf_counter()
+                for update in graph_service.workflow.stream(state, stream_mode="updates"):
+                    now = time.perf_counter()
+                    for node in update:
+                        node_timings.setdefault(node, []).append((now - last) * 1000)
+                    last = now
+                totals.append((last - started) * 1000)
+        finally:
+            llm.client.close()
+            llm.client = previous_client
+
+    results = _latency_metrics("run", totals)
+    for node, timings in node_timings.items():
+        results.update(_latency_metrics(f"node_{node}", timings))
+    return results
+
+
+def bench_slack(quick: bool, embedding_backend: Optional[str]) -> Dict[str, Metric]:
+    from adapters.notification.dispatcher import NotificationDispatcher
+    from adapters.notification.slack import SlackAdapter
+
+    messages = 200 if quick else 2000
+    alert = UnifiedWebhookAdapter().normalize(RAW_ALERT)
+    with StubWebhookSink() as sink:
+        # No rate limit: the benchmark measures our side of the delivery.
+        dispatcher = NotificationDispatcher(rate_per_second=1e9, burst=1e9)
+        adapter = SlackAdapter(dispatcher=dispatcher, webhook_url=sink.url)
+        started = time.perf_counter()
+        for _ in range(messages):
+            adapter.send(alert, "Check the CPU of the auth-api pods.")
+        dispatcher.flush(timeout=60)
+        elapsed = time.perf_counter() - started
+        dispatcher.stop(timeout=5)
+    return {"messages_per_second": _metric(len(sink.delivered) / elapsed, "messages/s", "higher")}
+
+
+def bench_scheduling(quick: bool, embedding_backend: Optional[str], investigation_seconds: float = 0.02) -> Dict[str, Metric]:
+    import asyncio
+
+    from services.alert_queue import AlertQueue
+
+    bursts = 5 if quick else 20
+    queued_at: Dict[str, float] = {}
+    waits: Dict[str, List[float]] = {"Critical": [], "info": []}
+
+    class _SleepingAlertService:
+        def handle_alert(self, alert, alert_id):
+            waits[alert.severity].append((time.monotonic() - queued_at[alert_id]) * 1000)
+            time.sleep(investigation_seconds)
+
+    async def scenario():
+        queue = AlertQueue(_SleepingAlertService(), max_size=10000, num_workers=4, reserved_workers=1)
+        await queue.start()
+        adapter = UnifiedWebhookAdapter()
+        for burst in range(bursts):
+            # Ten noisy low severity alerts, then one critical alert of another service.
+            for index in range(10):
+                alert = adapter.normalize({**RAW_ALERT, "severity": "info", "service": f"noisy-{index % 2}"})
+                queued_at[queue.submit(alert)] = time.monotonic()
+            queued_at[queue.submit(adapter.normalize(RAW_ALERT))] = time.monotonic()
+            await asyncio.sleep(investigation_seconds)
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+    results = _latency_metrics("critical_wait", waits["Critical"])
+    results.update(_latency_metrics("low_wait", waits["info"]))
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[..., Dict[str, Metric]]] = {
+    "normalize": bench_normalize,
+    "vector_query": bench_vector_query,
+    "embedding": bench_embedding,
+    "graph": bench_graph,
+    "slack": bench_slack,
+    "scheduling": bench_scheduling,
+}
+
+
+def run_suite(
+    names: List[str], quick: bool = False, embedding_backend: Optional[str] = None
+) -> Dict[str, Metric]:
+    """
+    Runs the named benchmarks.
+
+    Returns:
+        Dict[str, Metric]: The metrics, keyed by `<component>.<metric>`.
+    """
+    results: Dict[str, Metric] = {}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        for metric, value in BENCHMARKS[name](quick, embedding_backend).items():
+            results[f"{name}.{metric}"] = value
+    return results
+
+
+def compare(baseline: Dict[str, Metric], current: Dict[str, Metric], tolerance: float) -> List[dict]:
+    """
+    Compares metrics present in both result sets.
+
+    A metric regresses when it is worse than the baseline by more than
+    `tolerance`, relative to the baseline value.
+
+    Returns:
+        List[dict]: One row per metric with the relative change (positive is
+            better) and whether it regressed.
+    """
+    rows = []
+    for name in sorted(baseline.keys() & current.keys()):
+        before, after = float(baseline[name]["value"]), float(current[name]["value"])
+        if before == 0:
+            change = 0.0
+        elif baseline[name]["better"] == "higher":
+            change = (after - before) / before
+        else:
+            change = (before - after) / before
+        rows.append({
+            "metric": name,
+            "baseline": before,
+            "current": after,
+            "unit": baseline[name]["unit"],
+            "change": change,
+            "regressed": change < -tolerance,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and smaller collections.")
+    parser.add_argument(
+        "--embedding-backend", default=None,
+        help="Measure a real embedding backend instead of the offline hash stand-in.",
+    )
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare the results against a JSON baseline.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="Relative slowdown allowed before a metric counts as a regression.",
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.only, quick=args.quick, embedding_backend=args.embedding_backend)
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "quick": args.quick,
+        "embedding_backend": args.embedding_backend or "hash",
+        "results": results,
+    }
+
+    for name, metric in results.items():
+        print(f"{name:<48} {metric['value']:>12.2f} {metric['unit']}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save}.")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline["results"], results, args.tolerance)
+        print(f"\nCompared with {args.compare} ({baseline.get('created', 'unknown date')}):")
+        for row in rows:
+            flag = "REGRESSED" if row["regressed"] else ""
+            print(
+                f"{row['metric']:<48} {row['baseline']:>12.2f} -> {row['current']:>12.2f} "
+                f"{row['unit']:<11} {row['change']:+7.1%} {flag}"
+            )
+        regressions = [row["metric"] for row in rows if row["regressed"]]
+        if regressions:
+            print(f"\n{len(regressions)} metrics regressed by more than {args.tolerance:.0%}.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from benchmarks.suite import compare, run_suite
+
+
+def make_metric(value, better):
+    return {"value": value, "unit": "x", "better": better}
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {
+        "a.throughput": make_metric(100.0, "higher"),
+        "a.latency_ms": make_metric(10.0, "lower"),
+        "a.other_ms": make_metric(10.0, "lower"),
+        "a.removed": make_metric(1.0, "lower"),
+    }
+    current = {
+        "a.throughput": make_metric(70.0, "higher"),
+        "a.latency_ms": make_metric(12.0, "lower"),
+        "a.other_ms": make_metric(5.0, "lower"),
+        "a.added": make_metric(1.0, "lower"),
+    }
+
+    rows = {row["metric"]: row for row in compare(baseline, current, tolerance=0.25)}
+
+    assert set(rows) == {"a.throughput", "a.latency_ms", "a.other_ms"}
+    assert rows["a.throughput"]["regressed"]
+    assert not rows["a.latency_ms"]["regressed"]
+    assert rows["a.other_ms"]["change"] == 0.5
+
+
+def test_offline_components_report_metrics():
+    results = run_suite(["normalize", "graph", "slack"], quick=True)
+
+    assert results["normalize.alerts_per_second"]["value"] > 0
+    assert results["slack.messages_per_second"]["better"] == "higher"
+    for node in ("generate_plan", "retrieve_context", "generate_response"):
+        assert f"graph.node_{node}_p50_ms" in results
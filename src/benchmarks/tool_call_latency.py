@@ -0,0 +1,87 @@
+"""
+Measures the latency of the `search_knowledge_base` tool call.
+
+Compares the previous behaviour, which built a new VectorDBService (Chroma client
+and embedding model) on every call, against the shared process-wide service.
+
+Usage (from the `src` directory):
+    python -m benchmarks.tool_call_latency --iterations 20
+"""
+import argparse
+import resource
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from services.vector_db_service import VectorDBService
+from models.knowledge_base import KnowledgeBaseArticle
+
+QUERY = "auth-api CPU usage critical"
+
+
+def _seed(db_path: str, collection_name: str, num_documents: int) -> None:
+    service = VectorDBService(db_path=db_path, collection_name=collection_name)
+    service.add_documents(
+        [
+            KnowledgeBaseArticle(
+                id=str(index),
+                source="benchmark",
+                title=f"Runbook {index}",
+                content=f"Runbook {index}: how to investigate high CPU usage on service-{index % 17}.",
+            )
+            for index in range(num_documents)
+        ]
+    )
+
+
+def _measure(call: Callable[[], object], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: List[float], rss_before_kb: int) -> None:
+    rss_after_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ordered = sorted(timings)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(
+        f"{label:<10} mean={statistics.mean(timings):9.1f} ms  "
+        f"p50={statistics.median(timings):9.1f} ms  p95={p95:9.1f} ms  "
+        f"peak RSS growth={(rss_after_kb - rss_before_kb) / 1024:7.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--documents", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as db_path:
+        collection_name = "benchmark"
+        _seed(db_path, collection_name, args.documents)
+
+        rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        per_call = _measure(
+            lambda: VectorDBService(db_path=db_path, collection_name=collection_name)
+            .query_documents(query_texts=[QUERY], n_results=5),
+            args.iterations,
+        )
+        _report("per-call", per_call, rss_before_kb)
+
+        shared_service = VectorDBService(db_path=db_path, collection_name=collection_name)
+        shared_service.warm_up()
+        rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        shared = _measure(
+            lambda: shared_service.query_documents(query_texts=[QUERY], n_results=5),
+            args.iterations,
+        )
+        _report("shared", shared, rss_before_kb)
+
+
+if __name__ == "__main__":
+    main()
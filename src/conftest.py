@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+import pytest
+from pydantic.networks import HttpUrl
+
+from adapters.knowledge_base.confluence import ConfluenceConnector
+from models.canonical import AlertDetails, CanonicalAlert
+
+
+class FakeClock:
+    """A clock that only moves when a test sets or advances `now`."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def make_alert():
+    """
+    Returns a factory of firing CanonicalAlerts. Keyword arguments override
+    the default fields.
+    """
+    def make(**overrides) -> CanonicalAlert:
+        fields = dict(
+            title="Test Alert",
+            environment="production",
+            service="test-service",
+            severity="critical",
+            status="firing",
+            timestamp="2025-07-03T12:00:00Z",
+            details=AlertDetails(metric="test"),
+            link_to_source=HttpUrl("http://example.com/source"),
+            raw_payload={},
+        )
+        fields.update(overrides)
+        return CanonicalAlert(**fields)
+
+    return make
+
+
+@pytest.fixture
+def fake_clock():
+    """
+    Returns a factory of FakeClocks, to be passed as the `clock` of the
+    services under test. The argument is the start time in seconds.
+    """
+    def make(start: float = 0.0) -> FakeClock:
+        return FakeClock(start)
+
+    return make
+
+
+@pytest.fixture
+def confluence_connector():
+    """
+    Returns a ConfluenceConnector whose Confluence client is a MagicMock.
+    """
+    with patch("adapters.knowledge_base.confluence.Confluence") as mock_confluence_client:
+        connector = ConfluenceConnector(
+            url="http://fake-confluence.com",
+            api_key="fake_api_key",
+            space_key="FAKE",
+            username="fake_user",
+        )
+    connector.confluence = mock_confluence_client
+    return connector
+
+
+@pytest.fixture
+def make_page_content():
+    """
+    Returns a factory of Confluence page payloads, as returned by
+    `get_page_by_id`, for a page id and version number.
+    """
+    def make(page_id: str, version: int) -> dict:
+        return {
+            "id": page_id,
+            "title": f"Page {page_id}",
+            "body": {"storage": {"value": f"<p>Content of {page_id}</p>"}},
+            "_links": {"webui": f"/display/FAKE/{page_id}"},
+            "space": {"key": "FAKE", "name": "Fake Space"},
+            "version": {"when": "2025-07-08T10:00:00.000Z", "number": version},
+        }
+
+    return make
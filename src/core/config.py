@@ -13,10 +13,187 @@ LLM_MODEL = os.getenv("LLM_MODEL")
 DB_PATH = os.getenv("DB_PATH", "chroma_db/chroma.sqlite3")
 DB_COLLECTION_NAME = os.getenv("DB_COLLECTION_NAME", "knowledge_base")
 
-# Check if the environment variables are set
-if not LLM_API_KEY:
-    raise ValueError("LLM_API_KEY environment variable not set.")
-if not SLACK_WEBHOOK_URL:
-    raise ValueError("SLACK_WEBHOOK_URL environment variable not set.")
-if not LLM_BASE_URL:
-    raise ValueError("LLM_BASE_URL environment variable not set.")
+# --- LLM Client ---
+# Per-request timeout, retries on 408/409/429/5xx (exponential backoff with jitter,
+# honoring Retry-After), the maximum number of in-flight completions and the size
+# of the HTTP connection pool shared by all completions.
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+# Ask for token usage at the end of streamed completions. Disable for providers
+# that reject the `stream_options` parameter.
+LLM_STREAM_INCLUDE_USAGE = os.getenv("LLM_STREAM_INCLUDE_USAGE", "true").lower() == "true"
+
+# --- Retrieval ---
+# Documents returned per knowledge base query, and the number a scope (alert
+# service, owning team) must return before the search is widened.
+RETRIEVAL_N_RESULTS = int(os.getenv("RETRIEVAL_N_RESULTS", "5"))
+RETRIEVAL_MIN_RESULTS = int(os.getenv("RETRIEVAL_MIN_RESULTS", "3"))
+# Documents the plan's tool calls must have retrieved for the workflow to skip
+# its own knowledge base query.
+RETRIEVAL_REUSE_MIN_DOCUMENTS = int(os.getenv("RETRIEVAL_REUSE_MIN_DOCUMENTS", "5"))
+
+# --- Retrieval Server ---
+# When set, the API and the ingestion use the retrieval server at this address
+# (unix:///path/to/retrieval.sock or http://host:port) instead of loading the
+# embedding model and opening Chroma in every process. Queries reaching the
+# server within RETRIEVAL_SERVER_BATCH_WINDOW_MS of each other are embedded
+# together, up to RETRIEVAL_SERVER_MAX_BATCH texts.
+RETRIEVAL_SERVER_URL = os.getenv("RETRIEVAL_SERVER_URL", "")
+RETRIEVAL_SERVER_TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_SERVER_TIMEOUT_SECONDS", "30"))
+RETRIEVAL_SERVER_BATCH_WINDOW_MS = float(os.getenv("RETRIEVAL_SERVER_BATCH_WINDOW_MS", "5"))
+RETRIEVAL_SERVER_MAX_BATCH = int(os.getenv("RETRIEVAL_SERVER_MAX_BATCH", "64"))
+
+# --- Prompt Context ---
+# Tokens of the final report prompt spent on the investigation plan and the
+# knowledge base documents together, on the plan alone and on any one document.
+# Tokens are counted with the tiktoken encoding of LLM_MODEL, or the encoding
+# named by LLM_TOKENIZER_ENCODING (e.g. "cl100k_base") for models tiktoken does
+# not know; without either, they are estimated from words.
+LLM_CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "6000"))
+LLM_CONTEXT_PLAN_TOKENS = int(os.getenv("LLM_CONTEXT_PLAN_TOKENS", "1500"))
+LLM_CONTEXT_DOCUMENT_TOKENS = int(os.getenv("LLM_CONTEXT_DOCUMENT_TOKENS", "1200"))
+LLM_TOKENIZER_ENCODING = os.getenv("LLM_TOKENIZER_ENCODING", "")
+
+# --- LLM Tool Calls ---
+# Maximum number of tool calls from one plan executed concurrently.
+TOOL_CALL_MAX_WORKERS = int(os.getenv("TOOL_CALL_MAX_WORKERS", "8"))
+
+# --- Notifications ---
+# Slack accepts about one message per second per incoming webhook, with short
+# bursts. Failed sends are retried with exponential backoff.
+SLACK_RATE_LIMIT_PER_SECOND = float(os.getenv("SLACK_RATE_LIMIT_PER_SECOND", "1"))
+SLACK_RATE_LIMIT_BURST = float(os.getenv("SLACK_RATE_LIMIT_BURST", "3"))
+NOTIFICATION_TIMEOUT_SECONDS = float(os.getenv("NOTIFICATION_TIMEOUT_SECONDS", "10"))
+NOTIFICATION_MAX_RETRIES = int(os.getenv("NOTIFICATION_MAX_RETRIES", "5"))
+NOTIFICATION_BACKOFF_SECONDS = float(os.getenv("NOTIFICATION_BACKOFF_SECONDS", "1"))
+NOTIFICATION_MAX_BACKOFF_SECONDS = float(os.getenv("NOTIFICATION_MAX_BACKOFF_SECONDS", "60"))
+NOTIFICATION_POOL_SIZE = int(os.getenv("NOTIFICATION_POOL_SIZE", "4"))
+
+# --- Incident History ---
+# Every full investigation is stored in a separate collection. A new alert whose
+# description is at least INCIDENT_SIMILARITY_THRESHOLD similar (cosine, 0-1) to
+# an incident of the same service investigated within INCIDENT_HISTORY_MAX_AGE_SECONDS
+# skips planning and retrieval and reuses that incident's explanation, adapted by
+# one short LLM call (at most INCIDENT_REUSE_MAX_TOKENS tokens) or, with
+# INCIDENT_REUSE_LLM=false, quoted as is. Set the threshold above 1 to disable reuse.
+INCIDENT_HISTORY_COLLECTION_NAME = os.getenv("INCIDENT_HISTORY_COLLECTION_NAME", "incident_history")
+INCIDENT_SIMILARITY_THRESHOLD = float(os.getenv("INCIDENT_SIMILARITY_THRESHOLD", "0.9"))
+INCIDENT_HISTORY_MAX_AGE_SECONDS = float(os.getenv("INCIDENT_HISTORY_MAX_AGE_SECONDS", "2592000"))
+INCIDENT_REUSE_LLM = os.getenv("INCIDENT_REUSE_LLM", "true").lower() == "true"
+INCIDENT_REUSE_MAX_TOKENS = int(os.getenv("INCIDENT_REUSE_MAX_TOKENS", "400"))
+
+# --- Alert Processing Queue ---
+# Maximum number of normalized alerts waiting for investigation before the
+# webhook starts rejecting new ones, and the number of concurrent workers.
+ALERT_QUEUE_MAX_SIZE = int(os.getenv("ALERT_QUEUE_MAX_SIZE", "100"))
+ALERT_QUEUE_WORKERS = int(os.getenv("ALERT_QUEUE_WORKERS", "4"))
+# Workers kept for critical and high severity alerts: medium and low alerts wait
+# while only this many workers are idle.
+ALERT_QUEUE_RESERVED_WORKERS = int(os.getenv("ALERT_QUEUE_RESERVED_WORKERS", "1"))
+
+# --- Alert Coalescing ---
+# Duplicate alerts (same fingerprint) arriving within this many seconds of an
+# investigation's start reuse it instead of triggering a new one.
+COALESCE_WINDOW_SECONDS = float(os.getenv("COALESCE_WINDOW_SECONDS", "300"))
+
+# --- Resolution Notices ---
+# Resolved and acknowledged alerts skip the investigation and get a templated
+# notice linking to the explanation of the firing alert. Explanations of alerts
+# that have not resolved are remembered for FIRING_ALERT_TTL_SECONDS.
+FIRING_ALERT_MAX_ENTRIES = int(os.getenv("FIRING_ALERT_MAX_ENTRIES", "10000"))
+FIRING_ALERT_TTL_SECONDS = float(os.getenv("FIRING_ALERT_TTL_SECONDS", "604800"))
+# Base URL of this API in links sent with notifications, e.g. https://alerts.example.com
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "")
+
+# --- Explanation Streaming ---
+# How long a finished explanation stream can still be replayed by new subscribers.
+STREAM_RETENTION_SECONDS = float(os.getenv("STREAM_RETENTION_SECONDS", "600"))
+
+# --- Explanation Cache ---
+# Generated explanations are cached in memory and in a SQLite file. Set
+# EXPLANATION_CACHE_PATH to an empty string to keep the cache in memory only.
+EXPLANATION_CACHE_PATH = os.getenv("EXPLANATION_CACHE_PATH", "cache/explanations.sqlite3")
+EXPLANATION_CACHE_MEMORY_SIZE = int(os.getenv("EXPLANATION_CACHE_MEMORY_SIZE", "256"))
+EXPLANATION_CACHE_MAX_ENTRIES = int(os.getenv("EXPLANATION_CACHE_MAX_ENTRIES", "10000"))
+EXPLANATION_CACHE_TTL_SECONDS = float(os.getenv("EXPLANATION_CACHE_TTL_SECONDS", "86400"))
+
+# --- Graph Checkpoints ---
+# Investigation runs are checkpointed after every workflow node in a SQLite file,
+# keyed by alert id, so a failed run can be retried from the last completed node.
+# Checkpoints of runs that did not finish expire after GRAPH_CHECKPOINT_TTL_SECONDS.
+# Set GRAPH_CHECKPOINT_PATH to an empty string to keep them in memory only.
+GRAPH_CHECKPOINT_PATH = os.getenv("GRAPH_CHECKPOINT_PATH", "cache/graph_checkpoints.sqlite3")
+GRAPH_CHECKPOINT_TTL_SECONDS = float(os.getenv("GRAPH_CHECKPOINT_TTL_SECONDS", "86400"))
+
+# --- Embedding Backend ---
+# The model computing embeddings: "sentence-transformers" (all-MiniLM-L6-v2 on
+# torch) or "onnx-int8" (the same model, int8-quantized, on ONNX Runtime). The
+# ONNX model and its tokenizer.json are read from EMBEDDING_ONNX_MODEL_DIR, or
+# downloaded from the EMBEDDING_ONNX_REPO Hugging Face repository when it is
+# empty. EMBEDDING_THREADS bounds the threads of the model (0 = the backend's
+# default, one per core) and EMBEDDING_BATCH_SIZE the texts run at a time.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_ONNX_MODEL_DIR = os.getenv("EMBEDDING_ONNX_MODEL_DIR", "")
+EMBEDDING_ONNX_REPO = os.getenv("EMBEDDING_ONNX_REPO", "Xenova/all-MiniLM-L6-v2")
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_quantized.onnx")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
+# --- Embedding Cache ---
+# Embeddings are keyed by a hash of the model and the text. Query embeddings are
+# kept in an in-memory LRU; document embeddings are also persisted to a
+# memory-mapped float32 file under EMBEDDING_CACHE_PATH so that re-ingesting
+# unchanged articles needs no model inference. Set EMBEDDING_CACHE_PATH to an
+# empty string to keep the cache in memory only.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings")
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "2048"))
+
+# --- Bulk Upsert ---
+# Documents written per Chroma upsert by VectorDBService.bulk_upsert, and the
+# worker processes computing their embeddings (0 = one per CPU core, 1 = embed
+# in-process). Each worker loads its own copy of the model and embeds
+# EMBEDDING_POOL_CHUNK_SIZE texts at a time.
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "256"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+EMBEDDING_POOL_CHUNK_SIZE = int(os.getenv("EMBEDDING_POOL_CHUNK_SIZE", "64"))
+
+# --- Knowledge Base Sync ---
+# Directory holding one checkpoint file per synced source (e.g. Confluence space).
+SYNC_CHECKPOINT_DIR = os.getenv("SYNC_CHECKPOINT_DIR", "cache/sync")
+# Pages fetched concurrently, retries of a rate-limited page fetch and the number
+# of articles embedded and upserted together.
+CONFLUENCE_FETCH_CONCURRENCY = int(os.getenv("CONFLUENCE_FETCH_CONCURRENCY", "8"))
+CONFLUENCE_MAX_RETRIES = int(os.getenv("CONFLUENCE_MAX_RETRIES", "5"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+# Articles are split into chunks of at most CHUNK_MAX_TOKENS (estimated word
+# pieces; all-MiniLM-L6-v2 truncates at 256), each repeating CHUNK_OVERLAP_TOKENS
+# of the previous chunk.
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "180"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "30"))
+
+# --- Startup ---
+# Seconds a module import may take in the import-time budget test. Services are
+# built and warmed up by the API's lifespan, never at import time.
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "3"))
+
+
+def validate_config():
+    """
+    Checks that the required environment variables are set.
+
+    Called when the API starts, so that a misconfigured worker fails with one
+    clear error instead of on the first import or the first alert.
+
+    Raises:
+        ValueError: If a required variable is missing.
+    """
+    required = {
+        "LLM_API_KEY": LLM_API_KEY,
+        "SLACK_WEBHOOK_URL": SLACK_WEBHOOK_URL,
+        "LLM_BASE_URL": LLM_BASE_URL,
+    }
+    missing = [name for name, value in required.items() if not value]
+    if missing:
+        raise ValueError(f"Environment variables not set: {', '.join(missing)}.")
@@ -1,10 +1,25 @@
-import openai
-import json
-from core.config import LLM_API_KEY, LLM_BASE_URL, LLM_MODEL
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple, Union
+from core.config import INCIDENT_REUSE_MAX_TOKENS, LLM_MODEL
+from core.llm_client import LLMClient
 from models.canonical import CanonicalAlert
-from core.tools import search_knowledge_base
+from core.tools import execute_tool_calls
+from services.retrieval_planner import RetrievedDocument, merge_documents
 
-client = openai.OpenAI(api_key=LLM_API_KEY, base_url=LLM_BASE_URL)
+# Created on first use, so that importing this module opens no connections.
+client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Returns the process-wide LLMClient, creating it on first use."""
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                client = LLMClient()
+    return client
 
 tools = [
     {
@@ -26,7 +41,7 @@ tools = [
     }
 ]
 
-def get_plan(alert: CanonicalAlert) -> list:
+def _plan_messages(alert: CanonicalAlert) -> list:
     prompt = f"""
     Alert Details:
     - Service: {alert.service}
@@ -36,7 +51,7 @@ def get_plan(alert: CanonicalAlert) -> list:
     Based on this, generate an investigation plan. You can use the available tools to gather more information.
     """
 
-    messages = [
+    return [
         {"role": "system", "content": """
             You are a senior on-call engineer. You have received the following alert.
             Your task is to analyze the alert and create a concise, step-by-step plan for investigation.
@@ -47,7 +62,43 @@ def get_plan(alert: CanonicalAlert) -> list:
         {"role": "user", "content": prompt}
     ]
 
-    response = client.chat.completions.create(
+def _tool_result_content(result: Any) -> str:
+    if isinstance(result, list):
+        # Retrieved documents render as their text.
+        return str([str(item) for item in result])
+    return str(result)
+
+def _append_tool_results(messages: list, tool_calls: list, function_responses: list):
+    for tool_call, function_response in zip(tool_calls, function_responses):
+        messages.append(
+            {
+                "tool_call_id": tool_call.id,
+                "role": "tool",
+                "name": tool_call.function.name,
+                "content": _tool_result_content(function_response),
+            }
+        )
+
+def _retrieved_documents(function_responses: list) -> List[RetrievedDocument]:
+    return merge_documents(*[
+        [item for item in response if isinstance(item, RetrievedDocument)]
+        for response in function_responses
+        if isinstance(response, list)
+    ])
+
+def get_plan(alert: CanonicalAlert) -> Tuple[list, List[RetrievedDocument]]:
+    """
+    Generates the investigation plan, letting the LLM search the knowledge base.
+
+    Returns:
+        Tuple[list, List[RetrievedDocument]]: The plan messages, and the documents
+            the tool calls retrieved, deduplicated by id.
+    """
+    messages = _plan_messages(alert)
+    documents: List[RetrievedDocument] = []
+
+    response = get_llm_client().complete(
+        operation="plan",
         model=LLM_MODEL,
         messages=messages,
         tools=tools,
@@ -60,31 +111,53 @@ def get_plan(alert: CanonicalAlert) -> list:
 
     tool_calls = response_message.tool_calls
     if tool_calls:
-        available_functions = {
-            "search_knowledge_base": search_knowledge_base,
-        }
-        for tool_call in tool_calls:
-            function_name = tool_call.function.name
-            function_to_call = available_functions[function_name]
-            function_args = json.loads(tool_call.function.arguments)
-            function_response = function_to_call(**function_args)
-            messages.append(
-                {
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "name": function_name,
-                    "content": str(function_response),
-                }
-            )
-        second_response = client.chat.completions.create(
+        function_responses = execute_tool_calls(tool_calls, alert=alert)
+        _append_tool_results(messages, tool_calls, function_responses)
+        documents = _retrieved_documents(function_responses)
+        second_response = get_llm_client().complete(
+            operation="plan_followup",
+            model=LLM_MODEL,
+            messages=messages,
+        )
+        messages.append(second_response.choices[0].message)
+
+    return messages, documents
+
+async def aget_plan(alert: CanonicalAlert) -> Tuple[list, List[RetrievedDocument]]:
+    """Coroutine version of `get_plan`."""
+    messages = _plan_messages(alert)
+    documents: List[RetrievedDocument] = []
+
+    response = await get_llm_client().acomplete(
+        operation="plan",
+        model=LLM_MODEL,
+        messages=messages,
+        tools=tools,
+        tool_choice="auto",
+        temperature=0.2,
+    )
+
+    response_message = response.choices[0].message
+    messages.append(response_message)
+
+    tool_calls = response_message.tool_calls
+    if tool_calls:
+        function_responses = await asyncio.to_thread(execute_tool_calls, tool_calls, alert=alert)
+        _append_tool_results(messages, tool_calls, function_responses)
+        documents = _retrieved_documents(function_responses)
+        second_response = await get_llm_client().acomplete(
+            operation="plan_followup",
             model=LLM_MODEL,
             messages=messages,
         )
         messages.append(second_response.choices[0].message)
 
-    return messages
+    return messages, documents
+
+def _render_documents(context_documents: list) -> str:
+    return "\n\n".join(f"[{index}] {document}" for index, document in enumerate(context_documents, 1))
 
-def generate_response(alert: CanonicalAlert, context_documents: list = None, plan: list = None) -> str:
+def _response_messages(alert: CanonicalAlert, context_documents: list = None, plan: list = None) -> list:
     prompt = f"""
     Here is the information gathered:
 
@@ -97,15 +170,13 @@ def generate_response(alert: CanonicalAlert, context_documents: list = None, pla
     {plan if plan else "No plan was generated."}
 
     **Knowledge Base Context:**
-    {context_documents if context_documents else "No context was found."}
+    {_render_documents(context_documents) if context_documents else "No context was found."}
 
     Now, please generate the final report.
     """
 
-    response = client.chat.completions.create(
-        model=LLM_MODEL,
-        messages=[
-            {"role": "system", "content": """
+    return [
+        {"role": "system", "content": """
                 You are a senior on-call engineering assistant. Your role is to provide a comprehensive report based on a monitoring alert and subsequent investigation.
                 You have been given an alert, an investigation plan, and some context from a knowledge base.
                 Synthesize all this information into a clear, structured report for an engineer.
@@ -116,8 +187,108 @@ def generate_response(alert: CanonicalAlert, context_documents: list = None, pla
                 3. Key findings from the knowledge base context.
                 4. A concluding summary of the situation.
                 """},
-            {"role": "user", "content": prompt}
-        ],
+        {"role": "user", "content": prompt}
+    ]
+
+def generate_response(
+    alert: CanonicalAlert, context_documents: list = None, plan: list = None, stream: bool = False
+) -> Union[str, Iterator[str]]:
+    """
+    Generates the final report. With `stream=True` an iterator over the text
+    deltas is returned instead, so the report can be relayed while it is generated.
+    """
+    if stream:
+        return get_llm_client().stream(
+            operation="response",
+            model=LLM_MODEL,
+            messages=_response_messages(alert, context_documents, plan),
+            temperature=0.2,
+        )
+    response = get_llm_client().complete(
+        operation="response",
+        model=LLM_MODEL,
+        messages=_response_messages(alert, context_documents, plan),
+        temperature=0.2,
+    )
+    return response.choices[0].message.content
+
+async def agenerate_response(
+    alert: CanonicalAlert, context_documents: list = None, plan: list = None, stream: bool = False
+) -> Union[str, AsyncIterator[str]]:
+    """Coroutine version of `generate_response`."""
+    if stream:
+        return get_llm_client().astream(
+            operation="response",
+            model=LLM_MODEL,
+            messages=_response_messages(alert, context_documents, plan),
+            temperature=0.2,
+        )
+    response = await get_llm_client().acomplete(
+        operation="response",
+        model=LLM_MODEL,
+        messages=_response_messages(alert, context_documents, plan),
+        temperature=0.2,
+    )
+    return response.choices[0].message.content
+
+def _similar_incident_messages(alert: CanonicalAlert, incident) -> list:
+    prompt = f"""
+    **New Alert:**
+    - Service: {alert.service}
+    - Severity: {alert.severity}
+    - Title: {alert.title}
+
+    **Similar Past Incident ({incident.similarity:.0%} similar):**
+    - Title: {incident.title}
+    - Fired at: {incident.fired_at}
+
+    **Report of the Past Incident:**
+    {incident.explanation}
+
+    Now, please write the short report for the new alert.
+    """
+
+    return [
+        {"role": "system", "content": """
+                You are a senior on-call engineering assistant. A new alert closely resembles an incident that was already investigated.
+                Write a short report for the new alert based on the report of the past incident.
+                State that it is similar to the past incident, point out how the new alert differs, and repeat the most relevant findings and next steps.
+                Do not invent findings that are not in the past report.
+                """},
+        {"role": "user", "content": prompt}
+    ]
+
+def generate_similar_incident_response(
+    alert: CanonicalAlert, incident, stream: bool = False
+) -> Union[str, Iterator[str]]:
+    """
+    Adapts the report of a similar past incident to a new alert in one short
+    completion. With `stream=True` an iterator over the text deltas is returned.
+    """
+    kwargs = dict(
+        operation="similar_incident",
+        model=LLM_MODEL,
+        messages=_similar_incident_messages(alert, incident),
+        temperature=0.2,
+        max_tokens=INCIDENT_REUSE_MAX_TOKENS,
+    )
+    if stream:
+        return get_llm_client().stream(**kwargs)
+    response = get_llm_client().complete(**kwargs)
+    return response.choices[0].message.content
+
+async def agenerate_similar_incident_response(
+    alert: CanonicalAlert, incident, stream: bool = False
+) -> Union[str, AsyncIterator[str]]:
+    """Coroutine version of `generate_similar_incident_response`."""
+    kwargs = dict(
+        operation="similar_incident",
+        model=LLM_MODEL,
+        messages=_similar_incident_messages(alert, incident),
         temperature=0.2,
+        max_tokens=INCIDENT_REUSE_MAX_TOKENS,
     )
-    return response.choices[0].message.content
\ No newline at end of file
+    if stream:
+        return get_llm_client().astream(**kwargs)
+    response = await get_llm_client().acomplete(**kwargs)
+    return response.choices[0].message.content
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import httpx
+import openai
+
+from core.config import (
+    LLM_API_KEY,
+    LLM_BASE_URL,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_RETRIES,
+    LLM_STREAM_INCLUDE_USAGE,
+    LLM_TIMEOUT_SECONDS,
+)
+from core.telemetry import LLM_REQUEST_DURATION, record_llm_usage, timed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class LLMClient:
+    """
+    A chat completion client with both blocking and coroutine interfaces.
+
+    Both interfaces share the same settings: a bounded keep-alive connection pool,
+    a per-request timeout, the OpenAI SDK retry policy (exponential backoff with
+    jitter on 408/409/429/5xx, honoring Retry-After) and a limit on the number of
+    completions in flight, so that we stay within the provider's rate limits.
+
+    Every completion is timed and its token usage counted under its `operation`
+    (e.g. `plan`, `response`), see `core.telemetry`.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = LLM_API_KEY,
+        base_url: Optional[str] = LLM_BASE_URL,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        stream_include_usage: bool = LLM_STREAM_INCLUDE_USAGE,
+    ):
+        """
+        Initializes the LLMClient.
+
+        Args:
+            api_key (Optional[str]): The API key of the OpenAI-compatible provider.
+            base_url (Optional[str]): The base URL of the provider.
+            timeout (float): Timeout in seconds for a single request attempt.
+            max_retries (int): How many times a failed request is retried.
+            max_concurrency (int): Maximum number of completions in flight, per interface.
+            max_connections (int): Size of the HTTP connection pool, per interface.
+            stream_include_usage (bool): Request token usage for streamed completions.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.stream_include_usage = stream_include_usage
+        self.limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+
+        self._sync_client = openai.OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=max_retries,
+            http_client=openai.DefaultHttpxClient(limits=self.limits),
+        )
+        self._sync_semaphore = threading.BoundedSemaphore(max_concurrency)
+        # The async client and semaphore bind to the event loop that first uses them,
+        # so they are created lazily from inside that loop.
+        self._async_client: Optional[openai.AsyncOpenAI] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+
+    def complete(self, operation: str = "chat", **kwargs: Any) -> Any:
+        """
+        Creates a chat completion, blocking the calling thread.
+
+        Accepts the keyword arguments of `chat.completions.create`.
+        """
+        with self._sync_semaphore:
+            with timed(f"llm.{operation}", LLM_REQUEST_DURATION, operation=operation) as fields:
+                response = self._sync_client.chat.completions.create(**kwargs)
+                record_llm_usage(operation, getattr(response, "usage", None), fields)
+                return response
+
+    async def acomplete(self, operation: str = "chat", **kwargs: Any) -> Any:
+        """
+        Creates a chat completion without blocking the event loop.
+
+        Accepts the keyword arguments of `chat.completions.create`.
+        """
+        client, semaphore = self._get_async_client()
+        async with semaphore:
+            with timed(f"llm.{operation}", LLM_REQUEST_DURATION, operation=operation) as fields:
+                response = await client.chat.completions.create(**kwargs)
+                record_llm_usage(operation, getattr(response, "usage", None), fields)
+                return response
+
+    def stream(self, operation: str = "chat", **kwargs: Any) -> Iterator[str]:
+        """
+        Creates a streamed chat completion and yields the content deltas as they arrive.
+
+        The concurrency slot is held until the stream is exhausted or closed.
+        """
+        with self._sync_semaphore:
+            with timed(f"llm.{operation}", LLM_REQUEST_DURATION, operation=operation) as fields:
+                with self._sync_client.chat.completions.create(
+                    stream=True, **self._stream_kwargs(kwargs)
+                ) as chunks:
+                    for chunk in chunks:
+                        record_llm_usage(operation, getattr(chunk, "usage", None), fields)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+
+    async def astream(self, operation: str = "chat", **kwargs: Any) -> AsyncIterator[str]:
+        """Coroutine version of `stream`."""
+        client, semaphore = self._get_async_client()
+        async with semaphore:
+            with timed(f"llm.{operation}", LLM_REQUEST_DURATION, operation=operation) as fields:
+                chunks = await client.chat.completions.create(
+                    stream=True, **self._stream_kwargs(kwargs)
+                )
+                async with chunks:
+                    async for chunk in chunks:
+                        record_llm_usage(operation, getattr(chunk, "usage", None), fields)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+
+    def _stream_kwargs(self, kwargs: dict) -> dict:
+        if self.stream_include_usage and "stream_options" not in kwargs:
+            # The usage arrives in a final chunk without choices.
+            return {**kwargs, "stream_options": {"include_usage": True}}
+        return kwargs
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=openai.DefaultAsyncHttpxClient(limits=self.limits),
+            )
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._async_client, self._async_semaphore
+
+    def close(self) -> None:
+        self._sync_client.close()
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
@@ -0,0 +1,152 @@
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# One JSON object per line: {"event": ..., "alert_id": ..., "duration_ms": ..., ...}.
+trace_logger = logging.getLogger("alert_trace")
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120)
+
+ALERT_DURATION = Histogram(
+    "alert_investigation_seconds",
+    "Time to investigate an alert and hand the notification to the dispatcher.",
+    ["outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+ALERT_QUEUE_WAIT = Histogram(
+    "alert_queue_wait_seconds",
+    "Time alerts wait in the queue before a worker starts investigating them.",
+    ["priority"],
+    buckets=_LATENCY_BUCKETS,
+)
+ALERT_QUEUE_DEPTH = Gauge(
+    "alert_queue_depth",
+    "Alerts waiting in the queue.",
+    ["priority"],
+)
+NODE_DURATION = Histogram(
+    "alert_graph_node_seconds",
+    "Time spent in each node of the investigation workflow.",
+    ["node", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_seconds",
+    "Duration of chat completion requests, including retries and streaming.",
+    ["operation", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens",
+    "Tokens reported in the usage of chat completions.",
+    ["operation", "kind"],
+)
+VECTOR_QUERY_DURATION = Histogram(
+    "vector_query_seconds",
+    "Duration of knowledge base queries, including query embedding.",
+    ["outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+NOTIFICATION_SEND_DURATION = Histogram(
+    "notification_send_seconds",
+    "Duration of notification HTTP requests.",
+    ["outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+# The alert the current thread or task is working on, for trace events.
+_current_alert_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_alert_id", default=None
+)
+
+
+def current_alert_id() -> Optional[str]:
+    return _current_alert_id.get()
+
+
+@contextmanager
+def alert_context(alert_id: Optional[str]) -> Iterator[None]:
+    """
+    Tags the trace events emitted inside the block with `alert_id`. Without an
+    id, the events keep the alert of the enclosing context.
+    """
+    token = _current_alert_id.set(alert_id or _current_alert_id.get())
+    try:
+        yield
+    finally:
+        _current_alert_id.reset(token)
+
+
+def trace(event: str, alert_id: Optional[str] = None, **fields: Any) -> None:
+    """
+    Emits a structured trace event on the `alert_trace` logger.
+
+    Args:
+        event (str): What happened, e.g. `node.generate_plan`.
+        alert_id (Optional[str]): The alert concerned; defaults to the alert of
+            the current context.
+        **fields: Additional JSON-serializable fields.
+    """
+    if not trace_logger.isEnabledFor(logging.INFO):
+        return
+    record = {"event": event, "alert_id": alert_id or current_alert_id(), **fields}
+    trace_logger.info(json.dumps(record, default=str))
+
+
+@contextmanager
+def timed(event: str, histogram: Histogram, **labels: str) -> Iterator[Dict[str, Any]]:
+    """
+    Measures the block, observes it on `histogram` and emits a trace event.
+
+    Yields a dict the block may add trace fields to. The histogram's `outcome`
+    label is `error` when the block raises, `cancelled` when a generator is
+    closed early and otherwise the yielded dict's `outcome` (default `ok`).
+    """
+    fields: Dict[str, Any] = {}
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield fields
+        outcome = fields.pop("outcome", "ok")
+    except GeneratorExit:
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        histogram.labels(outcome=outcome, **labels).observe(duration)
+        trace(event, duration_ms=round(duration * 1000, 2), outcome=outcome, **fields)
+
+
+def record_llm_usage(operation: str, usage: Any, fields: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Counts the prompt and completion tokens of a chat completion's `usage`.
+
+    Args:
+        operation (str): What the completion was for, e.g. `plan`.
+        usage (Any): The `usage` of the response; ignored when missing.
+        fields (Optional[Dict[str, Any]]): Trace fields to add the counts to.
+    """
+    if usage is None:
+        return
+    prompt_tokens = int(getattr(usage, "prompt_tokens", None) or 0)
+    completion_tokens = int(getattr(usage, "completion_tokens", None) or 0)
+    LLM_TOKENS.labels(operation=operation, kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(operation=operation, kind="completion").inc(completion_tokens)
+    if fields is not None:
+        fields.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+def render_metrics() -> tuple:
+    """Returns the Prometheus exposition of all metrics and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,59 @@
+from unittest.mock import MagicMock, patch
+
+from core.llm import generate_similar_incident_response, get_plan
+from services.retrieval_planner import RetrievedDocument
+
+
+@patch("core.llm.execute_tool_calls")
+@patch("core.llm.client")
+def test_get_plan_scatters_tool_results_to_their_calls(mock_client, mock_execute_tool_calls, make_alert):
+    tool_calls = []
+    for call_id, query in [("call_1", "cpu"), ("call_2", "memory")]:
+        tool_call = MagicMock()
+        tool_call.id = call_id
+        tool_call.function.name = "search_knowledge_base"
+        tool_call.function.arguments = f'{{"query": "{query}"}}'
+        tool_calls.append(tool_call)
+
+    first_message = MagicMock(tool_calls=tool_calls)
+    second_message = MagicMock(tool_calls=None, content="Final plan")
+    mock_client.complete.side_effect = [
+        MagicMock(choices=[MagicMock(message=first_message)]),
+        MagicMock(choices=[MagicMock(message=second_message)]),
+    ]
+    mock_execute_tool_calls.return_value = [
+        [RetrievedDocument(id="1", text="cpu doc")],
+        [RetrievedDocument(id="2", text="memory doc"), RetrievedDocument(id="1", text="cpu doc")],
+    ]
+
+    alert = make_alert()
+    messages, documents = get_plan(alert)
+
+    mock_execute_tool_calls.assert_called_once_with(tool_calls, alert=alert)
+    tool_messages = [m for m in messages if isinstance(m, dict) and m["role"] == "tool"]
+    assert [(m["tool_call_id"], m["content"]) for m in tool_messages] == [
+        ("call_1", "['cpu doc']"),
+        ("call_2", "['memory doc', 'cpu doc']"),
+    ]
+    assert messages[-1] is second_message
+    # The documents are passed on once, in the order they were first found.
+    assert [document.id for document in documents] == ["1", "2"]
+
+
+@patch("core.llm.client")
+def test_similar_incident_response_is_one_short_call(mock_client, make_alert):
+    from services.incident_history import SimilarIncident
+
+    incident = SimilarIncident(
+        alert_id="a0", title="Test Alert", similarity=0.93, explanation="Past report",
+        plan_summary="", fired_at="2025-07-01T12:00:00Z", investigated_at="2025-07-01T12:01:00Z",
+    )
+    mock_client.complete.return_value = MagicMock(choices=[MagicMock(message=MagicMock(content="Short report"))])
+
+    assert generate_similar_incident_response(make_alert(), incident) == "Short report"
+
+    kwargs = mock_client.complete.call_args.kwargs
+    mock_client.complete.assert_called_once()
+    assert kwargs["operation"] == "similar_incident"
+    assert kwargs["max_tokens"] > 0
+    assert "Past report" in kwargs["messages"][-1]["content"]
@@ -0,0 +1,134 @@
+import asyncio
+from unittest.mock import patch
+
+import openai
+import pytest
+from pydantic.networks import HttpUrl
+
+from benchmarks.stubs import StubOpenAIServer
+from core.llm_client import LLMClient
+from models.canonical import AlertDetails, CanonicalAlert
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def make_client(stub: StubOpenAIServer, **overrides) -> LLMClient:
+    settings = dict(api_key="test-key", base_url=stub.base_url, timeout=5, max_retries=3)
+    settings.update(overrides)
+    return LLMClient(**settings)
+
+
+def test_complete_against_stub_server():
+    with StubOpenAIServer(reply="All good.") as stub:
+        client = make_client(stub)
+        response = client.complete(model="stub-model", messages=MESSAGES)
+        client.close()
+
+    assert response.choices[0].message.content == "All good."
+    assert response.usage.completion_tokens == 2
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_complete_retries_transient_errors(status):
+    with StubOpenAIServer(fail_first=2, fail_status=status) as stub:
+        client = make_client(stub)
+        response = client.complete(model="stub-model", messages=MESSAGES)
+        client.close()
+
+    assert response.choices[0].message.content == "Stub explanation."
+    assert len(stub.requests) == 3
+
+
+def test_complete_gives_up_after_max_retries():
+    with StubOpenAIServer(fail_first=10, fail_status=429) as stub:
+        client = make_client(stub, max_retries=1)
+        with pytest.raises(openai.RateLimitError):
+            client.complete(model="stub-model", messages=MESSAGES)
+        client.close()
+
+    assert len(stub.requests) == 2
+
+
+def test_complete_times_out():
+    with StubOpenAIServer(latency=1.0) as stub:
+        client = make_client(stub, timeout=0.2, max_retries=0)
+        with pytest.raises(openai.APITimeoutError):
+            client.complete(model="stub-model", messages=MESSAGES)
+        client.close()
+
+
+def test_acomplete_respects_concurrency_limit():
+    async def scenario(client):
+        responses = await asyncio.gather(
+            *[client.acomplete(model="stub-model", messages=MESSAGES) for _ in range(6)]
+        )
+        await client.aclose()
+        return responses
+
+    with StubOpenAIServer(latency=0.1) as stub:
+        client = make_client(stub, max_concurrency=2)
+        responses = asyncio.run(scenario(client))
+
+    assert len(responses) == 6
+    assert stub.max_in_flight == 2
+
+
+def test_aget_plan_and_agenerate_response_against_stub_server():
+    from core import llm
+
+    alert = CanonicalAlert(
+        title="Test Alert",
+        environment="test",
+        service="test-service",
+        severity="critical",
+        status="firing",
+        timestamp="2025-07-03T12:00:00Z",
+        details=AlertDetails(metric="test"),
+        link_to_source=HttpUrl("http://example.com/source"),
+        raw_payload={},
+    )
+
+    async def scenario():
+        plan, _ = await llm.aget_plan(alert)
+        response = await llm.agenerate_response(alert, ["doc"], plan)
+        await llm.client.aclose()
+        return plan, response
+
+    with StubOpenAIServer(reply="Check the CPU.") as stub:
+        with patch.object(llm, "client", make_client(stub)):
+            plan, response = asyncio.run(scenario())
+
+    assert plan[-1].content == "Check the CPU."
+    assert response == "Check the CPU."
+    assert len(stub.requests) == 2
+
+
+def test_generate_response_streams_against_stub_server():
+    from core import llm
+
+    alert = CanonicalAlert(
+        title="Test Alert",
+        environment="test",
+        service="test-service",
+        severity="critical",
+        status="firing",
+        timestamp="2025-07-03T12:00:00Z",
+        details=AlertDetails(metric="test"),
+        link_to_source=HttpUrl("http://example.com/source"),
+        raw_payload={},
+    )
+
+    async def consume_async():
+        tokens = await llm.agenerate_response(alert, stream=True)
+        collected = [token async for token in tokens]
+        await llm.client.aclose()
+        return collected
+
+    with StubOpenAIServer(reply="Restart the auth pods.") as stub:
+        with patch.object(llm, "client", make_client(stub)):
+            tokens = list(llm.generate_response(alert, stream=True))
+            async_tokens = asyncio.run(consume_async())
+
+    assert tokens == ["Restart ", "the ", "auth ", "pods."]
+    assert async_tokens == tokens
+    assert all(request["stream"] is True for request in stub.requests)
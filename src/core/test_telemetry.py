@@ -0,0 +1,78 @@
+import json
+import logging
+
+import pytest
+from prometheus_client import REGISTRY
+
+from benchmarks.stubs import StubOpenAIServer
+from core.llm_client import LLMClient
+from core.telemetry import NODE_DURATION, alert_context, render_metrics, timed
+
+MESSAGES = [{"role": "user", "content": "why is the cpu high"}]
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def trace_events(caplog) -> list:
+    return [json.loads(record.message) for record in caplog.records if record.name == "alert_trace"]
+
+
+def test_timed_observes_and_traces_with_alert_id(caplog):
+    caplog.set_level(logging.INFO, logger="alert_trace")
+    before = sample("alert_graph_node_seconds_count", node="test_node", outcome="ok")
+
+    with alert_context("alert-1"), timed("node.test_node", NODE_DURATION, node="test_node") as fields:
+        fields["documents"] = 3
+
+    assert sample("alert_graph_node_seconds_count", node="test_node", outcome="ok") == before + 1
+    [event] = trace_events(caplog)
+    assert event["event"] == "node.test_node"
+    assert event["alert_id"] == "alert-1"
+    assert event["outcome"] == "ok"
+    assert event["documents"] == 3
+    assert event["duration_ms"] >= 0
+
+
+def test_timed_labels_errors():
+    before = sample("alert_graph_node_seconds_count", node="failing_node", outcome="error")
+
+    with pytest.raises(RuntimeError):
+        with timed("node.failing_node", NODE_DURATION, node="failing_node"):
+            raise RuntimeError("boom")
+
+    assert sample("alert_graph_node_seconds_count", node="failing_node", outcome="error") == before + 1
+
+
+def test_alert_context_without_id_keeps_enclosing_alert(caplog):
+    caplog.set_level(logging.INFO, logger="alert_trace")
+
+    with alert_context("alert-2"), alert_context(None):
+        with timed("node.nested", NODE_DURATION, node="nested"):
+            pass
+
+    assert trace_events(caplog)[0]["alert_id"] == "alert-2"
+
+
+def test_llm_client_counts_tokens_of_completions_and_streams():
+    prompt_before = sample("llm_tokens_total", operation="test_complete", kind="prompt")
+    stream_before = sample("llm_tokens_total", operation="test_stream", kind="completion")
+
+    with StubOpenAIServer(reply="Check the pods.") as stub:
+        client = LLMClient(api_key="test-key", base_url=stub.base_url, timeout=5, max_retries=0)
+        client.complete(operation="test_complete", model="stub-model", messages=MESSAGES)
+        assert "".join(client.stream(operation="test_stream", model="stub-model", messages=MESSAGES)) == "Check the pods."
+        client.close()
+
+    assert sample("llm_tokens_total", operation="test_complete", kind="prompt") == prompt_before + 5
+    assert sample("llm_tokens_total", operation="test_stream", kind="completion") == stream_before + 3
+    assert sample("llm_request_seconds_count", operation="test_stream", outcome="ok") >= 1
+
+
+def test_render_metrics_exposes_histograms():
+    body, content_type = render_metrics()
+
+    assert content_type.startswith("text/plain")
+    assert b"alert_graph_node_seconds_bucket" in body
+    assert b"llm_tokens_total" in body
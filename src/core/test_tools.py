@@ -0,0 +1,68 @@
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+from core.tools import TOOL_FUNCTIONS, execute_tool_calls, search_knowledge_base
+
+
+@patch("core.tools.get_vector_db_service")
+def test_search_knowledge_base_uses_shared_service(mock_get_service):
+    mock_service = MagicMock()
+    mock_service.query_documents.return_value = {"documents": [["doc1", "doc2"]]}
+    mock_get_service.return_value = mock_service
+
+    first = search_knowledge_base("cpu usage")
+    second = search_knowledge_base("memory usage")
+
+    assert [str(document) for document in first] == ["doc1", "doc2"]
+    assert [document.text for document in second] == ["doc1", "doc2"]
+    assert mock_get_service.call_count == 2
+    mock_service.query_documents.assert_called_with(query_texts=["memory usage"], n_results=5)
+
+
+def make_tool_call(call_id, name, arguments):
+    tool_call = MagicMock()
+    tool_call.id = call_id
+    tool_call.function.name = name
+    tool_call.function.arguments = json.dumps(arguments)
+    return tool_call
+
+
+@patch("core.tools.get_vector_db_service")
+def test_execute_tool_calls_batches_knowledge_base_searches(mock_get_service):
+    mock_service = MagicMock()
+    mock_service.query_documents.return_value = {"documents": [["cpu doc"], ["memory doc"], ["disk doc"]]}
+    mock_get_service.return_value = mock_service
+    tool_calls = [
+        make_tool_call("call_1", "search_knowledge_base", {"query": "cpu"}),
+        make_tool_call("call_2", "search_knowledge_base", {"query": "memory"}),
+        make_tool_call("call_3", "search_knowledge_base", {"query": "disk"}),
+    ]
+
+    results = execute_tool_calls(tool_calls)
+
+    mock_service.query_documents.assert_called_once_with(
+        query_texts=["cpu", "memory", "disk"], n_results=5
+    )
+    assert [[document.text for document in result] for result in results] == [
+        ["cpu doc"], ["memory doc"], ["disk doc"]
+    ]
+
+
+def test_execute_tool_calls_runs_tools_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def slow_tool(value):
+        # Both calls must be running at the same time to pass the barrier.
+        barrier.wait()
+        return value * 2
+
+    tool_calls = [
+        make_tool_call("call_1", "slow_tool", {"value": 1}),
+        make_tool_call("call_2", "slow_tool", {"value": 2}),
+    ]
+
+    with patch.dict(TOOL_FUNCTIONS, {"slow_tool": slow_tool}):
+        results = execute_tool_calls(tool_calls)
+
+    assert results == [2, 4]
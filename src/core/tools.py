@@ -1,9 +1,108 @@
-from services.vector_db_service import VectorDBService
-from core.config import DB_PATH, DB_COLLECTION_NAME
+import contextvars
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 
-def search_knowledge_base(query: str) -> str:
+from core.config import TOOL_CALL_MAX_WORKERS
+from models.canonical import CanonicalAlert
+from services.retrieval_planner import RetrievalPlanner, RetrievedDocument
+from services.vector_db_service import get_vector_db_service
+
+_retrieval_planner = RetrievalPlanner()
+
+def search_knowledge_base(query: str, alert: Optional[CanonicalAlert] = None) -> List[RetrievedDocument]:
     """Searches the knowledge base for a given query."""
-    vector_db_service = VectorDBService(db_path=DB_PATH, collection_name=DB_COLLECTION_NAME)
-    results = vector_db_service.query_documents(query_texts=[query], n_results=5)
+    return search_knowledge_base_batch([query], alert=alert)[0]
+
+def search_knowledge_base_batch(
+    queries: List[str], alert: Optional[CanonicalAlert] = None
+) -> List[List[RetrievedDocument]]:
+    """
+    Searches the knowledge base for several queries with a single vector query
+    per scope. With an alert, articles about its service and team are preferred.
+    The documents render as their text in the tool result shown to the LLM.
+    """
+    vector_db_service = get_vector_db_service()
+    return _retrieval_planner.search_documents(vector_db_service, queries, alert)
+
+# Tools the LLM may call, by name.
+TOOL_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "search_knowledge_base": search_knowledge_base,
+}
+
+# Tools that can serve several calls at once. Each takes the list of argument
+# dicts of the calls and returns one result per call, in the same order.
+BATCHED_TOOL_FUNCTIONS: Dict[str, Callable[..., List[Any]]] = {
+    "search_knowledge_base": lambda calls, **context: search_knowledge_base_batch(
+        [call["query"] for call in calls], **context
+    ),
+}
+
+# Tools that also receive the alert under investigation as the `alert` keyword
+# argument, e.g. to scope their search. The LLM never sees this argument.
+ALERT_SCOPED_TOOLS = {"search_knowledge_base"}
+
+# Tools returning knowledge base documents. The final report lists those
+# documents once, under the knowledge base context, rather than in the plan.
+DOCUMENT_TOOLS = {"search_knowledge_base"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=TOOL_CALL_MAX_WORKERS, thread_name_prefix="tool-call"
+                )
+    return _executor
+
+def execute_tool_calls(tool_calls: list, alert: Optional[CanonicalAlert] = None) -> List[Any]:
+    """
+    Executes the tool calls requested by the LLM and returns their results in order.
+
+    Calls to a tool with a batched implementation are merged into a single call.
+    The remaining work runs concurrently on a bounded, shared thread pool, so the
+    latency is that of the slowest call rather than the sum of all of them.
+    Tools in ALERT_SCOPED_TOOLS are passed `alert` when one is given.
+    """
+    calls_by_name: Dict[str, List[int]] = {}
+    arguments = []
+    for index, tool_call in enumerate(tool_calls):
+        calls_by_name.setdefault(tool_call.function.name, []).append(index)
+        arguments.append(json.loads(tool_call.function.arguments))
+
+    # Each task is (indices of the calls it serves, callable returning their results).
+    tasks = []
+    for name, indices in calls_by_name.items():
+        context = {"alert": alert} if alert is not None and name in ALERT_SCOPED_TOOLS else {}
+        if name in BATCHED_TOOL_FUNCTIONS and len(indices) > 1:
+            batch_function = BATCHED_TOOL_FUNCTIONS[name]
+            batch_arguments = [arguments[index] for index in indices]
+            tasks.append((indices, lambda f=batch_function, a=batch_arguments, c=context: f(a, **c)))
+        else:
+            function = TOOL_FUNCTIONS[name]
+            for index in indices:
+                tasks.append(([index], lambda f=function, a=arguments[index], c=context: [f(**a, **c)]))
+
+    if len(tasks) == 1:
+        indices, task = tasks[0]
+        return _scatter(len(tool_calls), [(indices, task())])
+
+    # Each task runs in a copy of the caller's context, so that its trace events
+    # are tagged with the alert under investigation.
+    executor = _get_executor()
+    futures: List[tuple] = [
+        (indices, executor.submit(contextvars.copy_context().run, task)) for indices, task in tasks
+    ]
+    return _scatter(len(tool_calls), [(indices, future.result()) for indices, future in futures])
 
-    return results['documents'][0]
+def _scatter(size: int, task_results: List[tuple]) -> List[Any]:
+    results: List[Any] = [None] * size
+    for indices, values in task_results:
+        for index, value in zip(indices, values):
+            results[index] = value
+    return results
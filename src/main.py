@@ -1,11 +1,43 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from api.container import ServiceContainer
 from api.v1.api import api_router
+from core.telemetry import render_metrics
+
+container = ServiceContainer()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fails fast on a misconfiguration; the services warm up in the background.
+    await container.start()
+    app.state.container = container
+    yield
+    await container.stop()
+
 
 app = FastAPI(
     title="Webhook Explainer",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router, prefix="/api/v1")
 
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 200 once the model and index are warm, 503 until then."""
+    status = container.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: alert, workflow node, LLM, vector query and notification latencies and LLM tokens."""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
 # To run the app: uvicorn main:app --reload
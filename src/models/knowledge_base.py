@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 import datetime
 
 class KnowledgeBaseArticle(BaseModel):
@@ -16,3 +16,26 @@ class KnowledgeBaseArticle(BaseModel):
     owner_team: Optional[str] = Field(None, description="The team that owns this article.")
     last_updated: Optional[datetime.datetime] = Field(None, description="When the article was last updated.")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Any other metadata.")
+
+
+class SyncCheckpoint(BaseModel):
+    """
+    Progress of the incremental sync of one knowledge base source, e.g. a Confluence space.
+    """
+    source_key: str = Field(..., description="Identifies the synced source, e.g. the Confluence space key.")
+    last_sync: Optional[datetime.datetime] = Field(None, description="Start time of the last successful sync.")
+    versions: Dict[str, int] = Field(default_factory=dict, description="Article id to the version that was ingested.")
+
+
+class SyncReport(BaseModel):
+    """
+    What a connector listed, and failed to list or fetch, while streaming one sync.
+    """
+    listed_ids: Optional[Set[str]] = Field(None, description="Ids of every article the source listed, if it was listed in full.")
+    listing_failed: bool = Field(False, description="Whether the source could not be listed.")
+    failed_ids: List[str] = Field(default_factory=list, description="Ids of listed articles that could not be fetched.")
+
+    @property
+    def complete(self) -> bool:
+        """Whether every listed article was fetched."""
+        return not self.listing_failed and not self.failed_ids
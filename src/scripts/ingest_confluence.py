@@ -1,13 +1,20 @@
 
+import argparse
+import datetime
 import logging
 import os
-from typing import List, Protocol
+import time
+from typing import Dict, Iterator, List, Optional, Protocol, Set, Union
 
 from dotenv import load_dotenv
 
 from adapters.knowledge_base.base import BaseKnowledgeBaseConnector
 from adapters.knowledge_base.confluence import ConfluenceConnector
-from models.knowledge_base import KnowledgeBaseArticle
+from core.config import INGEST_BATCH_SIZE, RETRIEVAL_SERVER_URL
+from models.knowledge_base import KnowledgeBaseArticle, SyncCheckpoint, SyncReport
+from services.chunking import ArticleChunker
+from services.retrieval_client import RetrievalClient
+from services.sync_checkpoint import SyncCheckpointStore
 from services.vector_db_service import VectorDBService
 
 # Configure logging
@@ -32,28 +39,83 @@ class ConfluenceIngestionPipeline:
     """
     A pipeline for ingesting knowledge base articles from Confluence
     and storing them in a vector database.
+
+    With a checkpoint store the pipeline syncs incrementally: only articles that
+    changed since the last run are fetched and upserted. A full sync re-fetches
+    everything and removes articles that are no longer listed at the source.
+    If any article could not be listed or fetched, nothing is removed and the
+    next run syncs again from the previous checkpoint time.
+
+    Articles are cleaned and split into chunks before they are embedded.
     """
 
     def __init__(
-        self, connector: BaseKnowledgeBaseConnector, db_service: VectorDBService
+        self,
+        connector: BaseKnowledgeBaseConnector,
+        db_service: Union[VectorDBService, RetrievalClient],
+        checkpoint_store: Optional[SyncCheckpointStore] = None,
+        checkpoint_key: str = "",
+        full: bool = False,
+        batch_size: int = INGEST_BATCH_SIZE,
+        chunker: Optional[ArticleChunker] = None,
     ):
         self.connector = connector
         self.db_service = db_service
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint_key = checkpoint_key
+        self.full = full
+        self.batch_size = batch_size
+        self.chunker = chunker or ArticleChunker()
 
     def run(self) -> None:
         """
         Executes the ingestion pipeline.
-        1. Fetches articles from the source.
-        2. Upserts them into the vector database.
+        1. Streams the new and updated articles (or all of them on a full sync).
+        2. Upserts them into the vector database in batches of `batch_size`, so
+           fetching overlaps with embedding and memory use stays flat.
+        3. Records the synced versions in the checkpoint.
         """
         logger.info("Starting ingestion pipeline...")
+        # Changes made while the sync runs are picked up by the next one.
+        sync_started = datetime.datetime.now(datetime.timezone.utc)
+        started = time.monotonic()
+        checkpoint = self._load_checkpoint()
+        full = self.full or checkpoint is None
+        versions: Dict[str, int] = {}
+        fetched_ids: Set[str] = set()
+        report = SyncReport()
+        processed = 0
         try:
-            articles = self._fetch_articles()
-            if articles:
-                self._store_articles(articles)
-                logger.info(f"Successfully processed {len(articles)} articles.")
+            if full:
+                articles = self._fetch_articles(report)
+            else:
+                logger.info("Fetching changed articles from the knowledge base...")
+                articles = self.connector.iter_changed_articles(checkpoint, report=report)
+
+            batch: List[KnowledgeBaseArticle] = []
+            for article in articles:
+                batch.append(article)
+                fetched_ids.add(article.id)
+                if "version" in article.metadata:
+                    versions[article.id] = article.metadata["version"]
+                if len(batch) >= self.batch_size:
+                    self._store_articles(batch)
+                    processed += len(batch)
+                    batch = []
+            if batch:
+                self._store_articles(batch)
+                processed += len(batch)
+
+            if processed:
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f"Successfully processed {processed} articles in {elapsed:.1f}s "
+                    f"({processed / elapsed:.1f} articles/s)."
+                )
             else:
                 logger.info("No articles found to process.")
+            if checkpoint is not None:
+                self._update_checkpoint(checkpoint, versions, fetched_ids, report, full, sync_started)
         except Exception as e:
             logger.exception(f"An error occurred during the ingestion pipeline: {e}")
             # In a real-world scenario, you might want to raise the exception
@@ -62,17 +124,75 @@ class ConfluenceIngestionPipeline:
 
         logger.info("Ingestion pipeline finished.")
 
-    def _fetch_articles(self) -> List[KnowledgeBaseArticle]:
-        """Fetches articles using the configured connector."""
+    def _load_checkpoint(self) -> Optional[SyncCheckpoint]:
+        if self.checkpoint_store is None:
+            return None
+        return self.checkpoint_store.load(self.checkpoint_key)
+
+    def _update_checkpoint(
+        self,
+        checkpoint: SyncCheckpoint,
+        versions: Dict[str, int],
+        fetched_ids: Set[str],
+        report: SyncReport,
+        full: bool,
+        sync_started: datetime.datetime,
+    ) -> None:
+        """
+        Records the ingested versions and removes articles deleted at the source.
+
+        Articles are only removed, and the sync time only advanced, if every
+        article was listed and fetched; otherwise a transient error would delete
+        live articles or hide them from the next incremental sync.
+        """
+        if full and not fetched_ids:
+            # An empty full sync is more likely a failed listing than an empty space.
+            logger.warning("Full sync returned no articles. Keeping the previous checkpoint.")
+            return
+        if not report.complete:
+            logger.warning(
+                f"{len(report.failed_ids)} articles could not be fetched"
+                f"{' and the source could not be listed' if report.listing_failed else ''}. "
+                f"Keeping deleted articles and the previous sync time; the next run retries them."
+            )
+            checkpoint.versions.update(versions)
+        elif full:
+            # Connectors that do not report their listing listed what they returned.
+            listed_ids = fetched_ids if report.listed_ids is None else report.listed_ids
+            deleted = [
+                article_id for article_id in checkpoint.versions if article_id not in listed_ids
+            ]
+            if deleted:
+                logger.info(f"Removing {len(deleted)} articles deleted at the source...")
+                self.db_service.delete_articles(deleted)
+            checkpoint.versions = versions
+        else:
+            checkpoint.versions.update(versions)
+        if report.complete:
+            checkpoint.last_sync = sync_started
+        self.checkpoint_store.save(checkpoint)
+        logger.info(
+            f"Saved sync checkpoint for '{checkpoint.source_key}' "
+            f"({len(checkpoint.versions)} articles)."
+        )
+
+    def _fetch_articles(self, report: SyncReport) -> Iterator[KnowledgeBaseArticle]:
+        """Streams articles from the configured connector, recording failures in `report`."""
         logger.info("Fetching articles from the knowledge base...")
-        return self.connector.fetch_articles()
+        return self.connector.iter_articles(report=report)
 
     def _store_articles(self, articles: List[KnowledgeBaseArticle]) -> None:
-        """Stores articles in the vector database."""
-        logger.info(f"Storing {len(articles)} articles in the vector database...")
-        # The add_documents method in VectorDBService should handle upserting
-        # to ensure idempotency.
-        self.db_service.add_documents(articles)
+        """Splits articles into chunks and stores them in the vector database."""
+        chunks = [chunk for article in articles for chunk in self.chunker.chunk(article)]
+        logger.info(
+            f"Storing {len(chunks)} chunks of {len(articles)} articles in the vector database..."
+        )
+        # An updated article may have fewer chunks than before, so its old chunks
+        # are removed first.
+        self.db_service.delete_articles([article.id for article in articles])
+        # bulk_upsert is idempotent; it embeds the chunks on the embedding worker
+        # processes and writes them in bounded batches.
+        self.db_service.bulk_upsert(chunks)
         logger.info("Finished storing articles.")
 
 
@@ -80,6 +200,14 @@ def main():
     """
     Main function to set up and run the ingestion pipeline.
     """
+    parser = argparse.ArgumentParser(description="Ingest a Confluence space into the vector database.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-fetch every page and remove deleted ones instead of syncing only changes.",
+    )
+    args = parser.parse_args()
+
     # Load environment variables from .env file for local development
     load_dotenv()
 
@@ -112,19 +240,31 @@ def main():
         return
 
     # 2. Set up the Vector Database Service
+    # With a retrieval server running, write through it: it is the only process
+    # that opens the Chroma database.
     try:
-        db_service = VectorDBService(
-            db_path=chroma_db_path, collection_name=collection_name
-        )
+        if RETRIEVAL_SERVER_URL:
+            db_service = RetrievalClient(RETRIEVAL_SERVER_URL)
+        else:
+            db_service = VectorDBService(
+                db_path=chroma_db_path, collection_name=collection_name
+            )
     except Exception as e:
         logger.error(f"Failed to initialize VectorDBService: {e}")
         return
 
     # 3. Set up and run the pipeline
     pipeline: IngestionPipeline = ConfluenceIngestionPipeline(
-        connector=connector, db_service=db_service
+        connector=connector,
+        db_service=db_service,
+        checkpoint_store=SyncCheckpointStore(),
+        checkpoint_key=f"confluence-{confluence_space_key}",
+        full=args.full,
     )
-    pipeline.run()
+    try:
+        pipeline.run()
+    finally:
+        db_service.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+import datetime
+from unittest.mock import MagicMock
+
+import requests
+
+from models.knowledge_base import KnowledgeBaseArticle
+from scripts.ingest_confluence import ConfluenceIngestionPipeline
+from services.sync_checkpoint import SyncCheckpointStore
+
+
+def make_article(article_id, version):
+    return KnowledgeBaseArticle(
+        id=article_id,
+        source="Confluence",
+        title=f"Page {article_id}",
+        content="content",
+        metadata={"version": version},
+    )
+
+
+def make_pipeline(tmp_path, connector, full=False, batch_size=64):
+    db_service = MagicMock()
+    pipeline = ConfluenceIngestionPipeline(
+        connector=connector,
+        db_service=db_service,
+        checkpoint_store=SyncCheckpointStore(str(tmp_path)),
+        checkpoint_key="confluence-FAKE",
+        full=full,
+        batch_size=batch_size,
+    )
+    return pipeline, db_service
+
+
+def test_incremental_sync_upserts_only_changes_and_updates_checkpoint(tmp_path):
+    connector = MagicMock()
+    connector.iter_changed_articles.return_value = [make_article("1", 1), make_article("2", 1)]
+    pipeline, _ = make_pipeline(tmp_path, connector)
+    pipeline.run()
+
+    connector.iter_changed_articles.return_value = [make_article("2", 2)]
+    pipeline, db_service = make_pipeline(tmp_path, connector)
+    pipeline.run()
+
+    checkpoint = connector.iter_changed_articles.call_args[0][0]
+    assert checkpoint.last_sync is not None
+    db_service.delete_articles.assert_called_once_with(["2"])
+    stored = db_service.bulk_upsert.call_args[0][0]
+    assert [chunk.id for chunk in stored] == ["2::chunk-0"]
+    assert stored[0].metadata["parent_id"] == "2"
+    assert SyncCheckpointStore(str(tmp_path)).load("confluence-FAKE").versions == {"1": 1, "2": 2}
+
+
+def test_full_sync_removes_deleted_articles(tmp_path):
+    connector = MagicMock()
+    connector.iter_changed_articles.return_value = [make_article("1", 1), make_article("2", 1)]
+    make_pipeline(tmp_path, connector)[0].run()
+
+    connector.iter_articles.return_value = [make_article("1", 2)]
+    pipeline, db_service = make_pipeline(tmp_path, connector, full=True)
+    pipeline.run()
+
+    connector.iter_articles.assert_called_once()
+    db_service.delete_articles.assert_any_call(["2"])
+    assert SyncCheckpointStore(str(tmp_path)).load("confluence-FAKE").versions == {"1": 2}
+
+
+def test_empty_full_sync_keeps_checkpoint(tmp_path):
+    connector = MagicMock()
+    connector.iter_changed_articles.return_value = [make_article("1", 1)]
+    make_pipeline(tmp_path, connector)[0].run()
+
+    connector.iter_articles.return_value = []
+    pipeline, db_service = make_pipeline(tmp_path, connector, full=True)
+    pipeline.run()
+
+    db_service.delete_articles.assert_not_called()
+    assert SyncCheckpointStore(str(tmp_path)).load("confluence-FAKE").versions == {"1": 1}
+
+
+def test_full_sync_keeps_listed_page_that_failed_to_fetch(tmp_path, confluence_connector, make_page_content):
+    connector = MagicMock()
+    connector.iter_changed_articles.return_value = [make_article("1", 1), make_article("2", 1)]
+    make_pipeline(tmp_path, connector)[0].run()
+    previous_sync = SyncCheckpointStore(str(tmp_path)).load("confluence-FAKE").last_sync
+
+    confluence_connector.confluence.get_all_pages_from_space.return_value = [{"id": "1"}, {"id": "2"}]
+    response = requests.Response()
+    response.status_code = 500
+
+    def get_page_by_id(page_id, expand):
+        if page_id == "2":
+            raise requests.HTTPError("Internal Server Error", response=response)
+        return make_page_content(page_id, 2)
+
+    confluence_connector.confluence.get_page_by_id.side_effect = get_page_by_id
+    pipeline, db_service = make_pipeline(tmp_path, confluence_connector, full=True)
+    pipeline.run()
+
+    assert all("2" not in call[0][0] for call in db_service.delete_articles.call_args_list)
+    checkpoint = SyncCheckpointStore(str(tmp_path)).load("confluence-FAKE")
+    assert checkpoint.versions == {"1": 2, "2": 1}
+    assert checkpoint.last_sync == previous_sync
+
+
+def test_incremental_sync_keeps_last_sync_when_listing_fails(tmp_path, confluence_connector):
+    connector = MagicMock()
+    connector.iter_changed_articles.return_value = [make_article("1", 1)]
+    make_pipeline(tmp_path, connector)[0].run()
+    store = SyncCheckpointStore(str(tmp_path))
+    checkpoint = store.load("confluence-FAKE")
+    checkpoint.last_sync = datetime.datetime(2025, 7, 1, tzinfo=datetime.timezone.utc)
+    store.save(checkpoint)
+
+    from atlassian.errors import ApiError
+    confluence_connector.confluence.cql.side_effect = ApiError("Fake API Error", response=MagicMock(status_code=500))
+    make_pipeline(tmp_path, confluence_connector)[0].run()
+
+    assert store.load("confluence-FAKE").last_sync == checkpoint.last_sync
+
+
+def test_articles_are_upserted_in_batches_while_streaming(tmp_path):
+    stored_before = []
+
+    def articles():
+        for i in range(5):
+            # Record how many articles had been upserted when this one was fetched.
+            stored_before.append(sum(len(call[0][0]) for call in db_service.bulk_upsert.call_args_list))
+            yield make_article(str(i), 1)
+
+    connector = MagicMock()
+    connector.iter_articles.return_value = articles()
+    pipeline, db_service = make_pipeline(tmp_path, connector, full=True, batch_size=2)
+
+    pipeline.run()
+
+    assert [len(call[0][0]) for call in db_service.bulk_upsert.call_args_list] == [2, 2, 1]
+    assert stored_before == [0, 0, 2, 2, 4]
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional
+
+from core.config import ALERT_QUEUE_MAX_SIZE, ALERT_QUEUE_RESERVED_WORKERS, ALERT_QUEUE_WORKERS
+from core.telemetry import ALERT_QUEUE_DEPTH, ALERT_QUEUE_WAIT, trace
+from models.canonical import CanonicalAlert
+from services.alert_scheduler import PRIORITY_NAMES, PriorityFairQueue, alert_flow, alert_priority
+
+if TYPE_CHECKING:
+    # Importing the investigation pipeline pulls in LangGraph, the LLM SDK and Chroma.
+    from services.alert_service import AlertService
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Priorities that may use the reserved workers: critical and high.
+URGENT_PRIORITY = PRIORITY_NAMES.index("high")
+
+
+class AlertQueueFullError(Exception):
+    """
+    Raised when an alert is submitted while the queue is at capacity.
+    """
+
+
+class AlertQueue:
+    """
+    A bounded in-process queue that decouples webhook ingestion from alert investigation.
+
+    The webhook endpoint only normalizes the payload and submits it here. A pool of
+    asyncio workers drains the queue and runs the blocking investigation
+    (LLM calls, vector search, notification) on a dedicated thread pool, so a slow
+    investigation never blocks the event loop.
+
+    Alerts are investigated by severity: critical first, then high, medium and
+    low. Within a severity, the alerts of different (owner team, service) flows
+    take turns, so one noisy service cannot starve the others. Medium and low
+    alerts are deferred while only the `reserved_workers` are idle, which keeps
+    those free for critical and high alerts arriving during a burst.
+    """
+
+    def __init__(
+        self,
+        alert_service: "AlertService",
+        max_size: int = ALERT_QUEUE_MAX_SIZE,
+        num_workers: int = ALERT_QUEUE_WORKERS,
+        reserved_workers: int = ALERT_QUEUE_RESERVED_WORKERS,
+    ):
+        """
+        Initializes the AlertQueue.
+
+        Args:
+            alert_service (AlertService): The service that investigates and notifies.
+            max_size (int): The maximum number of alerts of a severity and the more
+                urgent ones waiting to be processed.
+            num_workers (int): The number of alerts investigated concurrently.
+            reserved_workers (int): Workers only critical and high alerts may use.
+                At most `num_workers - 1`.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1.")
+
+        self.alert_service = alert_service
+        self.max_size = max_size
+        self.num_workers = num_workers
+        self.reserved_workers = max(0, min(reserved_workers, num_workers - 1))
+        self._pending: Optional[PriorityFairQueue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._unfinished = 0
+        self._busy = 0
+        self._workers: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def depth(self) -> int:
+        """The number of alerts waiting for a free worker."""
+        return len(self._pending) if self._pending is not None else 0
+
+    async def start(self) -> None:
+        """
+        Creates the queue and starts the workers on the running event loop.
+        """
+        if self.running:
+            return
+
+        self._pending = PriorityFairQueue()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._unfinished = 0
+        self._busy = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.num_workers, thread_name_prefix="alert-worker"
+        )
+        self._workers = [
+            asyncio.create_task(self._worker(index), name=f"alert-worker-{index}")
+            for index in range(self.num_workers)
+        ]
+        logger.info(
+            f"AlertQueue started with {self.num_workers} workers "
+            f"({self.reserved_workers} reserved for urgent alerts) and capacity {self.max_size}."
+        )
+
+    async def stop(self) -> None:
+        """
+        Stops the workers. Alerts still waiting in the queue are dropped, while
+        investigations that are already running are allowed to finish.
+        """
+        if not self.running:
+            return
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        if self.depth:
+            logger.warning(f"AlertQueue stopped with {self.depth} unprocessed alerts.")
+        for name in PRIORITY_NAMES:
+            ALERT_QUEUE_DEPTH.labels(priority=name).set(0)
+
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True)
+        logger.info("AlertQueue stopped.")
+
+    def submit(self, alert: CanonicalAlert, alert_id: Optional[str] = None) -> str:
+        """
+        Enqueues a normalized alert for investigation without waiting for it.
+
+        Args:
+            alert (CanonicalAlert): The alert to investigate.
+            alert_id (Optional[str]): The id to investigate the alert under, e.g. to
+                retry a failed investigation. A new id is assigned by default.
+
+        Returns:
+            str: The id assigned to the alert.
+
+        Raises:
+            AlertQueueFullError: If `max_size` alerts of the same or a more urgent
+                severity are waiting.
+        """
+        if not self.running:
+            raise RuntimeError("AlertQueue is not running. Call start() first.")
+
+        priority = alert_priority(alert.severity)
+        waiting = sum(self._pending.depth(level) for level in range(priority + 1))
+        if waiting >= self.max_size:
+            raise AlertQueueFullError(
+                f"Alert queue is full ({waiting} alerts of {PRIORITY_NAMES[priority]} "
+                f"or higher priority waiting)."
+            )
+
+        alert_id = alert_id or uuid.uuid4().hex
+        self.alert_service.accept(alert, alert_id)
+        self._pending.push((alert_id, alert, priority, time.monotonic()), priority, alert_flow(alert))
+        ALERT_QUEUE_DEPTH.labels(priority=PRIORITY_NAMES[priority]).inc()
+        self._unfinished += 1
+        self._idle.clear()
+        self._wakeup.set()
+
+        logger.info(
+            f"Queued alert {alert_id} ({alert.title}, {PRIORITY_NAMES[priority]} priority). "
+            f"Queue depth: {self.depth}."
+        )
+        return alert_id
+
+    async def join(self) -> None:
+        """Waits until every queued alert has been processed."""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    def _take(self) -> Optional[tuple]:
+        """Removes the next alert a free worker may start, if any."""
+        priority = self._pending.peek_priority()
+        if priority is None:
+            return None
+        if priority > URGENT_PRIORITY and self._busy >= self.num_workers - self.reserved_workers:
+            # Deferred: the idle workers are kept for urgent alerts.
+            return None
+        self._busy += 1
+        ALERT_QUEUE_DEPTH.labels(priority=PRIORITY_NAMES[priority]).dec()
+        return self._pending.pop()
+
+    async def _worker(self, index: int) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = self._take()
+            if job is None:
+                # Nothing this worker may start: wait for a submission or a finished job.
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            alert_id, alert, priority, queued_at = job
+            waited = time.monotonic() - queued_at
+            ALERT_QUEUE_WAIT.labels(priority=PRIORITY_NAMES[priority]).observe(waited)
+            trace(
+                "alert.dequeued", alert_id=alert_id,
+                priority=PRIORITY_NAMES[priority], wait_ms=round(waited * 1000, 2),
+            )
+            try:
+                await loop.run_in_executor(
+                    self._executor, self.alert_service.handle_alert, alert, alert_id
+                )
+            except Exception as e:
+                logger.exception(f"Worker {index} failed to process alert {alert_id}. Error: {e}")
+            finally:
+                self._busy -= 1
+                self._unfinished -= 1
+                if self._unfinished == 0:
+                    self._idle.set()
+                self._wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "depth_by_priority": {
+                name: self._pending.depth(level) if self._pending is not None else 0
+                for level, name in enumerate(PRIORITY_NAMES)
+            },
+            "max_size": self.max_size,
+            "workers": self.num_workers,
+            "reserved_workers": self.reserved_workers,
+            "busy_workers": self._busy,
+            "running": self.running,
+        }
@@ -0,0 +1,119 @@
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.canonical import CanonicalAlert
+
+# Priorities, most urgent first. The index is the priority level.
+PRIORITY_NAMES = ("critical", "high", "medium", "low")
+
+# Severity spellings of the monitoring systems we ingest, by priority level.
+_SEVERITY_PRIORITIES = {
+    "critical": 0, "crit": 0, "fatal": 0, "emergency": 0, "disaster": 0, "p1": 0, "sev1": 0,
+    "high": 1, "error": 1, "major": 1, "p2": 1, "sev2": 1,
+    "medium": 2, "warning": 2, "warn": 2, "average": 2, "minor": 2, "p3": 2, "sev3": 2,
+    "low": 3, "info": 3, "informational": 3, "information": 3, "ok": 3, "p4": 3, "p5": 3, "sev4": 3,
+}
+# Severities we do not recognize are treated as medium.
+DEFAULT_PRIORITY = 2
+
+
+def alert_priority(severity: Optional[str]) -> int:
+    """
+    Maps an alert severity to a priority level, 0 being the most urgent.
+
+    Args:
+        severity (Optional[str]): The severity, in any of the usual spellings.
+
+    Returns:
+        int: The index of the priority in PRIORITY_NAMES.
+    """
+    return _SEVERITY_PRIORITIES.get((severity or "").strip().lower(), DEFAULT_PRIORITY)
+
+
+def alert_flow(alert: CanonicalAlert) -> Tuple[str, str]:
+    """The flow an alert's investigation is fairly scheduled in: its owning team and service."""
+    return (alert.owner_team or "", alert.service or "")
+
+
+@dataclass(order=True)
+class _Entry:
+    start_tag: float
+    sequence: int
+    flow: Tuple[str, ...] = field(compare=False)
+    item: Any = field(compare=False)
+
+
+class _FairQueue:
+    """
+    Start-time fair queuing of unit-cost items across flows.
+
+    Each item gets a virtual start tag: the later of the queue's virtual time and
+    the finish tag of the previous item of its flow. Items are served in order of
+    start tag, so a flow with many waiting items takes turns with the others
+    instead of being served back to back.
+    """
+
+    def __init__(self):
+        self._heap: List[_Entry] = []
+        self._finish_tags: Dict[Tuple[str, ...], float] = {}
+        self._virtual_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: Any, flow: Tuple[str, ...], sequence: int, weight: float = 1.0) -> None:
+        start_tag = max(self._virtual_time, self._finish_tags.get(flow, 0.0))
+        self._finish_tags[flow] = start_tag + 1.0 / weight
+        heapq.heappush(self._heap, _Entry(start_tag, sequence, flow, item))
+
+    def pop(self) -> Any:
+        entry = heapq.heappop(self._heap)
+        self._virtual_time = entry.start_tag
+        # Flows whose last item finished in the past start afresh at the virtual time.
+        for flow in [flow for flow, tag in self._finish_tags.items() if tag <= self._virtual_time]:
+            del self._finish_tags[flow]
+        return entry.item
+
+
+class PriorityFairQueue:
+    """
+    A priority queue that is fair across flows within each priority.
+
+    `pop` returns an item of the most urgent priority that has any; among the
+    items of that priority, flows are served in turn (weighted fair queuing
+    with equal weights). Not thread-safe.
+    """
+
+    def __init__(self, levels: int = len(PRIORITY_NAMES)):
+        self._levels = [_FairQueue() for _ in range(levels)]
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self._levels)
+
+    def depth(self, priority: int) -> int:
+        return len(self._levels[priority])
+
+    def push(self, item: Any, priority: int, flow: Tuple[str, ...]) -> None:
+        self._levels[priority].push(item, flow, next(self._sequence))
+
+    def peek_priority(self) -> Optional[int]:
+        """The priority of the item `pop` would return, or None when empty."""
+        for priority, level in enumerate(self._levels):
+            if level:
+                return priority
+        return None
+
+    def pop(self) -> Any:
+        """
+        Removes and returns the next item.
+
+        Raises:
+            IndexError: If the queue is empty.
+        """
+        priority = self.peek_priority()
+        if priority is None:
+            raise IndexError("pop from an empty PriorityFairQueue")
+        return self._levels[priority].pop()
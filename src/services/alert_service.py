@@ -1,7 +1,41 @@
-from typing import Dict, Any
+import logging
+from typing import Dict, Any, Optional
 from adapters.ingestion.base import BaseIngestionAdapter
 from adapters.notification.base import BaseNotificationAdapter
+from core.config import PUBLIC_BASE_URL
+from core.telemetry import ALERT_DURATION, alert_context, timed, trace
+from models.canonical import CanonicalAlert
+from services.coalescing_service import AlertCoalescer
+from services.firing_alerts import (
+    FIRING,
+    RESOLVED,
+    FiringAlert,
+    FiringAlertRegistry,
+    alert_state,
+    parse_timestamp,
+)
 from services.graph_service import GraphService
+from services.stream_broker import ExplanationStreamBroker
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_BEFORE_INVESTIGATION = "The alert resolved before it was investigated."
+
+
+def format_duration(seconds: float) -> str:
+    """Formats a duration as e.g. `2h 5m`, `3m 20s` or `45s`."""
+    seconds = max(0, int(seconds))
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
 
 class AlertService:
     def __init__(
@@ -9,15 +43,166 @@ class AlertService:
         ingestion_adapter: BaseIngestionAdapter,
         notification_adapter: BaseNotificationAdapter,
         graph_service: GraphService,
+        coalescer: Optional[AlertCoalescer] = None,
+        stream_broker: Optional[ExplanationStreamBroker] = None,
+        firing_alerts: Optional[FiringAlertRegistry] = None,
+        public_base_url: str = PUBLIC_BASE_URL,
     ):
         self.ingestion_adapter = ingestion_adapter
         self.notification_adapter = notification_adapter
         self.graph_service = graph_service
+        self.coalescer = coalescer or AlertCoalescer()
+        self.stream_broker = stream_broker
+        self.firing_alerts = firing_alerts or FiringAlertRegistry()
+        self.public_base_url = public_base_url.rstrip("/")
+
+    def normalize(self, raw_alert: Dict[str, Any]) -> CanonicalAlert:
+        return self.ingestion_adapter.normalize(raw_alert)
+
+    def accept(self, canonical_alert: CanonicalAlert, alert_id: str) -> None:
+        """
+        Registers a firing alert that was queued for investigation, so a resolution
+        arriving before a worker picks it up finds it.
+        """
+        self.firing_alerts.start(canonical_alert, alert_id)
+
+    def handle_alert(self, canonical_alert: CanonicalAlert, alert_id: Optional[str] = None) -> Optional[str]:
+        """
+        Runs the investigation for an already normalized alert and sends the result.
+        This is the blocking part of the pipeline and is executed by the alert queue workers.
+
+        Duplicates of an alert that is being (or was just) investigated are attached to
+        that investigation instead of running the pipeline again. Their occurrences are
+        reported in the single notification sent for the investigation.
+
+        Resolutions and acknowledgements are not investigated; see `handle_status_change`.
+        Alerts that resolved while they were queued are skipped.
+        """
+        if self.is_status_change(canonical_alert):
+            return self.handle_status_change(canonical_alert, alert_id)
+
+        firing = self.firing_alerts.get(alert_id) if alert_id else None
+        if firing is not None and firing.resolved:
+            logger.info(f"Skipping investigation for alert {alert_id}: it resolved while queued.")
+            if firing.investigating:
+                # Answers the explanation link of the resolution notice.
+                self.firing_alerts.complete(firing, RESOLVED_BEFORE_INVESTIGATION)
+            if self.stream_broker is not None:
+                self.stream_broker.close(alert_id, RESOLVED_BEFORE_INVESTIGATION)
+            return None
+
+        investigation, is_new = self.coalescer.attach(canonical_alert, alert_id)
+        if not is_new:
+            logger.info(
+                f"Skipping investigation for alert {alert_id}: duplicate of {investigation.alert_id}."
+            )
+            if self.stream_broker is not None and alert_id and investigation.alert_id:
+                self.stream_broker.alias(alert_id, investigation.alert_id)
+            return investigation.explanation
+
+        if firing is None or not firing.investigating:
+            # Not queued (or a new investigation of an alert still firing): register
+            # it before investigating, so a resolution arriving meanwhile finds it.
+            firing = self.firing_alerts.start(canonical_alert, alert_id)
+        with alert_context(alert_id), timed("alert.investigation", ALERT_DURATION) as fields:
+            fields["severity"] = canonical_alert.severity
+            try:
+                explanation = self.graph_service.run(canonical_alert, alert_id=alert_id)
+            except Exception as e:
+                self.coalescer.fail(investigation)
+                self.firing_alerts.fail(firing)
+                if self.stream_broker is not None and alert_id:
+                    self.stream_broker.fail(alert_id, str(e))
+                raise
+            self.coalescer.complete(investigation, explanation)
+            self.firing_alerts.complete(firing, explanation)
+            if self.stream_broker is not None and alert_id:
+                self.stream_broker.close(alert_id, explanation)
+
+            fields["explanation_chars"] = len(explanation)
+            if firing.resolved:
+                # The resolution notice already went out and links to this explanation.
+                logger.info(f"Alert {alert_id} resolved during its investigation. Not sending the explanation.")
+                return explanation
+            self.notification_adapter.send(
+                canonical_alert, explanation, occurrences=investigation.occurrences
+            )
+        return explanation
+
+    def is_status_change(self, canonical_alert: CanonicalAlert) -> bool:
+        """Whether the alert resolves or acknowledges an alert rather than firing one."""
+        return alert_state(canonical_alert.status) != FIRING
+
+    def handle_status_change(self, canonical_alert: CanonicalAlert, alert_id: Optional[str] = None) -> str:
+        """
+        Sends a templated notice for a resolved or acknowledged alert.
+
+        The notice refers to the investigation of the matching firing alert (same
+        fingerprint): how long ago it fired and a link to its explanation. Neither
+        the LLM nor the knowledge base is queried, so the notice goes out at once.
+        An investigation that has not finished when its alert resolves is skipped
+        if it is still queued, or finishes without notifying; the notice links to
+        its explanation instead.
+
+        Returns:
+            str: The notice.
+        """
+        state = alert_state(canonical_alert.status)
+        if state == RESOLVED:
+            firing = self.firing_alerts.resolve(canonical_alert)
+            self.coalescer.release(canonical_alert)
+        else:
+            firing = self.firing_alerts.acknowledge(canonical_alert)
+        notice = self.build_status_notice(canonical_alert, state, firing)
+
+        with alert_context(alert_id):
+            trace(
+                "alert.status_change", state=state,
+                firing_alert_id=firing.alert_id if firing else None,
+            )
+            if self.stream_broker is not None and alert_id:
+                self.stream_broker.close(alert_id, notice)
+            self.notification_adapter.send_status_change(canonical_alert, notice)
+        return notice
+
+    def build_status_notice(
+        self, canonical_alert: CanonicalAlert, state: str, firing: Optional[FiringAlert]
+    ) -> str:
+        """
+        Renders the notice of a resolution or acknowledgement.
+
+        Args:
+            canonical_alert (CanonicalAlert): The resolving or acknowledging alert.
+            state (str): RESOLVED or ACKNOWLEDGED.
+            firing (Optional[FiringAlert]): The matching firing alert, if it was investigated.
+
+        Returns:
+            str: The notice.
+        """
+        verb = "Resolved" if state == RESOLVED else "Acknowledged"
+        if firing is None:
+            return f"{verb}. No investigation of this alert is on record."
+
+        notice = verb
+        changed_at = parse_timestamp(canonical_alert.timestamp)
+        if changed_at is not None and changed_at >= firing.fired_at:
+            notice += f" {format_duration((changed_at - firing.fired_at).total_seconds())} after firing"
+        notice += f" (fired at {firing.fired_at.strftime('%Y-%m-%d %H:%M:%S %Z')})."
+        link = self.explanation_link(firing.alert_id)
+        if firing.investigating:
+            notice += " The investigation had not finished and its explanation will not be posted."
+            if link:
+                notice += f" It will be available at {link}"
+        elif link:
+            notice += f" Original explanation: {link}"
+        return notice
+
+    def explanation_link(self, alert_id: Optional[str]) -> Optional[str]:
+        """The URL of an investigated alert's explanation, if PUBLIC_BASE_URL is set."""
+        if not alert_id or not self.public_base_url:
+            return None
+        return f"{self.public_base_url}/api/v1/webhook/alerts/{alert_id}/explanation"
 
     def process_alert(self, raw_alert: Dict[str, Any]):
-        canonical_alert = self.ingestion_adapter.normalize(raw_alert)
-        
-        explanation = self.graph_service.run(canonical_alert)
-        
-        print(explanation)
-        self.notification_adapter.send(canonical_alert, explanation)
+        canonical_alert = self.normalize(raw_alert)
+        self.handle_alert(canonical_alert)
@@ -0,0 +1,262 @@
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Callable, List, Optional, Tuple
+
+from core.config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+from models.knowledge_base import KnowledgeBaseArticle
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Separates the parent article id from the chunk number in chunk ids.
+CHUNK_ID_SEPARATOR = "::chunk-"
+
+_HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_BLOCK_TAGS = {
+    "p", "div", "br", "li", "tr", "pre", "blockquote", "table", "ul", "ol",
+    "section", "hr", "ac:task", "ac:plain-text-body",
+}
+_CELL_TAGS = {"td", "th"}
+# Elements whose content is never useful text.
+_SKIPPED_TAGS = {"script", "style", "ac:parameter", "ac:placeholder", "ri:attachment"}
+# Confluence macros that render navigation or external content rather than page text.
+_SKIPPED_MACROS = {"toc", "children", "pagetree", "recently-updated", "jira", "anchor", "attachments"}
+
+_WORD_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimates the number of word pieces a text is split into by the embedding model.
+
+    Words and punctuation marks are counted separately, which slightly
+    underestimates the word pieces of rare words; the default limits leave
+    headroom for that.
+    """
+    return len(_WORD_PIECE.findall(text))
+
+
+class _StorageFormatParser(HTMLParser):
+    """Turns Confluence storage-format XHTML into (heading, text) sections."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sections: List[Tuple[str, List[str]]] = [("", [])]
+        self._line: List[str] = []
+        self._heading: Optional[List[str]] = None
+        self._skip_depth = 0
+        self._macros: List[bool] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "ac:structured-macro":
+            skipped = dict(attrs).get("ac:name", "") in _SKIPPED_MACROS
+            self._macros.append(skipped)
+            if skipped:
+                self._skip_depth += 1
+        elif tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in _HEADING_TAGS:
+            self._end_line()
+            self._heading = []
+        elif tag in _BLOCK_TAGS:
+            self._end_line()
+            if tag == "li":
+                self._line.append("- ")
+        elif tag in _CELL_TAGS:
+            self._line.append(" | ")
+
+    def handle_endtag(self, tag):
+        if tag == "ac:structured-macro":
+            if self._macros and self._macros.pop():
+                self._skip_depth -= 1
+        elif tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _HEADING_TAGS and self._heading is not None:
+            heading = _normalize_space("".join(self._heading))
+            self._heading = None
+            self.sections.append((heading, []))
+        elif tag in _BLOCK_TAGS:
+            self._end_line()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._end_line()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._heading is not None:
+            self._heading.append(data)
+        else:
+            self._line.append(data)
+
+    def unknown_decl(self, data):
+        # Code and no-format macros keep their body in CDATA sections.
+        if data.startswith("CDATA["):
+            for line in data[len("CDATA["):].splitlines():
+                self.handle_data(line)
+                self._end_line()
+
+    def close(self):
+        super().close()
+        self._end_line()
+
+    def _end_line(self):
+        line = _normalize_space("".join(self._line)).strip(" |")
+        self._line = []
+        if line and line != "-":
+            self.sections[-1][1].append(line)
+
+
+def _normalize_space(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def html_to_sections(html: str) -> List[Tuple[str, str]]:
+    """
+    Strips markup and macros from Confluence storage-format XHTML.
+
+    Args:
+        html (str): The page body.
+
+    Returns:
+        List[Tuple[str, str]]: `(heading, text)` for every section of the page that
+            has text, in document order. Text before the first heading has an empty
+            heading.
+    """
+    parser = _StorageFormatParser()
+    parser.feed(html)
+    parser.close()
+    return [(heading, "\n".join(lines)) for heading, lines in parser.sections if lines]
+
+
+def split_into_windows(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    token_counter: Callable[[str], int] = count_tokens,
+) -> List[str]:
+    """
+    Splits text into windows of at most `max_tokens`, each repeating about
+    `overlap_tokens` from the end of the previous one.
+
+    Lines are kept whole where possible; a line longer than a window is split
+    between words.
+    """
+    units: List[Tuple[str, int]] = []
+    for line in text.splitlines():
+        tokens = token_counter(line)
+        if tokens <= max_tokens:
+            units.append((line, tokens))
+            continue
+        words = line.split()
+        start = 0
+        while start < len(words):
+            end, window_tokens = start, 0
+            while end < len(words) and window_tokens + token_counter(words[end]) <= max_tokens:
+                window_tokens += token_counter(words[end])
+                end += 1
+            end = max(end, start + 1)
+            piece = " ".join(words[start:end])
+            units.append((piece, token_counter(piece)))
+            if end >= len(words):
+                break
+            # Start the next piece a few words back, so that the pieces overlap.
+            back, back_tokens = end, 0
+            while back > start + 1 and back_tokens + token_counter(words[back - 1]) <= overlap_tokens:
+                back -= 1
+                back_tokens += token_counter(words[back])
+            start = back
+
+    windows: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    for unit, tokens in units:
+        if current and current_tokens + tokens > max_tokens:
+            windows.append("\n".join(text for text, _ in current))
+            # Carry the trailing lines that fit into the overlap.
+            carried: List[Tuple[str, int]] = []
+            carried_tokens = 0
+            for previous in reversed(current):
+                if carried_tokens + previous[1] > overlap_tokens or carried_tokens + previous[1] + tokens > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[1]
+            current, current_tokens = carried, carried_tokens
+        current.append((unit, tokens))
+        current_tokens += tokens
+    if current:
+        windows.append("\n".join(text for text, _ in current))
+    return windows
+
+
+class ArticleChunker:
+    """
+    Splits knowledge base articles into cleaned, token-bounded chunks for embedding.
+
+    Every chunk is stored as its own document with the id
+    `<article id>::chunk-<n>` and keeps the article's metadata plus `parent_id`,
+    `chunk_index` and `section`, so that all chunks of an article can be found
+    (and replaced) by the parent id.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = CHUNK_MAX_TOKENS,
+        overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+        token_counter: Callable[[str], int] = count_tokens,
+    ):
+        """
+        Initializes the ArticleChunker.
+
+        Args:
+            max_tokens (int): Maximum tokens per chunk, including the title line.
+            overlap_tokens (int): Tokens repeated from the end of the previous chunk.
+            token_counter (Callable[[str], int]): Counts the tokens of a text.
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens.")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.token_counter = token_counter
+
+    def chunk(self, article: KnowledgeBaseArticle) -> List[KnowledgeBaseArticle]:
+        """
+        Splits an article into chunks.
+
+        Args:
+            article (KnowledgeBaseArticle): The article with its raw content.
+
+        Returns:
+            List[KnowledgeBaseArticle]: The chunks, in document order. Empty if the
+                article has no text.
+        """
+        chunks = []
+        for heading, text in html_to_sections(article.content):
+            title = f"{article.title} > {heading}" if heading else article.title
+            budget = self.max_tokens - self.token_counter(title)
+            if budget <= self.overlap_tokens:
+                # A very long heading would leave no room for the text.
+                title, budget = article.title, self.max_tokens - self.token_counter(article.title)
+            for window in split_into_windows(
+                text, max(budget, self.overlap_tokens + 1), self.overlap_tokens, self.token_counter
+            ):
+                index = len(chunks)
+                chunks.append(
+                    article.model_copy(
+                        update={
+                            "id": f"{article.id}{CHUNK_ID_SEPARATOR}{index}",
+                            "content": f"{title}\n{window}",
+                            "metadata": {
+                                **article.metadata,
+                                "parent_id": article.id,
+                                "chunk_index": index,
+                                "section": heading,
+                            },
+                        }
+                    )
+                )
+        if not chunks:
+            logger.info(f"Article '{article.id}' has no text to index.")
+        return chunks
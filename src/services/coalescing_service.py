@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.config import COALESCE_WINDOW_SECONDS
+from models.canonical import CanonicalAlert
+from services.fingerprint import compute_fingerprint
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Investigation:
+    """
+    A single investigation shared by every duplicate of an alert within the window.
+    """
+    fingerprint: str
+    started_at: float
+    alert_ids: List[Optional[str]] = field(default_factory=list)
+    explanation: Optional[str] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def alert_id(self) -> Optional[str]:
+        """The id of the alert that started the investigation."""
+        return self.alert_ids[0] if self.alert_ids else None
+
+    @property
+    def occurrences(self) -> int:
+        return len(self.alert_ids)
+
+    @property
+    def in_flight(self) -> bool:
+        return self.finished_at is None
+
+
+class AlertCoalescer:
+    """
+    Groups duplicate alerts so that an alert storm triggers only one investigation.
+
+    The first alert with a given fingerprint starts an investigation. Duplicates that
+    arrive while it is running, or within `window_seconds` of its start, are attached
+    to it instead of starting a new one.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = COALESCE_WINDOW_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initializes the AlertCoalescer.
+
+        Args:
+            window_seconds (float): How long a finished investigation is reused for.
+                A value of 0 disables coalescing of finished investigations.
+            clock (Callable[[], float]): Monotonic time source, injectable for tests.
+        """
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._investigations: Dict[str, Investigation] = {}
+
+    def attach(
+        self, alert: CanonicalAlert, alert_id: Optional[str] = None
+    ) -> Tuple[Investigation, bool]:
+        """
+        Attaches an alert to a matching investigation or starts a new one.
+
+        Args:
+            alert (CanonicalAlert): The incoming alert.
+            alert_id (Optional[str]): The id assigned to the alert on ingestion.
+
+        Returns:
+            Tuple[Investigation, bool]: The investigation and whether the caller
+            started it and is therefore responsible for running it.
+        """
+        fingerprint = compute_fingerprint(alert)
+        now = self._clock()
+        with self._lock:
+            self._prune(now)
+            investigation = self._investigations.get(fingerprint)
+            if investigation is not None:
+                investigation.alert_ids.append(alert_id)
+                logger.info(
+                    f"Coalesced alert {alert_id} into investigation {investigation.alert_id} "
+                    f"({investigation.occurrences} occurrences)."
+                )
+                return investigation, False
+
+            investigation = Investigation(
+                fingerprint=fingerprint, started_at=now, alert_ids=[alert_id]
+            )
+            self._investigations[fingerprint] = investigation
+            return investigation, True
+
+    def complete(self, investigation: Investigation, explanation: str) -> None:
+        """Records the explanation so later duplicates can reuse it."""
+        with self._lock:
+            investigation.explanation = explanation
+            investigation.finished_at = self._clock()
+
+    def fail(self, investigation: Investigation) -> None:
+        """Forgets a failed investigation so the next duplicate retries it."""
+        with self._lock:
+            if self._investigations.get(investigation.fingerprint) is investigation:
+                del self._investigations[investigation.fingerprint]
+
+    def release(self, alert: CanonicalAlert) -> None:
+        """
+        Forgets the investigation matching a resolved alert, so the alert firing
+        again is investigated anew. A running investigation finishes, but later
+        duplicates no longer attach to it.
+        """
+        with self._lock:
+            self._investigations.pop(compute_fingerprint(alert), None)
+
+    def _prune(self, now: float) -> None:
+        expired = [
+            fingerprint
+            for fingerprint, investigation in self._investigations.items()
+            if not investigation.in_flight
+            and now - investigation.started_at >= self.window_seconds
+        ]
+        for fingerprint in expired:
+            del self._investigations[fingerprint]
@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from core.config import (
+    LLM_CONTEXT_DOCUMENT_TOKENS,
+    LLM_CONTEXT_PLAN_TOKENS,
+    LLM_CONTEXT_TOKEN_BUDGET,
+    LLM_MODEL,
+    LLM_TOKENIZER_ENCODING,
+)
+from core.tools import DOCUMENT_TOOLS
+from services.retrieval_planner import RetrievedDocument
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Marks text cut to fit the budget.
+TRUNCATION_MARKER = " [...]"
+# A document that would be cut to fewer tokens than this is left out instead.
+MIN_DOCUMENT_TOKENS = 32
+
+_WORD_PIECE = re.compile(r"\w+|[^\w\s]")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+class _TiktokenTokenizer:
+    def __init__(self, encoding):
+        self.encoding = encoding
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens])
+
+
+class _WordPieceTokenizer:
+    """
+    Estimates tokens as words and punctuation marks, for models tiktoken does
+    not know. Close to the BPE token count of English prose, slightly below it
+    for identifiers and numbers.
+    """
+
+    def count(self, text: str) -> int:
+        return len(_WORD_PIECE.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        for index, match in enumerate(_WORD_PIECE.finditer(text)):
+            if index == max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+
+
+def load_tokenizer(model: Optional[str] = LLM_MODEL, encoding: str = LLM_TOKENIZER_ENCODING):
+    """
+    Returns the tokenizer of the target model.
+
+    Uses the tiktoken encoding named by `encoding`, or else the one tiktoken
+    associates with `model`. Falls back to a word-piece estimate when tiktoken is
+    not installed, does not know the model or cannot load the encoding.
+
+    Returns:
+        An object with `count(text)` and `truncate(text, max_tokens)`.
+    """
+    try:
+        import tiktoken
+
+        if encoding:
+            return _TiktokenTokenizer(tiktoken.get_encoding(encoding))
+        return _TiktokenTokenizer(tiktoken.encoding_for_model(model or ""))
+    except ImportError:
+        logger.info("tiktoken is not installed. Estimating prompt tokens from words.")
+    except KeyError:
+        logger.info(f"No tiktoken encoding for model '{model}'. Estimating prompt tokens from words.")
+    except Exception as e:
+        logger.warning(f"Failed to load the tiktoken encoding. Estimating prompt tokens from words. Error: {e}")
+    return _WordPieceTokenizer()
+
+
+@dataclass
+class AssembledContext:
+    """The plan and knowledge base documents fitted into the prompt's token budget."""
+
+    plan: str
+    documents: List[str] = field(default_factory=list)
+    plan_tokens: int = 0
+    document_tokens: int = 0
+    dropped_documents: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return self.plan_tokens + self.document_tokens
+
+
+def message_field(message: Any, name: str) -> Any:
+    """Reads a field of a plan message, which is a plain dict or a ChatCompletionMessage."""
+    if isinstance(message, dict):
+        return message.get(name)
+    return getattr(message, name, None)
+
+
+def _normalize(passage: str) -> str:
+    return " ".join(passage.lower().split())
+
+
+class ContextAssembler:
+    """
+    Fits the investigation plan and the retrieved documents into a token budget.
+
+    The plan is compacted to the text of its assistant and tool messages; the
+    planning prompt is left out, and results of document tools are replaced by
+    a pointer to the knowledge base context, which lists those documents. The
+    documents are ranked by retrieval distance, each is cut to
+    `max_document_tokens`, and paragraphs already included by a better-ranked
+    document are dropped. Documents are added until the budget left after the
+    plan is used up.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = LLM_CONTEXT_TOKEN_BUDGET,
+        max_plan_tokens: int = LLM_CONTEXT_PLAN_TOKENS,
+        max_document_tokens: int = LLM_CONTEXT_DOCUMENT_TOKENS,
+        tokenizer=None,
+    ):
+        """
+        Initializes the ContextAssembler.
+
+        Args:
+            token_budget (int): Tokens for the plan and the documents together.
+            max_plan_tokens (int): Tokens for the compacted plan.
+            max_document_tokens (int): Tokens for a single document.
+            tokenizer: Counts and truncates tokens; loaded for LLM_MODEL on first use
+                when not given.
+        """
+        self.token_budget = token_budget
+        self.max_plan_tokens = min(max_plan_tokens, token_budget)
+        self.max_document_tokens = max_document_tokens
+        self._tokenizer = tokenizer
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = load_tokenizer()
+        return self._tokenizer
+
+    def compact_plan(self, plan: List[Any]) -> str:
+        """
+        Renders the plan messages as `role: content` lines.
+
+        System and user messages (the planning prompt) are skipped, tool call
+        requests are rendered as the call, and document tool results as a
+        pointer to the knowledge base context.
+        """
+        lines = []
+        for message in plan:
+            role = message_field(message, "role")
+            if role == "assistant":
+                for tool_call in message_field(message, "tool_calls") or []:
+                    function = message_field(tool_call, "function")
+                    lines.append(
+                        f"assistant: called {message_field(function, 'name')}"
+                        f"({message_field(function, 'arguments')})"
+                    )
+                content = message_field(message, "content")
+                if content:
+                    lines.append(f"assistant: {content.strip()}")
+            elif role == "tool":
+                if message_field(message, "name") in DOCUMENT_TOOLS:
+                    content = "(documents listed in the knowledge base context)"
+                else:
+                    content = str(message_field(message, "content") or "").strip()
+                lines.append(f"tool {message_field(message, 'name')}: {content}")
+        return "\n".join(lines)
+
+    def assemble(self, plan: List[Any], documents: List[RetrievedDocument]) -> AssembledContext:
+        """
+        Builds the prompt context from the plan and the retrieved documents.
+
+        Args:
+            plan (List[Any]): The plan messages.
+            documents (List[RetrievedDocument]): The retrieved documents.
+
+        Returns:
+            AssembledContext: The compacted plan and the documents that fit, best first.
+        """
+        tokenizer = self.tokenizer
+        plan_text = self._fit(self.compact_plan(plan), self.max_plan_tokens)
+        context = AssembledContext(plan=plan_text, plan_tokens=tokenizer.count(plan_text))
+
+        remaining = self.token_budget - context.plan_tokens
+        seen_passages = set()
+        ranked = sorted(
+            documents,
+            key=lambda document: float("inf") if document.distance is None else document.distance,
+        )
+        for index, document in enumerate(ranked):
+            passages = {}
+            for passage in _PARAGRAPH_BREAK.split(document.text.strip()):
+                key = hashlib.sha1(_normalize(passage).encode("utf-8")).digest()
+                if passage.strip() and key not in seen_passages:
+                    passages.setdefault(key, passage.strip())
+            if not passages:
+                continue
+            limit = min(self.max_document_tokens, remaining)
+            if limit < MIN_DOCUMENT_TOKENS:
+                context.dropped_documents = len(ranked) - index
+                break
+            text = self._fit("\n\n".join(passages.values()), limit)
+            # Only passages that survived the truncation whole are left out of
+            # lower-ranked documents.
+            kept = text[:-len(TRUNCATION_MARKER)] if text.endswith(TRUNCATION_MARKER) else text
+            end = 0
+            for key, passage in passages.items():
+                end += len(passage)
+                if end > len(kept):
+                    break
+                seen_passages.add(key)
+                end += 2
+            tokens = tokenizer.count(text)
+            context.documents.append(text)
+            context.document_tokens += tokens
+            remaining -= tokens
+
+        if context.dropped_documents:
+            logger.info(
+                f"Left {context.dropped_documents} of {len(ranked)} documents out of the "
+                f"prompt to stay within {self.token_budget} tokens."
+            )
+        return context
+
+    def _fit(self, text: str, max_tokens: int) -> str:
+        if self.tokenizer.count(text) <= max_tokens:
+            return text
+        marker_tokens = self.tokenizer.count(TRUNCATION_MARKER)
+        return self.tokenizer.truncate(text, max(0, max_tokens - marker_tokens)) + TRUNCATION_MARKER
@@ -0,0 +1,233 @@
+import functools
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from core.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_ONNX_MODEL_DIR,
+    EMBEDDING_ONNX_REPO,
+    EMBEDDING_THREADS,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# all-MiniLM-L6-v2 was trained on sequences of at most 256 word pieces, and
+# sentence-transformers truncates its input to that length.
+MAX_SEQUENCE_LENGTH = 256
+
+SENTENCE_TRANSFORMERS_BACKEND = "sentence-transformers"
+ONNX_INT8_BACKEND = "onnx-int8"
+
+
+class OnnxEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Computes all-MiniLM-L6-v2 sentence embeddings with ONNX Runtime on the CPU.
+
+    Texts are tokenized with the model's fast tokenizer, sorted by length and run
+    in batches of `batch_size`, so that a batch is padded to similar lengths only.
+    The token embeddings are mean-pooled over the attention mask and normalized,
+    as sentence-transformers does for this model.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_path: str,
+        threads: int = EMBEDDING_THREADS,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_length: int = MAX_SEQUENCE_LENGTH,
+    ):
+        """
+        Initializes the OnnxEmbeddingFunction.
+
+        Args:
+            model_path (str): Path of the ONNX model file.
+            tokenizer_path (str): Path of the model's `tokenizer.json`.
+            threads (int): Intra-op threads of the ONNX Runtime session
+                (0 = one per core).
+            batch_size (int): Number of texts run through the model at a time.
+            max_length (int): Texts are truncated to this many tokens.
+        """
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The onnx-int8 embedding backend requires the onnxruntime and tokenizers packages."
+            ) from e
+
+        self.model_path = model_path
+        self.tokenizer_path = tokenizer_path
+        self.threads = threads
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX embedding model '{model_path}' ({threads or 'all'} threads).")
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            for index, vector in zip(indices, self._embed_batch([texts[i] for i in indices])):
+                embeddings[index] = vector
+        return embeddings
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        output = self.session.run(None, {name: feeds[name] for name in self._input_names})[0]
+        if output.ndim == 3:
+            # Token embeddings: average the ones that are not padding.
+            mask = attention_mask[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return (output / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    @staticmethod
+    def name() -> str:
+        return "onnx_int8_minilm"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "model_path": self.model_path,
+            "tokenizer_path": self.tokenizer_path,
+            "threads": self.threads,
+            "batch_size": self.batch_size,
+            "max_length": self.max_length,
+        }
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "OnnxEmbeddingFunction":
+        return OnnxEmbeddingFunction(**config)
+
+    def default_space(self):
+        # The embeddings are normalized, as those of the sentence-transformers backend.
+        return "cosine"
+
+
+def resolve_onnx_model(
+    model_dir: str = EMBEDDING_ONNX_MODEL_DIR,
+    repo: str = EMBEDDING_ONNX_REPO,
+    model_file: str = EMBEDDING_ONNX_FILE,
+) -> Tuple[str, str]:
+    """
+    Locates the ONNX model and its tokenizer, downloading them if needed.
+
+    Args:
+        model_dir (str): Local directory holding `model_file` and `tokenizer.json`.
+            When empty, both are fetched from `repo` into the Hugging Face cache.
+        repo (str): The Hugging Face repository of the exported model.
+        model_file (str): Path of the model file within the directory or repository.
+
+    Returns:
+        Tuple[str, str]: The paths of the model file and of `tokenizer.json`.
+    """
+    if model_dir:
+        return os.path.join(model_dir, model_file), os.path.join(model_dir, "tokenizer.json")
+
+    from huggingface_hub import hf_hub_download
+
+    return (
+        hf_hub_download(repo_id=repo, filename=model_file),
+        hf_hub_download(repo_id=repo, filename="tokenizer.json"),
+    )
+
+
+def _create_sentence_transformer(threads: int) -> EmbeddingFunction:
+    from chromadb.utils import embedding_functions
+
+    embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name=EMBEDDING_MODEL_NAME
+    )
+    if threads:
+        import torch
+
+        torch.set_num_threads(threads)
+    return embedding_function
+
+
+def _create_onnx_int8(threads: int) -> EmbeddingFunction:
+    model_path, tokenizer_path = resolve_onnx_model()
+    return OnnxEmbeddingFunction(model_path, tokenizer_path, threads=threads)
+
+
+# Embedding backends by name. Each factory takes the number of threads the model
+# may use (0 = the backend's default) and returns a Chroma embedding function.
+EMBEDDING_BACKENDS: Dict[str, Callable[[int], EmbeddingFunction]] = {
+    SENTENCE_TRANSFORMERS_BACKEND: _create_sentence_transformer,
+    ONNX_INT8_BACKEND: _create_onnx_int8,
+}
+
+
+def create_embedding_function(
+    backend: str = EMBEDDING_BACKEND, threads: int = EMBEDDING_THREADS
+) -> EmbeddingFunction:
+    """
+    Creates the embedding function of a backend.
+
+    Args:
+        backend (str): A key of EMBEDDING_BACKENDS.
+        threads (int): Threads the model may use (0 = the backend's default).
+
+    Returns:
+        EmbeddingFunction: The loaded model.
+    """
+    try:
+        factory = EMBEDDING_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}'. Expected one of: {', '.join(EMBEDDING_BACKENDS)}."
+        ) from None
+    return factory(threads)
+
+
+def embedding_function_factory(
+    backend: str = EMBEDDING_BACKEND, threads: int = 0
+) -> Callable[[], EmbeddingFunction]:
+    """
+    Returns a picklable callable creating the backend's embedding function, e.g.
+    for the processes of an EmbeddingPool.
+    """
+    return functools.partial(create_embedding_function, backend, threads)
+
+
+def embedding_namespace(backend: str = EMBEDDING_BACKEND) -> str:
+    """
+    Returns the embedding cache namespace of a backend.
+
+    The backends compute slightly different vectors for the same text, so their
+    cached embeddings are kept apart. The sentence-transformers backend keeps the
+    bare model name used before backends were selectable.
+    """
+    if backend == SENTENCE_TRANSFORMERS_BACKEND:
+        return EMBEDDING_MODEL_NAME
+    return f"{EMBEDDING_MODEL_NAME}:{backend}"
@@ -0,0 +1,319 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from core.config import EMBEDDING_CACHE_MEMORY_SIZE, EMBEDDING_CACHE_PATH
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def make_embedding_key(text: str, namespace: str = "") -> str:
+    """
+    Builds the cache key for the embedding of a text.
+
+    Args:
+        text (str): The embedded text.
+        namespace (str): Identifies the model, so that embeddings from different
+            models never share a key.
+
+    Returns:
+        str: A hex-encoded SHA-256 of the namespace and the text.
+    """
+    return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    A persistent store of float32 embeddings indexed by content hash.
+
+    The vectors are appended to a flat float32 file that is read through a
+    memory map; a SQLite index maps every key to its row. Writers serialize on a
+    SQLite write transaction, so the ingestion script and the API server can
+    share one store. Rows past the last indexed one, e.g. left by a writer that
+    died while appending, are cut off before the next append.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.sqlite3"
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        """
+        Initializes the EmbeddingStore.
+
+        Args:
+            path (str): Directory holding the vector file and its index.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, self.VECTORS_FILE)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(path, self.INDEX_FILE), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dimension'").fetchone()
+        self.dimension: Optional[int] = int(row[0]) if row else None
+        self._vectors: Optional[np.memmap] = None
+        if self.dimension is not None:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._truncate_to_index(self.dimension)
+            finally:
+                self._conn.execute("COMMIT")
+        logger.info(f"EmbeddingStore persisting to '{path}'.")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Returns the stored embeddings for the given keys. Missing keys are left out.
+        """
+        keys = list(keys)
+        if not keys or self.dimension is None:
+            return {}
+        with self._lock:
+            rows: Dict[str, int] = {}
+            # Stay below SQLite's limit on the number of bound parameters.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows.update(
+                    self._conn.execute(
+                        f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                )
+            if not rows:
+                return {}
+            vectors = self._map(max(rows.values()) + 1)
+            return {key: np.array(vectors[row]) for key, row in rows.items()}
+
+    def put_many(self, embeddings: Dict[str, np.ndarray]) -> None:
+        """
+        Appends the embeddings whose keys are not stored yet.
+        """
+        if not embeddings:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                dimension = self._ensure_dimension(len(next(iter(embeddings.values()))))
+                keys = [key for key in embeddings if not self._contains(key)]
+                keys = [key for key in keys if len(embeddings[key]) == dimension]
+                if keys:
+                    first_row = self._truncate_to_index(dimension)
+                    with open(self.vectors_path, "ab") as f:
+                        np.asarray([embeddings[key] for key in keys], dtype=np.float32).tofile(f)
+                    self._conn.executemany(
+                        "INSERT INTO embeddings (key, row) VALUES (?, ?)",
+                        [(key, first_row + offset) for offset, key in enumerate(keys)],
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._conn.close()
+
+    def _contains(self, key: str) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM embeddings WHERE key = ?", (key,)
+        ).fetchone() is not None
+
+    def _truncate_to_index(self, dimension: int) -> int:
+        """
+        Cuts the vector file back to the indexed rows. Call within a write transaction.
+
+        Returns:
+            int: The number of indexed rows, i.e. the next row to append.
+        """
+        last_row = self._conn.execute("SELECT MAX(row) FROM embeddings").fetchone()[0]
+        rows = 0 if last_row is None else last_row + 1
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if size > rows * dimension * 4:
+            logger.warning(
+                f"Discarding {size - rows * dimension * 4} bytes of unindexed vectors "
+                f"in '{self.vectors_path}'."
+            )
+            os.truncate(self.vectors_path, rows * dimension * 4)
+        return rows
+
+    def _ensure_dimension(self, dimension: int) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dimension'").fetchone()
+        if row is None:
+            self._conn.execute(
+                "INSERT INTO meta (name, value) VALUES ('dimension', ?)", (str(dimension),)
+            )
+        elif int(row[0]) != dimension:
+            logger.warning(
+                f"EmbeddingStore holds {row[0]}-dimensional vectors; "
+                f"not persisting {dimension}-dimensional embeddings."
+            )
+            dimension = int(row[0])
+        self.dimension = dimension
+        return dimension
+
+    def _map(self, rows: int) -> np.memmap:
+        # The file only grows, so the map is refreshed when a row past its end is needed.
+        # Only whole rows are mapped, in case another writer is appending.
+        if self._vectors is None or len(self._vectors) < rows:
+            whole_rows = os.path.getsize(self.vectors_path) // (self.dimension * 4)
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(whole_rows, self.dimension)
+            )
+        return self._vectors
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Wraps a Chroma embedding function with a content-hash-keyed cache.
+
+    Lookups go to an in-memory LRU first and then to the optional persistent
+    EmbeddingStore; only the texts found in neither are passed to the model.
+    Document embeddings (`__call__`, used on upsert) are written to both tiers,
+    query embeddings (`embed_query`) only to memory.
+    """
+
+    def __init__(
+        self,
+        embedding_function: EmbeddingFunction,
+        store: Optional[EmbeddingStore] = None,
+        memory_size: int = EMBEDDING_CACHE_MEMORY_SIZE,
+        namespace: str = "",
+    ):
+        """
+        Initializes the CachedEmbeddingFunction.
+
+        Args:
+            embedding_function (EmbeddingFunction): The model computing missing embeddings.
+            store (Optional[EmbeddingStore]): Persistent tier for document embeddings.
+            memory_size (int): Maximum number of embeddings kept in memory.
+            namespace (str): Identifies the model in the cache keys.
+        """
+        self.embedding_function = embedding_function
+        self.store = store
+        self.memory_size = memory_size
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self._embed(input, self.embedding_function, persist=True)
+
+    def embed_query(self, input: Documents) -> Embeddings:
+        return self._embed(input, self.embedding_function.embed_query, persist=False)
+
+    def embed_documents(
+        self, texts: Documents, compute: Optional[Callable[[Documents], Embeddings]] = None
+    ) -> Embeddings:
+        """
+        Embeds documents through the cache, computing misses with `compute`
+        (e.g. an EmbeddingPool) instead of the wrapped embedding function.
+        """
+        return self._embed(texts, compute or self.embedding_function, persist=True)
+
+    # Chroma can only persist embedding functions it can rebuild from a config,
+    # which the wrapper cannot be: it needs its cache store. It is declared a
+    # legacy function, so Chroma records none. VectorDBService keeps track of
+    # the model in the collection metadata instead.
+    @staticmethod
+    def name() -> str:
+        return "cached_embedding_function"
+
+    def is_legacy(self) -> bool:
+        return True
+
+    def default_space(self):
+        return self.embedding_function.default_space()
+
+    def supported_spaces(self):
+        return self.embedding_function.supported_spaces()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self.store) if self.store is not None else 0,
+        }
+
+    def _embed(self, texts: Documents, compute, persist: bool) -> Embeddings:
+        keys = [make_embedding_key(text, self.namespace) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        from_disk: Dict[str, np.ndarray] = {}
+        if missing and self.store is not None:
+            try:
+                from_disk = self.store.get_many(missing)
+            except Exception as e:
+                logger.warning(f"Failed to read the embedding store. Treating as misses. Error: {e}")
+            found.update(from_disk)
+
+        # Each distinct text is embedded once, even if it appears several times.
+        to_compute: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                to_compute.setdefault(key, text)
+        computed: Dict[str, np.ndarray] = {}
+        if to_compute:
+            vectors = compute(list(to_compute.values()))
+            computed = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(to_compute, vectors)
+            }
+            found.update(computed)
+            if persist and self.store is not None:
+                try:
+                    self.store.put_many(computed)
+                except Exception as e:
+                    logger.warning(f"Failed to write to the embedding store. Error: {e}")
+
+        with self._lock:
+            for key in keys:
+                if key in computed:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    if key in from_disk:
+                        self.disk_hits += 1
+                    else:
+                        self.memory_hits += 1
+            for key, vector in {**from_disk, **computed}.items():
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+        return [found[key] for key in keys]
@@ -0,0 +1,81 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from core.config import EMBEDDING_POOL_CHUNK_SIZE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# The embedding function of the current worker process.
+_worker_embedding_function: Optional[Callable[[List[str]], List]] = None
+
+
+def _init_worker(factory: Callable[[], Callable[[List[str]], List]]) -> None:
+    global _worker_embedding_function
+    # Every worker gets one core; letting each one start a full set of BLAS/torch
+    # threads would oversubscribe the machine.
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    _worker_embedding_function = factory()
+
+
+def _embed_chunk(texts: List[str]) -> List[np.ndarray]:
+    return [np.asarray(vector, dtype=np.float32) for vector in _worker_embedding_function(texts)]
+
+
+class EmbeddingPool:
+    """
+    Computes embeddings on a pool of worker processes, each with its own model.
+
+    Calling the pool splits the texts into chunks of `chunk_size`, embeds the
+    chunks in parallel and returns the embeddings in input order. Workers are
+    started on first use with the `spawn` method, so the pool is safe to use
+    from a process that already runs threads.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Callable[[List[str]], List]],
+        workers: int,
+        chunk_size: int = EMBEDDING_POOL_CHUNK_SIZE,
+    ):
+        """
+        Initializes the EmbeddingPool.
+
+        Args:
+            factory (Callable): Picklable callable creating the embedding function
+                in each worker, e.g. a `functools.partial` of its class.
+            workers (int): Number of worker processes.
+            chunk_size (int): Number of texts sent to a worker at a time.
+        """
+        self.factory = factory
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __call__(self, texts: List[str]) -> List[np.ndarray]:
+        if not texts:
+            return []
+        if self._executor is None:
+            logger.info(f"Starting {self.workers} embedding worker processes...")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.factory,),
+            )
+        chunks = [
+            texts[start:start + self.chunk_size]
+            for start in range(0, len(texts), self.chunk_size)
+        ]
+        return [vector for chunk in self._executor.map(_embed_chunk, chunks) for vector in chunk]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
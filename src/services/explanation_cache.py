@@ -0,0 +1,227 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from core.config import (
+    EXPLANATION_CACHE_MAX_ENTRIES,
+    EXPLANATION_CACHE_MEMORY_SIZE,
+    EXPLANATION_CACHE_PATH,
+    EXPLANATION_CACHE_TTL_SECONDS,
+)
+from models.canonical import CanonicalAlert
+from services.fingerprint import compute_fingerprint
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Alert fields that influence the generated explanation. Volatile values such as
+# the timestamp or the current metric value are deliberately left out.
+CACHE_KEY_FIELDS = (
+    "service",
+    "environment",
+    "severity",
+    "title",
+    "details.metric",
+    "details.threshold",
+    "details.condition",
+)
+
+
+def make_cache_key(alert: CanonicalAlert, collection_version: str = "") -> str:
+    """
+    Builds the cache key for an alert explanation.
+
+    Args:
+        alert (CanonicalAlert): The alert being explained.
+        collection_version (str): The version of the knowledge base the explanation
+            was generated from.
+
+    Returns:
+        str: A hex-encoded hash of the relevant alert fields and the version.
+    """
+    return compute_fingerprint(alert, fields=CACHE_KEY_FIELDS, salt=collection_version)
+
+
+class ExplanationCache:
+    """
+    A two-tier cache for generated alert explanations.
+
+    Lookups go to an in-memory LRU first and fall back to a SQLite table that
+    survives restarts. Entries expire after `ttl_seconds`, and both tiers are
+    bounded in size, evicting the least recently used entries first. All entries
+    belong to one knowledge base version; when the version changes the cache is
+    emptied.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = EXPLANATION_CACHE_PATH,
+        memory_size: int = EXPLANATION_CACHE_MEMORY_SIZE,
+        max_entries: int = EXPLANATION_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = EXPLANATION_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initializes the ExplanationCache.
+
+        Args:
+            db_path (Optional[str]): Path to the SQLite file. An empty value disables
+                the persistent tier.
+            memory_size (int): Maximum number of entries kept in memory.
+            max_entries (int): Maximum number of entries kept in SQLite.
+            ttl_seconds (float): How long an explanation stays valid.
+            clock (Callable[[], float]): Wall-clock time source, injectable for tests.
+        """
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS explanations (
+                    key TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    explanation TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+            logger.info(f"ExplanationCache persisting to '{db_path}'.")
+
+    def ensure_version(self, version: str) -> None:
+        """
+        Drops every entry that was produced from a different knowledge base version.
+
+        Args:
+            version (str): The current knowledge base version.
+        """
+        with self._lock:
+            if version == self._version:
+                return
+            if self._version is not None:
+                logger.info(
+                    f"Knowledge base version changed ({self._version} -> {version}). "
+                    f"Invalidating cached explanations."
+                )
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM explanations WHERE version != ?", (version,))
+                self._conn.commit()
+            self._version = version
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached explanation for a key, or None on a miss.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                explanation, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return explanation
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT explanation, created_at FROM explanations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    explanation, created_at = row
+                    if now - created_at < self.ttl_seconds:
+                        self._conn.execute(
+                            "UPDATE explanations SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        self._conn.commit()
+                        self._remember(key, explanation, created_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return explanation
+                    self._conn.execute("DELETE FROM explanations WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, explanation: str) -> None:
+        """
+        Stores an explanation in both tiers, evicting old entries if necessary.
+        """
+        now = self._clock()
+        with self._lock:
+            self._remember(key, explanation, now)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO explanations (key, version, explanation, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, self._version or "", explanation, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM explanations WHERE created_at <= ?", (now - self.ttl_seconds,)
+            )
+            self._conn.execute(
+                """
+                DELETE FROM explanations WHERE key IN (
+                    SELECT key FROM explanations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Removes every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM explanations")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "version": self._version,
+        }
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _remember(self, key: str, explanation: str, created_at: float) -> None:
+        self._memory[key] = (explanation, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
@@ -0,0 +1,47 @@
+import hashlib
+import json
+from typing import Any, Iterable
+
+from models.canonical import CanonicalAlert
+
+# Fields that identify "the same alert" for storm coalescing.
+FINGERPRINT_FIELDS = ("service", "environment", "title", "details.metric")
+
+
+def _resolve(alert: CanonicalAlert, field: str) -> Any:
+    value: Any = alert
+    for part in field.split("."):
+        value = getattr(value, part, None)
+        if value is None:
+            return None
+    return value
+
+
+def _normalize(value: Any) -> str:
+    if value is None:
+        return ""
+    return " ".join(str(value).split()).lower()
+
+
+def compute_fingerprint(
+    alert: CanonicalAlert, fields: Iterable[str] = FINGERPRINT_FIELDS, salt: str = ""
+) -> str:
+    """
+    Computes a stable key for an alert from a subset of its canonical fields.
+
+    Values are whitespace- and case-normalized before hashing, so cosmetic
+    differences between deliveries of the same alert map to the same key.
+
+    Args:
+        alert (CanonicalAlert): The alert to fingerprint.
+        fields (Iterable[str]): Attribute paths to include, e.g. "details.metric".
+        salt (str): Extra value mixed into the key, e.g. a data version.
+
+    Returns:
+        str: A hex-encoded SHA-256 digest.
+    """
+    payload = {field: _normalize(_resolve(alert, field)) for field in fields}
+    if salt:
+        payload["__salt__"] = salt
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from core.config import FIRING_ALERT_MAX_ENTRIES, FIRING_ALERT_TTL_SECONDS
+from models.canonical import CanonicalAlert
+from services.fingerprint import compute_fingerprint
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FIRING = "firing"
+RESOLVED = "resolved"
+ACKNOWLEDGED = "acknowledged"
+
+# Status spellings of the monitoring systems we ingest that end or acknowledge an alert.
+_STATUS_STATES = {
+    "resolved": RESOLVED, "ok": RESOLVED, "recovered": RESOLVED, "recovery": RESOLVED,
+    "closed": RESOLVED, "normal": RESOLVED, "inactive": RESOLVED,
+    "acknowledged": ACKNOWLEDGED, "ack": ACKNOWLEDGED, "acked": ACKNOWLEDGED,
+}
+
+
+def alert_state(status: Optional[str]) -> str:
+    """
+    Maps an alert status to FIRING, RESOLVED or ACKNOWLEDGED.
+
+    Statuses that are neither a resolution nor an acknowledgement count as firing.
+    """
+    return _STATUS_STATES.get((status or "").strip().lower(), FIRING)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parses an ISO 8601 alert timestamp, or returns None if it is not one."""
+    try:
+        parsed = datetime.fromisoformat((value or "").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class FiringAlert:
+    """An alert under or after investigation. `explanation` is None while it is investigated."""
+
+    fingerprint: str
+    alert_id: Optional[str]
+    title: str
+    fired_at: datetime
+    explanation: Optional[str]
+    recorded_at: float
+    acknowledged: bool = False
+    resolved: bool = False
+
+    @property
+    def investigating(self) -> bool:
+        return self.explanation is None
+
+
+class FiringAlertRegistry:
+    """
+    Remembers the explanation of every investigated alert until it resolves.
+
+    Alerts are registered when they are queued for investigation, so a resolution
+    that arrives before the investigation finishes still finds them. Duplicates
+    registered while the first alert is being investigated share its entry.
+    Entries are keyed by the alert fingerprint, so a resolution or acknowledgement finds the firing alert it
+    belongs to. They are also looked up by alert id, for links to the
+    explanation. The registry is in memory, bounded to `max_entries` and forgets
+    entries after `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = FIRING_ALERT_MAX_ENTRIES,
+        ttl_seconds: float = FIRING_ALERT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initializes the FiringAlertRegistry.
+
+        Args:
+            max_entries (int): Maximum number of alerts remembered.
+            ttl_seconds (float): How long an alert is remembered without resolving.
+            clock (Callable[[], float]): Monotonic time source, injectable for tests.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._firing: "OrderedDict[str, FiringAlert]" = OrderedDict()
+        self._by_id: "OrderedDict[str, FiringAlert]" = OrderedDict()
+
+    def record(self, alert: CanonicalAlert, alert_id: Optional[str], explanation: str) -> FiringAlert:
+        """Remembers the explanation of a firing alert."""
+        entry = self.start(alert, alert_id)
+        self.complete(entry, explanation)
+        return entry
+
+    def start(self, alert: CanonicalAlert, alert_id: Optional[str]) -> FiringAlert:
+        """
+        Registers a firing alert that is queued or being investigated.
+
+        Returns:
+            FiringAlert: A new entry, or the entry of a duplicate that is still
+            being investigated.
+        """
+        fingerprint = compute_fingerprint(alert)
+        with self._lock:
+            self._prune()
+            entry = self._firing.get(fingerprint)
+            if entry is None or not entry.investigating:
+                entry = FiringAlert(
+                    fingerprint=fingerprint,
+                    alert_id=alert_id,
+                    title=alert.title,
+                    fired_at=parse_timestamp(alert.timestamp) or datetime.now(timezone.utc),
+                    explanation=None,
+                    recorded_at=self._clock(),
+                )
+                self._firing[fingerprint] = entry
+                self._firing.move_to_end(fingerprint)
+            if alert_id:
+                self._by_id[alert_id] = entry
+                self._by_id.move_to_end(alert_id)
+            for index in (self._firing, self._by_id):
+                while len(index) > self.max_entries:
+                    index.popitem(last=False)
+        return entry
+
+    def complete(self, entry: FiringAlert, explanation: str) -> None:
+        """Records the explanation of a started alert, even if it resolved in the meantime."""
+        with self._lock:
+            entry.explanation = explanation
+
+    def fail(self, entry: FiringAlert) -> None:
+        """Forgets a started alert whose investigation failed."""
+        with self._lock:
+            if self._firing.get(entry.fingerprint) is entry:
+                del self._firing[entry.fingerprint]
+            if entry.alert_id and self._by_id.get(entry.alert_id) is entry:
+                del self._by_id[entry.alert_id]
+
+    def acknowledge(self, alert: CanonicalAlert) -> Optional[FiringAlert]:
+        """Marks the firing alert matching `alert` as acknowledged and returns it."""
+        with self._lock:
+            self._prune()
+            entry = self._firing.get(compute_fingerprint(alert))
+            if entry is not None:
+                entry.acknowledged = True
+            return entry
+
+    def resolve(self, alert: CanonicalAlert) -> Optional[FiringAlert]:
+        """Forgets the firing alert matching `alert`, marks it resolved and returns it."""
+        with self._lock:
+            self._prune()
+            entry = self._firing.pop(compute_fingerprint(alert), None)
+            if entry is not None:
+                entry.resolved = True
+            return entry
+
+    def get(self, alert_id: str) -> Optional[FiringAlert]:
+        """Returns an investigated alert by id, resolved or not."""
+        with self._lock:
+            self._prune()
+            return self._by_id.get(alert_id)
+
+    def _prune(self) -> None:
+        cutoff = self._clock() - self.ttl_seconds
+        for index in (self._firing, self._by_id):
+            # Both indexes are in recording order, oldest first.
+            while index and next(iter(index.values())).recorded_at <= cutoff:
+                index.popitem(last=False)
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, AsyncIterator, Callable, Optional, Sequence
+
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+from openai.types.chat import ChatCompletionMessage
+
+from core.config import GRAPH_CHECKPOINT_PATH, GRAPH_CHECKPOINT_TTL_SECONDS
+from models.canonical import AlertDetails, CanonicalAlert
+from services.incident_history import SimilarIncident
+from services.retrieval_planner import RetrievedDocument
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RUNNING = "running"
+FAILED = "failed"
+
+# Types of the workflow state restored from checkpoints. The alert itself holds
+# pydantic URLs msgpack cannot encode, so checkpoints holding it are pickled; the
+# file is written and read only by this service.
+_STATE_TYPES = [
+    (cls.__module__, cls.__name__)
+    for cls in (CanonicalAlert, AlertDetails, RetrievedDocument, SimilarIncident, ChatCompletionMessage)
+]
+
+
+class _SqliteSaver(SqliteSaver):
+    """SqliteSaver whose coroutine methods run the blocking ones on a worker thread."""
+
+    async def aget_tuple(self, config) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = ""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+class GraphCheckpointStore:
+    """
+    Durable checkpoints of investigation runs, one LangGraph thread per alert id.
+
+    The workflow is compiled with `saver`, which records the state after every
+    node, so a run that failed (or whose process stopped) continues from the
+    last completed node instead of planning and retrieving again. Runs are
+    registered with `touch` when they start and marked with `fail` when they
+    fail; only failed runs can be claimed for a retry. Runs still marked running
+    when the store opens were interrupted and count as failed, so the file must
+    belong to a single process. The checkpoints of runs not touched for
+    `ttl_seconds` are deleted.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = GRAPH_CHECKPOINT_PATH,
+        ttl_seconds: float = GRAPH_CHECKPOINT_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initializes the GraphCheckpointStore.
+
+        Args:
+            db_path (Optional[str]): Path to the SQLite file. An empty value keeps
+                the checkpoints in memory.
+            ttl_seconds (float): How long the checkpoints of a run are kept.
+            clock (Callable[[], float]): Wall-clock time source, injectable for tests.
+        """
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(db_path or ":memory:", check_same_thread=False)
+        self.saver = _SqliteSaver(
+            conn,
+            serde=JsonPlusSerializer(pickle_fallback=True, allowed_msgpack_modules=_STATE_TYPES),
+        )
+        with self.saver.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoint_runs (
+                    thread_id TEXT PRIMARY KEY,
+                    touched_at REAL NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'failed'
+                )
+                """
+            )
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(checkpoint_runs)")]
+            if "status" not in columns:
+                cursor.execute("ALTER TABLE checkpoint_runs ADD COLUMN status TEXT NOT NULL DEFAULT 'failed'")
+            cursor.execute("UPDATE checkpoint_runs SET status = ? WHERE status = ?", (FAILED, RUNNING))
+        if db_path:
+            logger.info(f"GraphCheckpointStore persisting to '{db_path}'.")
+
+    def touch(self, thread_id: str) -> None:
+        """Registers the start (or resumption) of a run and deletes expired runs."""
+        now = self._clock()
+        with self.saver.cursor() as cursor:
+            cursor.execute(
+                "INSERT OR REPLACE INTO checkpoint_runs (thread_id, touched_at, status) VALUES (?, ?, ?)",
+                (thread_id, now, RUNNING),
+            )
+        self.prune(now)
+
+    def fail(self, thread_id: str) -> None:
+        """Records that a run failed, so it can be retried."""
+        with self.saver.cursor() as cursor:
+            cursor.execute(
+                "UPDATE checkpoint_runs SET status = ? WHERE thread_id = ?", (FAILED, thread_id)
+            )
+
+    def claim(self, thread_id: str) -> bool:
+        """
+        Marks a failed run as running again, e.g. when its retry is queued.
+
+        Returns:
+            bool: False if the run did not fail, e.g. because it is still running.
+        """
+        with self.saver.cursor() as cursor:
+            cursor.execute(
+                "UPDATE checkpoint_runs SET status = ?, touched_at = ? WHERE thread_id = ? AND status = ?",
+                (RUNNING, self._clock(), thread_id, FAILED),
+            )
+            return cursor.rowcount == 1
+
+    def status(self, thread_id: str) -> Optional[str]:
+        """Returns RUNNING or FAILED for a registered run, or None."""
+        with self.saver.cursor(transaction=False) as cursor:
+            row = cursor.execute(
+                "SELECT status FROM checkpoint_runs WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def delete(self, thread_id: str) -> None:
+        """Deletes the checkpoints of a run, e.g. once it finished."""
+        self.saver.delete_thread(thread_id)
+        with self.saver.cursor() as cursor:
+            cursor.execute("DELETE FROM checkpoint_runs WHERE thread_id = ?", (thread_id,))
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Deletes the checkpoints of runs not touched for `ttl_seconds`.
+
+        Returns:
+            int: The number of runs deleted.
+        """
+        cutoff = (self._clock() if now is None else now) - self.ttl_seconds
+        with self.saver.cursor(transaction=False) as cursor:
+            expired = [
+                row[0] for row in cursor.execute(
+                    "SELECT thread_id FROM checkpoint_runs WHERE touched_at <= ?", (cutoff,)
+                )
+            ]
+        for thread_id in expired:
+            self.delete(thread_id)
+        if expired:
+            logger.info(f"Deleted the checkpoints of {len(expired)} expired investigation runs.")
+        return len(expired)
+
+    def close(self) -> None:
+        self.saver.conn.close()
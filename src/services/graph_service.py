@@ -1,49 +1,322 @@
-from typing import Dict, Any, List, TypedDict
+import asyncio
+import logging
+import uuid
+from typing import Callable, Dict, Any, List, Optional, Tuple, TypedDict
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from langgraph.graph.state import CompiledStateGraph
 from models.canonical import CanonicalAlert
+from services.context_assembler import AssembledContext, ContextAssembler, message_field
+from services.explanation_cache import ExplanationCache, make_cache_key
+from services.graph_checkpoints import FAILED, RUNNING, GraphCheckpointStore
+from services.incident_history import IncidentHistory, SimilarIncident, similar_incident_notice
+from services.stream_broker import ExplanationStreamBroker
+from services.retrieval_planner import RetrievalPlanner, RetrievedDocument, merge_documents
 from services.vector_db_service import VectorDBService
-from core.llm import generate_response, get_plan
+from core.config import INCIDENT_REUSE_LLM, RETRIEVAL_REUSE_MIN_DOCUMENTS
+from core.llm import (
+    agenerate_response,
+    agenerate_similar_incident_response,
+    aget_plan,
+    generate_response,
+    generate_similar_incident_response,
+    get_plan,
+)
+from core.telemetry import NODE_DURATION, alert_context, timed, trace
+
+# Configure logging
+logger = logging.getLogger(__name__)
 
 class GraphState(TypedDict):
     alert: CanonicalAlert
+    alert_id: Optional[str]
     plan: List[Dict[str, Any]]
-    context_documents: List[str]
+    # Knowledge base documents found so far, deduplicated by id: first those the
+    # plan's tool calls retrieved, then those of `retrieve_context`.
+    retrieved_documents: List[RetrievedDocument]
+    # A past investigation similar enough to answer this alert from.
+    similar_incident: Optional[SimilarIncident]
     response: str
 
+def _message_content(message: Any) -> Optional[str]:
+    return message_field(message, 'content')
+
+def _timed_node(name: str, func: Callable, afunc: Callable) -> RunnableLambda:
+    """Wraps a workflow node so that each run is observed on NODE_DURATION and traced."""
+
+    def run(state: GraphState) -> dict:
+        with alert_context(state.get('alert_id')), timed(f"node.{name}", NODE_DURATION, node=name):
+            return func(state)
+
+    async def arun(state: GraphState) -> dict:
+        with alert_context(state.get('alert_id')), timed(f"node.{name}", NODE_DURATION, node=name):
+            return await afunc(state)
+
+    return RunnableLambda(run, afunc=arun, name=name)
+
 class GraphService:
-    def __init__(self, vector_db_service: VectorDBService):
+    def __init__(
+        self,
+        vector_db_service: VectorDBService,
+        explanation_cache: Optional[ExplanationCache] = None,
+        stream_broker: Optional[ExplanationStreamBroker] = None,
+        retrieval_planner: Optional[RetrievalPlanner] = None,
+        reuse_min_documents: int = RETRIEVAL_REUSE_MIN_DOCUMENTS,
+        context_assembler: Optional[ContextAssembler] = None,
+        checkpoint_store: Optional[GraphCheckpointStore] = None,
+        incident_history: Optional[IncidentHistory] = None,
+        incident_reuse_llm: bool = INCIDENT_REUSE_LLM,
+    ):
         self.vector_db_service = vector_db_service
+        self.explanation_cache = explanation_cache
+        self.stream_broker = stream_broker
+        self.retrieval_planner = retrieval_planner or RetrievalPlanner()
+        self.reuse_min_documents = reuse_min_documents
+        self.context_assembler = context_assembler or ContextAssembler()
+        self.checkpoint_store = checkpoint_store
+        self.incident_history = incident_history
+        self.incident_reuse_llm = incident_reuse_llm
         self.workflow = self._build_graph()
 
+    def _match_history(self, state: GraphState) -> dict:
+        incident = self.incident_history.find_similar(state['alert'])
+        if incident is not None:
+            trace("incident.similar", similar_to=incident.alert_id, similarity=round(incident.similarity, 3))
+        return {"similar_incident": incident}
+
+    async def _amatch_history(self, state: GraphState) -> dict:
+        return await asyncio.to_thread(self._match_history, state)
+
+    def _route_after_match(self, state: GraphState) -> str:
+        """Answers from a similar past incident instead of investigating, when there is one."""
+        return "reuse_incident" if state.get('similar_incident') is not None else "generate_plan"
+
+    def _reuse_incident(self, state: GraphState) -> dict:
+        incident = state['similar_incident']
+        if not self.incident_reuse_llm:
+            return {"response": similar_incident_notice(incident)}
+        if not self._should_stream(state):
+            return {"response": generate_similar_incident_response(state['alert'], incident)}
+        tokens = generate_similar_incident_response(state['alert'], incident, stream=True)
+        return {"response": self._publish_tokens(state, tokens)}
+
+    async def _areuse_incident(self, state: GraphState) -> dict:
+        incident = state['similar_incident']
+        if not self.incident_reuse_llm:
+            return {"response": similar_incident_notice(incident)}
+        if not self._should_stream(state):
+            return {"response": await agenerate_similar_incident_response(state['alert'], incident)}
+        tokens = await agenerate_similar_incident_response(state['alert'], incident, stream=True)
+        return {"response": await self._apublish_tokens(state, tokens)}
+
     def _generate_plan(self, state: GraphState) -> dict:
-        plan = get_plan(state['alert'])
-        return {"plan": plan}
+        plan, documents = get_plan(state['alert'])
+        return {"plan": plan, "retrieved_documents": documents}
+
+    async def _agenerate_plan(self, state: GraphState) -> dict:
+        plan, documents = await aget_plan(state['alert'])
+        return {"plan": plan, "retrieved_documents": documents}
+
+    def _route_after_plan(self, state: GraphState) -> str:
+        """Skips `retrieve_context` when the plan's tool calls already found enough documents."""
+        if len(state.get('retrieved_documents') or []) >= self.reuse_min_documents:
+            return "generate_response"
+        return "retrieve_context"
 
     def _retrieve_context(self, state: GraphState) -> dict:
-        plan_str = " ".join([msg['content'] for msg in state['plan'] if msg['content'] is not None])
+        # Tool results are left out of the query: they are the documents already found.
+        contents = [
+            _message_content(msg) for msg in state['plan'] if message_field(msg, 'role') != 'tool'
+        ]
+        plan_str = " ".join([content for content in contents if content is not None])
         query_text = f"{state['alert'].title} {state['alert'].service} {plan_str}"
-        context_results = self.vector_db_service.query_documents(query_texts=[query_text])
-        documents = context_results.get('documents', [[]])[0]
-        return {"context_documents": documents}
+        found = self.retrieval_planner.search_documents(
+            self.vector_db_service, [query_text], state['alert']
+        )[0]
+        return {"retrieved_documents": merge_documents(state.get('retrieved_documents') or [], found)}
+
+    async def _aretrieve_context(self, state: GraphState) -> dict:
+        # Chroma and the embedding model are blocking, so they run on a worker thread.
+        return await asyncio.to_thread(self._retrieve_context, state)
+
+    def _should_stream(self, state: GraphState) -> bool:
+        return self.stream_broker is not None and state.get('alert_id') is not None
+
+    def _publish_tokens(self, state: GraphState, tokens) -> str:
+        parts = []
+        for token in tokens:
+            parts.append(token)
+            self.stream_broker.publish(state['alert_id'], token)
+        return "".join(parts)
+
+    async def _apublish_tokens(self, state: GraphState, tokens) -> str:
+        parts = []
+        async for token in tokens:
+            parts.append(token)
+            self.stream_broker.publish(state['alert_id'], token)
+        return "".join(parts)
+
+    def _assemble_context(self, state: GraphState) -> AssembledContext:
+        return self.context_assembler.assemble(state['plan'], state.get('retrieved_documents') or [])
 
     def _generate_response(self, state: GraphState) -> dict:
-        response = generate_response(state['alert'], state['context_documents'], state['plan'])
-        return {"response": response}
+        context = self._assemble_context(state)
+        if not self._should_stream(state):
+            response = generate_response(state['alert'], context.documents, context.plan)
+            return {"response": response}
+
+        tokens = generate_response(state['alert'], context.documents, context.plan, stream=True)
+        return {"response": self._publish_tokens(state, tokens)}
+
+    async def _agenerate_response(self, state: GraphState) -> dict:
+        context = self._assemble_context(state)
+        if not self._should_stream(state):
+            response = await agenerate_response(state['alert'], context.documents, context.plan)
+            return {"response": response}
+
+        tokens = await agenerate_response(state['alert'], context.documents, context.plan, stream=True)
+        return {"response": await self._apublish_tokens(state, tokens)}
 
     def _build_graph(self) -> CompiledStateGraph:
+        # Each node has a blocking and a coroutine implementation; `invoke` uses the
+        # former and `ainvoke` the latter.
         graph = StateGraph(GraphState)
-        graph.add_node("generate_plan", self._generate_plan)
-        graph.add_node("retrieve_context", self._retrieve_context)
-        graph.add_node("generate_response", self._generate_response)
-        graph.set_entry_point("generate_plan")
-        graph.add_edge("generate_plan", "retrieve_context")
+        graph.add_node("generate_plan", _timed_node("generate_plan", self._generate_plan, self._agenerate_plan))
+        graph.add_node("retrieve_context", _timed_node("retrieve_context", self._retrieve_context, self._aretrieve_context))
+        graph.add_node("generate_response", _timed_node("generate_response", self._generate_response, self._agenerate_response))
+        if self.incident_history is not None:
+            graph.add_node("match_history", _timed_node("match_history", self._match_history, self._amatch_history))
+            graph.add_node("reuse_incident", _timed_node("reuse_incident", self._reuse_incident, self._areuse_incident))
+            graph.set_entry_point("match_history")
+            graph.add_conditional_edges(
+                "match_history",
+                self._route_after_match,
+                {"reuse_incident": "reuse_incident", "generate_plan": "generate_plan"},
+            )
+            graph.add_edge("reuse_incident", END)
+        else:
+            graph.set_entry_point("generate_plan")
+        graph.add_conditional_edges(
+            "generate_plan",
+            self._route_after_plan,
+            {"retrieve_context": "retrieve_context", "generate_response": "generate_response"},
+        )
         graph.add_edge("retrieve_context", "generate_response")
         graph.add_edge("generate_response", END)
 
-        return graph.compile()
+        checkpointer = self.checkpoint_store.saver if self.checkpoint_store is not None else None
+        return graph.compile(checkpointer=checkpointer)
+
+    def _cache_lookup(self, alert: CanonicalAlert) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the cache key for the alert and the cached explanation, if any."""
+        if self.explanation_cache is None:
+            return None, None
+        version = self.vector_db_service.get_collection_version()
+        self.explanation_cache.ensure_version(version)
+        cache_key = make_cache_key(alert, version)
+        return cache_key, self.explanation_cache.get(cache_key)
+
+    def _start_run(self, alert: CanonicalAlert, alert_id: Optional[str]) -> Tuple[Optional[GraphState], Dict[str, Any]]:
+        """
+        Returns the workflow input and the invoke arguments of a run.
+
+        With checkpoints, the run is the thread of `alert_id`. If an earlier run of
+        that thread did not finish, the input is None, which makes LangGraph
+        continue from the last completed node.
+        """
+        initial_state: GraphState = {"alert": alert, "alert_id": alert_id, "plan": [], "retrieved_documents": [], "similar_incident": None, "response": ""}
+        if self.checkpoint_store is None:
+            return initial_state, {}
+
+        thread_id = alert_id or uuid.uuid4().hex
+        self.checkpoint_store.touch(thread_id)
+        # Checkpoints are written before the next node starts, so they survive a crash.
+        kwargs = {"config": {"configurable": {"thread_id": thread_id}}, "durability": "sync"}
+        if self.workflow.get_state(kwargs["config"]).next:
+            logger.info(f"Resuming the investigation of alert {thread_id} from its last checkpoint.")
+            return None, kwargs
+        return initial_state, kwargs
+
+    def _finish_run(self, alert: CanonicalAlert, alert_id: Optional[str], final_state: GraphState, kwargs: Dict[str, Any]) -> None:
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.delete(kwargs["config"]["configurable"]["thread_id"])
+        # Only full investigations join the history; answers derived from it do not.
+        if self.incident_history is not None and final_state.get("similar_incident") is None:
+            plan_summary = self.context_assembler.compact_plan(final_state["plan"])
+            self.incident_history.record(alert, alert_id, plan_summary, final_state["response"])
+
+    def _fail_run(self, kwargs: Dict[str, Any]) -> None:
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.fail(kwargs["config"]["configurable"]["thread_id"])
+
+    def pending_alert(self, alert_id: str) -> Optional[CanonicalAlert]:
+        """
+        Returns the alert of an investigation that failed or was interrupted and
+        can be resumed from its checkpoint, or None.
+        """
+        if self.checkpoint_store is None or self.checkpoint_store.status(alert_id) != FAILED:
+            return None
+        snapshot = self.workflow.get_state({"configurable": {"thread_id": alert_id}})
+        return snapshot.values.get("alert") if snapshot.next else None
+
+    def run_active(self, alert_id: str) -> bool:
+        """Whether the investigation of an alert is running (or its retry is queued)."""
+        return self.checkpoint_store is not None and self.checkpoint_store.status(alert_id) == RUNNING
+
+    def claim_retry(self, alert_id: str) -> Optional[CanonicalAlert]:
+        """
+        Returns the alert of a failed investigation and marks it running, so it is
+        retried only once; None if there is no failed investigation for the id.
+        """
+        alert = self.pending_alert(alert_id)
+        if alert is None or not self.checkpoint_store.claim(alert_id):
+            return None
+        return alert
+
+    def release_retry(self, alert_id: str) -> None:
+        """Marks a claimed investigation failed again, e.g. if its retry was not queued."""
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.fail(alert_id)
+
+    def run(self, alert: CanonicalAlert, alert_id: Optional[str] = None) -> str:
+        """
+        Runs the investigation workflow for an alert and returns the explanation.
+        When a stream broker is configured and an `alert_id` is given, the explanation
+        is published to the alert's stream while it is generated.
+
+        With a checkpoint store, a run for an `alert_id` whose previous run failed
+        continues from the last completed node.
+        """
+        cache_key, cached = self._cache_lookup(alert)
+        if cached is not None:
+            return cached
+
+        workflow_input, kwargs = self._start_run(alert, alert_id)
+        try:
+            final_state = self.workflow.invoke(workflow_input, **kwargs)
+        except Exception:
+            self._fail_run(kwargs)
+            raise
+        self._finish_run(alert, alert_id, final_state, kwargs)
+
+        if cache_key is not None:
+            self.explanation_cache.set(cache_key, final_state["response"])
+        return final_state["response"]
+
+    async def arun(self, alert: CanonicalAlert, alert_id: Optional[str] = None) -> str:
+        """Coroutine version of `run`."""
+        cache_key, cached = await asyncio.to_thread(self._cache_lookup, alert)
+        if cached is not None:
+            return cached
+
+        workflow_input, kwargs = await asyncio.to_thread(self._start_run, alert, alert_id)
+        try:
+            final_state = await self.workflow.ainvoke(workflow_input, **kwargs)
+        except BaseException:
+            await asyncio.to_thread(self._fail_run, kwargs)
+            raise
+        await asyncio.to_thread(self._finish_run, alert, alert_id, final_state, kwargs)
 
-    def run(self, alert: CanonicalAlert) -> str:
-        initial_state: GraphState = {"alert": alert, "plan": [], "context_documents": [], "response": ""}
-        final_state = self.workflow.invoke(initial_state)
+        if cache_key is not None:
+            await asyncio.to_thread(self.explanation_cache.set, cache_key, final_state["response"])
         return final_state["response"]
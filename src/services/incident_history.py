@@ -0,0 +1,151 @@
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from core.config import INCIDENT_HISTORY_MAX_AGE_SECONDS, INCIDENT_SIMILARITY_THRESHOLD
+from models.canonical import CanonicalAlert
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Longest plan summary stored with an incident.
+MAX_PLAN_SUMMARY_CHARS = 2000
+
+
+def incident_text(alert: CanonicalAlert) -> str:
+    """
+    Describes an alert for the incident history embedding.
+
+    Only what identifies the kind of incident is included; volatile values such
+    as the timestamp or the current metric value are left out.
+    """
+    details = alert.details
+    condition = " ".join(
+        part for part in (details.metric, details.condition, details.threshold) if part
+    )
+    return "\n".join(
+        part for part in (
+            alert.title,
+            f"Service: {alert.service} ({alert.environment}), severity {alert.severity}",
+            f"Condition: {condition}" if condition else "",
+        ) if part
+    )
+
+
+@dataclass
+class SimilarIncident:
+    """A past investigation similar to the current alert."""
+
+    alert_id: str
+    title: str
+    similarity: float
+    explanation: str
+    plan_summary: str
+    fired_at: str
+    investigated_at: str
+
+
+def similar_incident_notice(incident: SimilarIncident) -> str:
+    """The explanation of an alert answered from a similar past incident without the LLM."""
+    return (
+        f"This alert is {incident.similarity:.0%} similar to \"{incident.title}\" "
+        f"(alert {incident.alert_id}, fired at {incident.fired_at}), which was investigated "
+        f"at {incident.investigated_at}. Its report follows.\n\n{incident.explanation}"
+    )
+
+
+class IncidentHistory:
+    """
+    Remembers finished investigations to answer recurring incidents cheaply.
+
+    Every full investigation is stored in the vector service's incident
+    collection: the embedded alert description, a summary of the plan, the
+    final explanation and timestamps. `find_similar` returns the most similar
+    past incident of the same service if its cosine similarity reaches
+    `similarity_threshold`.
+    """
+
+    def __init__(
+        self,
+        vector_db_service,
+        similarity_threshold: float = INCIDENT_SIMILARITY_THRESHOLD,
+        max_age_seconds: float = INCIDENT_HISTORY_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initializes the IncidentHistory.
+
+        Args:
+            vector_db_service: The VectorDBService (or RetrievalClient) storing the history.
+            similarity_threshold (float): Minimum cosine similarity of a reusable incident.
+            max_age_seconds (float): Incidents investigated longer ago are not reused.
+            clock (Callable[[], float]): Wall-clock time source, injectable for tests.
+        """
+        self.vector_db_service = vector_db_service
+        self.similarity_threshold = similarity_threshold
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+
+    def find_similar(self, alert: CanonicalAlert) -> Optional[SimilarIncident]:
+        """
+        Returns the most similar recent incident of the alert's service and
+        environment, if it is similar enough. Failures to query the history are
+        logged and count as no match.
+        """
+        if self.similarity_threshold > 1:
+            return None
+        where = {"$and": [
+            {"service": alert.service},
+            {"environment": alert.environment},
+            {"investigated_at_epoch": {"$gte": self._clock() - self.max_age_seconds}},
+        ]}
+        try:
+            results = self.vector_db_service.query_incidents(incident_text(alert), n_results=1, where=where)
+        except Exception as e:
+            logger.warning(f"Failed to query the incident history. Investigating in full. Error: {e}")
+            return None
+
+        distances = (results.get("distances") or [[]])[0]
+        if not distances:
+            return None
+        similarity = 1.0 - float(distances[0])
+        metadata: Dict[str, Any] = results["metadatas"][0][0]
+        if similarity < self.similarity_threshold:
+            logger.debug(f"Closest past incident is {similarity:.2f} similar; investigating in full.")
+            return None
+        return SimilarIncident(
+            alert_id=results["ids"][0][0],
+            title=metadata.get("title", ""),
+            similarity=similarity,
+            explanation=metadata.get("explanation", ""),
+            plan_summary=metadata.get("plan_summary", ""),
+            fired_at=metadata.get("fired_at", ""),
+            investigated_at=metadata.get("investigated_at", ""),
+        )
+
+    def record(
+        self, alert: CanonicalAlert, alert_id: Optional[str], plan_summary: str, explanation: str
+    ) -> None:
+        """
+        Stores a finished investigation. Failures are logged, not raised: the
+        investigation itself succeeded.
+        """
+        now = self._clock()
+        metadata = {
+            "title": alert.title,
+            "service": alert.service,
+            "environment": alert.environment,
+            "severity": alert.severity,
+            "fired_at": alert.timestamp,
+            "investigated_at": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+            "investigated_at_epoch": now,
+            "plan_summary": plan_summary[:MAX_PLAN_SUMMARY_CHARS],
+            "explanation": explanation,
+        }
+        try:
+            self.vector_db_service.add_incident(alert_id or uuid.uuid4().hex, incident_text(alert), metadata)
+        except Exception as e:
+            logger.warning(f"Failed to record the investigation of alert {alert_id}. Error: {e}")
@@ -0,0 +1,145 @@
+import itertools
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from core.config import RETRIEVAL_SERVER_TIMEOUT_SECONDS, UPSERT_BATCH_SIZE
+from models.knowledge_base import KnowledgeBaseArticle
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def parse_server_url(url: str) -> Tuple[Optional[str], str]:
+    """
+    Splits a retrieval server address into a Unix socket path and an HTTP base URL.
+
+    Args:
+        url (str): `unix:///path/to/retrieval.sock` or `http://host:port`.
+
+    Returns:
+        Tuple[Optional[str], str]: The socket path (None over TCP) and the base URL
+            requests are sent to.
+
+    Raises:
+        ValueError: If the scheme is neither `unix` nor `http`.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return parsed.path, "http://retrieval-server"
+    if parsed.scheme == "http" and parsed.hostname:
+        return None, url.rstrip("/")
+    raise ValueError(f"Unsupported retrieval server URL '{url}'. Use unix:///path or http://host:port.")
+
+
+class RetrievalClient:
+    """
+    Talks to the retrieval server in place of a local VectorDBService.
+
+    It offers the methods of VectorDBService the API and the ingestion use, so
+    several API workers can share the embedding model and the Chroma client of
+    one retrieval server process instead of loading their own.
+    """
+
+    def __init__(self, url: str, timeout: float = RETRIEVAL_SERVER_TIMEOUT_SECONDS):
+        """
+        Initializes the RetrievalClient.
+
+        Args:
+            url (str): The server address, `unix:///path` or `http://host:port`.
+            timeout (float): Per-request timeout in seconds.
+        """
+        socket_path, base_url = parse_server_url(url)
+        self.url = url
+        transport = httpx.HTTPTransport(uds=socket_path) if socket_path else None
+        self._client = httpx.Client(base_url=base_url, transport=transport, timeout=timeout)
+
+    def query_documents(
+        self,
+        query_texts: List[str],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Queries the knowledge base. See `VectorDBService.query_documents`."""
+        return self._post("/query", {"query_texts": query_texts, "n_results": n_results, "where": where})
+
+    def get_collection_version(self) -> str:
+        """Returns the knowledge base version. See `VectorDBService.get_collection_version`."""
+        return self._get("/version")["version"]
+
+    def bulk_upsert(
+        self, articles: Iterable[KnowledgeBaseArticle], batch_size: int = UPSERT_BATCH_SIZE
+    ) -> Dict[str, float]:
+        """
+        Sends articles to the server in batches of `batch_size`.
+
+        Returns:
+            Dict[str, float]: The documents written and embeddings computed, the
+                elapsed seconds and the resulting rates.
+        """
+        started = time.monotonic()
+        documents = embedded = 0
+        articles = iter(articles)
+        while True:
+            batch = [article.model_dump(mode="json") for article in itertools.islice(articles, batch_size)]
+            if not batch:
+                break
+            stats = self._post("/upsert", {"articles": batch})
+            documents += stats["documents"]
+            embedded += stats["embedded"]
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        return {
+            "documents": documents,
+            "embedded": embedded,
+            "seconds": elapsed,
+            "documents_per_second": documents / elapsed,
+            "embeddings_per_second": embedded / elapsed,
+        }
+
+    def delete_documents(self, ids: List[str]):
+        """Removes documents by id. See `VectorDBService.delete_documents`."""
+        if ids:
+            self._post("/delete", {"ids": ids})
+
+    def delete_articles(self, parent_ids: List[str]):
+        """Removes every chunk of the given articles. See `VectorDBService.delete_articles`."""
+        if parent_ids:
+            self._post("/delete-articles", {"parent_ids": parent_ids})
+
+    def add_incident(self, incident_id: str, text: str, metadata: Dict[str, Any]):
+        """Stores a finished investigation. See `VectorDBService.add_incident`."""
+        self._post("/incidents/add", {"id": incident_id, "text": text, "metadata": metadata})
+
+    def query_incidents(
+        self, text: str, n_results: int = 1, where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Finds similar past incidents. See `VectorDBService.query_incidents`."""
+        return self._post("/incidents/query", {"text": text, "n_results": n_results, "where": where})
+
+    def warm_up(self):
+        """
+        Checks that the server is reachable. The server warms up its model and
+        index before it accepts connections.
+        """
+        self._get("/healthz")
+        logger.info(f"Retrieval server at {self.url} is ready.")
+
+    def stats(self) -> dict:
+        return self._get("/healthz")
+
+    def close(self):
+        self._client.close()
+
+    def _get(self, path: str) -> Any:
+        response = self._client.get(path)
+        response.raise_for_status()
+        return response.json()
+
+    def _post(self, path: str, payload: dict) -> Any:
+        response = self._client.post(path, json=payload)
+        response.raise_for_status()
+        return response.json()
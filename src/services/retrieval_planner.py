@@ -0,0 +1,174 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.config import RETRIEVAL_MIN_RESULTS, RETRIEVAL_N_RESULTS
+from models.canonical import CanonicalAlert
+from services.vector_db_service import VectorDBService, tag_metadata_key
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetrievedDocument:
+    """A knowledge base document found by a search, with its distance to the query."""
+
+    id: str
+    text: str
+    distance: Optional[float] = None
+    scope: Optional[str] = None
+
+    def __str__(self) -> str:
+        return self.text
+
+
+def merge_documents(*groups: List[RetrievedDocument]) -> List[RetrievedDocument]:
+    """
+    Concatenates groups of documents, keeping the first occurrence of each id.
+
+    Returns:
+        List[RetrievedDocument]: The documents, in order of first occurrence.
+    """
+    merged: Dict[str, RetrievedDocument] = {}
+    for group in groups:
+        for document in group:
+            merged.setdefault(document.id, document)
+    return list(merged.values())
+
+
+@dataclass
+class RetrievalScope:
+    """A named Chroma `where` filter. A scope without a filter searches everything."""
+
+    name: str
+    where: Optional[Dict[str, Any]] = None
+
+
+class RetrievalPlanner:
+    """
+    Searches the knowledge base in progressively wider scopes derived from the alert.
+
+    Articles about the alerting service are searched first, narrowed to the
+    alert's environment when articles are tagged with it; an article belongs to
+    a service if its `service` field or one of its tags names it. When a scope
+    returns fewer than `min_results` documents, the search is repeated in the
+    next wider scope (the owning team, then the whole collection) and the new
+    documents are appended after the ones already found.
+    """
+
+    def __init__(
+        self,
+        min_results: int = RETRIEVAL_MIN_RESULTS,
+        n_results: int = RETRIEVAL_N_RESULTS,
+    ):
+        """
+        Initializes the RetrievalPlanner.
+
+        Args:
+            min_results (int): Documents a scope must return to stop widening.
+            n_results (int): Maximum documents returned per query.
+        """
+        self.min_results = min_results
+        self.n_results = n_results
+
+    def scopes(self, alert: Optional[CanonicalAlert]) -> List[RetrievalScope]:
+        """
+        Returns the scopes to search for an alert, narrowest first.
+
+        Args:
+            alert (Optional[CanonicalAlert]): The alert being investigated. Without
+                one, only the global scope is searched.
+
+        Returns:
+            List[RetrievalScope]: The scopes, always ending with the global scope.
+        """
+        scopes: List[RetrievalScope] = []
+        if alert is not None and alert.service:
+            service = {
+                "$or": [{"service": alert.service}, {tag_metadata_key(alert.service): True}]
+            }
+            if alert.environment:
+                scopes.append(
+                    RetrievalScope(
+                        "service+environment",
+                        {"$and": [service, {tag_metadata_key(alert.environment): True}]},
+                    )
+                )
+            scopes.append(RetrievalScope("service", service))
+        if alert is not None and alert.owner_team:
+            scopes.append(RetrievalScope("team", {"owner_team": alert.owner_team}))
+        scopes.append(RetrievalScope("global"))
+        return scopes
+
+    def search(
+        self,
+        vector_db_service: VectorDBService,
+        query_texts: List[str],
+        alert: Optional[CanonicalAlert] = None,
+    ) -> List[List[str]]:
+        """
+        Searches the knowledge base for every query text.
+
+        Returns:
+            List[List[str]]: The texts of the documents found for each query
+                text, in order. See `search_documents`.
+        """
+        return [
+            [document.text for document in documents]
+            for documents in self.search_documents(vector_db_service, query_texts, alert)
+        ]
+
+    def search_documents(
+        self,
+        vector_db_service: VectorDBService,
+        query_texts: List[str],
+        alert: Optional[CanonicalAlert] = None,
+    ) -> List[List[RetrievedDocument]]:
+        """
+        Searches the knowledge base for every query text.
+
+        Only the queries that still lack results are sent to the next scope, and
+        a document found in several scopes is returned once.
+
+        Args:
+            vector_db_service (VectorDBService): The service to query.
+            query_texts (List[str]): The texts to search for.
+            alert (Optional[CanonicalAlert]): The alert the search is scoped to.
+
+        Returns:
+            List[List[RetrievedDocument]]: The documents found for each query
+                text, in order.
+        """
+        found: List[Dict[str, RetrievedDocument]] = [{} for _ in query_texts]
+        pending = list(range(len(query_texts)))
+
+        for scope in self.scopes(alert):
+            if not pending:
+                break
+            kwargs = {"where": scope.where} if scope.where is not None else {}
+            results = vector_db_service.query_documents(
+                query_texts=[query_texts[index] for index in pending],
+                n_results=self.n_results,
+                **kwargs,
+            )
+            documents = results.get("documents") or [[] for _ in pending]
+            ids = results.get("ids") or documents
+            distances = results.get("distances") or [[None] * len(texts) for texts in documents]
+            for index, result_ids, result_documents, result_distances in zip(
+                pending, ids, documents, distances
+            ):
+                for document_id, document, distance in zip(result_ids, result_documents, result_distances):
+                    if document_id not in found[index] and len(found[index]) < self.n_results:
+                        found[index][document_id] = RetrievedDocument(
+                            id=document_id, text=document, distance=distance, scope=scope.name
+                        )
+            widened = [index for index in pending if len(found[index]) < self.min_results]
+            if scope.where is not None and widened:
+                logger.info(
+                    f"Scope '{scope.name}' returned too few documents for {len(widened)} "
+                    f"of {len(pending)} queries. Widening the search."
+                )
+            pending = widened
+
+        return [list(documents.values()) for documents in found]
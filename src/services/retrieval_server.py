@@ -0,0 +1,366 @@
+"""
+Serves the knowledge base of one VectorDBService to several API workers.
+
+The server owns the embedding model and the Chroma client. API workers (and
+the ingestion) reach it through RetrievalClient, selected by setting
+RETRIEVAL_SERVER_URL, so scaling the workers does not scale model memory, and
+only this process writes to the Chroma database. Queries arriving together
+are embedded in one model call.
+
+Usage (from the `src` directory):
+    python -m services.retrieval_server --url unix:///run/alert-explainer/retrieval.sock
+    python -m services.retrieval_server --url http://127.0.0.1:8765
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+from core.config import (
+    RETRIEVAL_SERVER_BATCH_WINDOW_MS,
+    RETRIEVAL_SERVER_MAX_BATCH,
+    RETRIEVAL_SERVER_URL,
+)
+from models.knowledge_base import KnowledgeBaseArticle
+from services.retrieval_client import parse_server_url
+from services.vector_db_service import VectorDBService
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Keys of a Chroma query result holding one entry per query text.
+_PER_QUERY_KEYS = ("ids", "documents", "metadatas", "distances", "embeddings", "uris", "data")
+
+
+@dataclass
+class _QueryRequest:
+    query_texts: List[str]
+    n_results: int
+    where: Optional[Dict[str, Any]]
+    future: Future = field(default_factory=Future)
+
+
+class QueryBatcher:
+    """
+    Merges concurrent queries into one embedding call.
+
+    The first query waits up to `window_seconds` for others to arrive, up to
+    `max_batch` query texts in total. The texts of all of them are embedded
+    together; queries with the same `n_results` and filter then share one
+    Chroma query, and every caller gets back the results of its own texts.
+    """
+
+    def __init__(
+        self,
+        service: VectorDBService,
+        window_seconds: float = RETRIEVAL_SERVER_BATCH_WINDOW_MS / 1000,
+        max_batch: int = RETRIEVAL_SERVER_MAX_BATCH,
+    ):
+        """
+        Initializes the QueryBatcher and starts its thread.
+
+        Args:
+            service (VectorDBService): The service embedding and querying.
+            window_seconds (float): How long the first query of a batch waits for others.
+            max_batch (int): Maximum query texts embedded together.
+        """
+        self.service = service
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.batches = 0
+        self.queries = 0
+        self._requests: "queue.Queue[Optional[_QueryRequest]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+        self._thread.start()
+
+    def query(
+        self, query_texts: List[str], n_results: int = 5, where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Queries the knowledge base, blocking until the batch holding the query ran."""
+        request = _QueryRequest(query_texts, n_results, where)
+        self._requests.put(request)
+        return request.future.result()
+
+    def close(self):
+        self._requests.put(None)
+        self._thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "queries_per_batch": self.queries / self.batches if self.batches else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            texts = len(request.query_texts)
+            deadline = time.monotonic() + self.window_seconds
+            while texts < self.max_batch:
+                try:
+                    request = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    # Stop after this batch.
+                    self._requests.put(None)
+                    break
+                batch.append(request)
+                texts += len(request.query_texts)
+            self._execute(batch)
+
+    def _execute(self, batch: List[_QueryRequest]):
+        self.batches += 1
+        self.queries += len(batch)
+        try:
+            embeddings = self.service.embed_queries(
+                [text for request in batch for text in request.query_texts]
+            )
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        # Each request's slice of the embeddings, grouped by the query it can share.
+        groups: Dict[Tuple[int, str], List[Tuple[_QueryRequest, List[Any]]]] = {}
+        offset = 0
+        for request in batch:
+            key = (request.n_results, json.dumps(request.where, sort_keys=True))
+            size = len(request.query_texts)
+            groups.setdefault(key, []).append((request, embeddings[offset:offset + size]))
+            offset += size
+
+        for (n_results, _), members in groups.items():
+            try:
+                results = self.service.query_documents(
+                    [text for request, _ in members for text in request.query_texts],
+                    n_results=n_results,
+                    where=members[0][0].where,
+                    query_embeddings=[embedding for _, vectors in members for embedding in vectors],
+                )
+            except Exception as e:
+                for request, _ in members:
+                    request.future.set_exception(e)
+                continue
+            start = 0
+            for request, _ in members:
+                end = start + len(request.query_texts)
+                request.future.set_result({
+                    key: value[start:end] if key in _PER_QUERY_KEYS and value is not None else value
+                    for key, value in results.items()
+                })
+                start = end
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address.
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def do_GET(self):
+        retrieval = self.server.retrieval
+        routes = {"/healthz": retrieval.health, "/version": retrieval.version}
+        self._dispatch(routes, None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "Invalid JSON body."})
+            return
+        retrieval = self.server.retrieval
+        routes = {
+            "/query": retrieval.query,
+            "/upsert": retrieval.upsert,
+            "/delete": retrieval.delete,
+            "/delete-articles": retrieval.delete_articles,
+            "/incidents/add": retrieval.add_incident,
+            "/incidents/query": retrieval.query_incidents,
+        }
+        self._dispatch(routes, body)
+
+    def _dispatch(self, routes: dict, body: Optional[dict]):
+        route = routes.get(urlparse(self.path).path)
+        if route is None:
+            self._send(404, {"error": f"No route {self.path}."})
+            return
+        try:
+            payload = route(body) if body is not None else route()
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.exception(f"Retrieval server failed to handle {self.path}. Error: {e}")
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, payload)
+
+    def _send(self, status: int, payload: Any):
+        body = json.dumps(payload, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _TCPHandler(_RequestHandler):
+    # Small request/response exchanges: avoid waiting for delayed ACKs.
+    disable_nagle_algorithm = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class RetrievalServer:
+    """
+    Answers knowledge base requests of RetrievalClient for one VectorDBService.
+
+    Queries go through a QueryBatcher; writes (upserts and deletes) are
+    serialized, so the server is the only writer of the Chroma database.
+    """
+
+    def __init__(self, service: VectorDBService, url: str, batcher: Optional[QueryBatcher] = None):
+        """
+        Initializes the RetrievalServer and binds its socket.
+
+        Args:
+            service (VectorDBService): The service to serve.
+            url (str): Where to listen, `unix:///path` or `http://host:port`.
+            batcher (Optional[QueryBatcher]): Merges concurrent queries; created
+                with the configured window when not given.
+        """
+        self.service = service
+        self.url = url
+        self.batcher = batcher or QueryBatcher(service)
+        self._write_lock = threading.Lock()
+
+        socket_path, base_url = parse_server_url(url)
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self._httpd = _UnixHTTPServer(socket_path, _RequestHandler)
+        else:
+            parsed = urlparse(base_url)
+            self._httpd = ThreadingHTTPServer((parsed.hostname, 80 if parsed.port is None else parsed.port), _TCPHandler)
+        self._httpd.daemon_threads = True
+        # The request handlers reach this object through their `server` attribute.
+        self._httpd.retrieval = self
+        self._socket_path = socket_path
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        """The address clients connect to; the actual port when bound to port 0."""
+        if self._socket_path:
+            return f"unix://{self._socket_path}"
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        logger.info(f"Retrieval server listening on {self.address}.")
+        self._httpd.serve_forever()
+
+    def start(self) -> "RetrievalServer":
+        """Serves on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="retrieval-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self.batcher.close()
+        if self._socket_path and os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+
+    def health(self) -> dict:
+        return {"status": "ok", "batching": self.batcher.stats()}
+
+    def version(self) -> dict:
+        return {"version": self.service.get_collection_version()}
+
+    def query(self, body: dict) -> dict:
+        return self.batcher.query(
+            list(body["query_texts"]), n_results=int(body.get("n_results", 5)), where=body.get("where")
+        )
+
+    def upsert(self, body: dict) -> dict:
+        articles = [KnowledgeBaseArticle.model_validate(article) for article in body["articles"]]
+        with self._write_lock:
+            return self.service.bulk_upsert(articles)
+
+    def delete(self, body: dict) -> dict:
+        with self._write_lock:
+            self.service.delete_documents(list(body["ids"]))
+        return {"deleted": len(body["ids"])}
+
+    def delete_articles(self, body: dict) -> dict:
+        with self._write_lock:
+            self.service.delete_articles(list(body["parent_ids"]))
+        return {"deleted": len(body["parent_ids"])}
+
+    def add_incident(self, body: dict) -> dict:
+        with self._write_lock:
+            self.service.add_incident(str(body["id"]), str(body["text"]), dict(body["metadata"]))
+        return {"added": 1}
+
+    def query_incidents(self, body: dict) -> dict:
+        return self.service.query_incidents(
+            str(body["text"]), n_results=int(body.get("n_results", 1)), where=body.get("where")
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--url", default=RETRIEVAL_SERVER_URL or "http://127.0.0.1:8765",
+        help="Where to listen: unix:///path/to/socket or http://host:port.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    service = VectorDBService()
+    service.warm_up()
+    server = RetrievalServer(service, args.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from core.config import STREAM_RETENTION_SECONDS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Event names sent to subscribers.
+TOKEN_EVENT = "token"
+DONE_EVENT = "done"
+ERROR_EVENT = "error"
+# Internal event used to move a subscriber to the channel its alert was coalesced into.
+_REDIRECT = "__redirect__"
+
+
+class _Channel:
+    def __init__(self):
+        self.events: List[Tuple[str, str]] = []
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+
+class ExplanationStreamBroker:
+    """
+    Relays explanation tokens from the investigation workers to stream subscribers.
+
+    Workers publish from their own threads; subscribers consume from the event loop.
+    Every channel keeps the events published so far, so a subscriber that connects
+    late first receives the replay and then the live tokens. Finished channels are
+    kept for `retention_seconds` after completion so that clients can still fetch
+    the result.
+    """
+
+    def __init__(
+        self,
+        retention_seconds: float = STREAM_RETENTION_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.retention_seconds = retention_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._channels: Dict[str, _Channel] = {}
+        self._aliases: Dict[str, str] = {}
+
+    def open(self, alert_id: str) -> None:
+        """
+        Creates the channel for an alert that has been accepted for investigation.
+        A finished channel is replaced, so a retried investigation streams afresh.
+        """
+        with self._lock:
+            self._prune()
+            channel = self._channels.get(alert_id)
+            if channel is None or channel.finished:
+                self._channels[alert_id] = _Channel()
+
+    def alias(self, alert_id: str, target_id: str) -> None:
+        """Makes a coalesced alert stream the explanation of the investigation it joined."""
+        with self._lock:
+            target_id = self._aliases.get(target_id, target_id)
+            if alert_id == target_id:
+                return
+            self._aliases[alert_id] = target_id
+            channel = self._channels.pop(alert_id, None)
+        if channel is not None:
+            # Hand over anyone who subscribed before the alert was coalesced.
+            for loop, queue in channel.subscribers:
+                loop.call_soon_threadsafe(queue.put_nowait, (_REDIRECT, target_id))
+
+    def has(self, alert_id: str) -> bool:
+        with self._lock:
+            return self._aliases.get(alert_id, alert_id) in self._channels
+
+    def publish(self, alert_id: str, token: str) -> None:
+        """Sends a piece of the explanation to every subscriber of the alert."""
+        self._emit(alert_id, TOKEN_EVENT, token)
+
+    def close(self, alert_id: str, explanation: str) -> None:
+        """
+        Marks the explanation as complete. If nothing was streamed (e.g. a cached
+        explanation), the full text is sent as a single token first.
+        """
+        with self._lock:
+            channel = self._channels.get(self._aliases.get(alert_id, alert_id))
+            streamed = channel is not None and any(
+                event == TOKEN_EVENT for event, _ in channel.events
+            )
+        if not streamed:
+            self._emit(alert_id, TOKEN_EVENT, explanation)
+        self._emit(alert_id, DONE_EVENT, explanation, finish=True)
+
+    def fail(self, alert_id: str, message: str) -> None:
+        """Ends the stream with an error."""
+        self._emit(alert_id, ERROR_EVENT, message, finish=True)
+
+    async def subscribe(self, alert_id: str) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Yields `(event, data)` pairs for an alert until the explanation is complete.
+
+        Raises:
+            KeyError: If the alert id is unknown or its channel has expired.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        while True:
+            with self._lock:
+                channel_id = self._aliases.get(alert_id, alert_id)
+                channel = self._channels.get(channel_id)
+                if channel is None:
+                    raise KeyError(alert_id)
+                replay = list(channel.events)
+                if not channel.finished:
+                    channel.subscribers.append((loop, queue))
+
+            for event in replay:
+                yield event
+            if channel.finished:
+                return
+
+            try:
+                while True:
+                    event, data = await queue.get()
+                    if event == _REDIRECT:
+                        alert_id = data
+                        break
+                    yield event, data
+                    if event in (DONE_EVENT, ERROR_EVENT):
+                        return
+            finally:
+                with self._lock:
+                    if (loop, queue) in channel.subscribers:
+                        channel.subscribers.remove((loop, queue))
+
+    def _emit(self, alert_id: str, event: str, data: str, finish: bool = False) -> None:
+        with self._lock:
+            channel = self._channels.get(self._aliases.get(alert_id, alert_id))
+            if channel is None or channel.finished:
+                return
+            channel.events.append((event, data))
+            if finish:
+                channel.finished_at = self._clock()
+            subscribers = list(channel.subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+            except RuntimeError:
+                # The subscriber's event loop has been closed.
+                logger.debug(f"Dropping stream event for closed subscriber of alert {alert_id}.")
+
+    def _prune(self) -> None:
+        now = self._clock()
+        expired = [
+            alert_id
+            for alert_id, channel in self._channels.items()
+            if channel.finished and now - channel.finished_at >= self.retention_seconds
+        ]
+        for alert_id in expired:
+            del self._channels[alert_id]
+        if expired:
+            live = set(self._channels)
+            self._aliases = {
+                alias: target for alias, target in self._aliases.items() if target in live
+            }
+
@@ -0,0 +1,55 @@
+import logging
+import os
+import re
+
+from core.config import SYNC_CHECKPOINT_DIR
+from models.knowledge_base import SyncCheckpoint
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SyncCheckpointStore:
+    """
+    Persists knowledge base sync checkpoints as one JSON file per source.
+    """
+
+    def __init__(self, directory: str = SYNC_CHECKPOINT_DIR):
+        """
+        Initializes the SyncCheckpointStore.
+
+        Args:
+            directory (str): Directory the checkpoint files are written to.
+        """
+        self.directory = directory
+
+    def load(self, source_key: str) -> SyncCheckpoint:
+        """
+        Returns the checkpoint of a source, or an empty one if it was never synced
+        or its checkpoint cannot be read.
+        """
+        path = self._path(source_key)
+        if not os.path.exists(path):
+            return SyncCheckpoint(source_key=source_key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return SyncCheckpoint.model_validate_json(f.read())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable sync checkpoint '{path}'. Error: {e}")
+            return SyncCheckpoint(source_key=source_key)
+
+    def save(self, checkpoint: SyncCheckpoint) -> None:
+        """
+        Writes a checkpoint. The file is replaced atomically, so an interrupted
+        write leaves the previous checkpoint in place.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(checkpoint.source_key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(checkpoint.model_dump_json())
+        os.replace(tmp_path, path)
+
+    def _path(self, source_key: str) -> str:
+        filename = re.sub(r"[^A-Za-z0-9_.-]", "_", source_key)
+        return os.path.join(self.directory, f"{filename}.json")
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.alert_queue import AlertQueue, AlertQueueFullError
+
+
+def test_submit_processes_alerts_in_background(make_alert):
+    mock_alert_service = MagicMock()
+    alerts = [make_alert(title=f"Alert {i}") for i in range(3)]
+
+    async def scenario():
+        queue = AlertQueue(alert_service=mock_alert_service, max_size=10, num_workers=2)
+        await queue.start()
+        alert_ids = [queue.submit(alert) for alert in alerts]
+        await queue.join()
+        await queue.stop()
+        return alert_ids
+
+    alert_ids = asyncio.run(scenario())
+
+    assert len(set(alert_ids)) == 3
+    assert mock_alert_service.handle_alert.call_count == 3
+    handled = {call.args[1]: call.args[0] for call in mock_alert_service.handle_alert.call_args_list}
+    assert handled == dict(zip(alert_ids, alerts))
+    accepted = {call.args[1]: call.args[0] for call in mock_alert_service.accept.call_args_list}
+    assert accepted == handled
+
+
+def test_submit_raises_when_queue_is_full(make_alert):
+    release = threading.Event()
+    mock_alert_service = MagicMock()
+    mock_alert_service.handle_alert.side_effect = lambda alert, alert_id: release.wait(5)
+
+    async def scenario():
+        queue = AlertQueue(alert_service=mock_alert_service, max_size=1, num_workers=1)
+        await queue.start()
+        queue.submit(make_alert(title="in flight"))
+        await asyncio.sleep(0.05)  # let the worker pick up the first alert
+        queue.submit(make_alert(title="waiting"))
+        depth = queue.depth
+        with pytest.raises(AlertQueueFullError):
+            queue.submit(make_alert(title="rejected"))
+        release.set()
+        await queue.join()
+        await queue.stop()
+        return depth
+
+    assert asyncio.run(scenario()) == 1
+    assert mock_alert_service.handle_alert.call_count == 2
+
+
+def test_worker_survives_failed_alert(make_alert):
+    mock_alert_service = MagicMock()
+    mock_alert_service.handle_alert.side_effect = [Exception("LLM down"), None]
+
+    async def scenario():
+        queue = AlertQueue(alert_service=mock_alert_service, max_size=10, num_workers=1)
+        await queue.start()
+        queue.submit(make_alert(title="fails"))
+        queue.submit(make_alert(title="succeeds"))
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert mock_alert_service.handle_alert.call_count == 2
+
+
+def test_submit_requires_started_queue(make_alert):
+    queue = AlertQueue(alert_service=MagicMock())
+
+    with pytest.raises(RuntimeError):
+        queue.submit(make_alert())
+
+
+def test_urgent_alerts_are_investigated_first(make_alert):
+    release = threading.Event()
+    handled = []
+    mock_alert_service = MagicMock()
+
+    def handle_alert(alert, alert_id):
+        if alert.title == "in flight":
+            release.wait(5)
+        handled.append(alert.title)
+
+    mock_alert_service.handle_alert.side_effect = handle_alert
+
+    async def scenario():
+        queue = AlertQueue(alert_service=mock_alert_service, max_size=10, num_workers=1)
+        await queue.start()
+        queue.submit(make_alert(title="in flight", severity="info"))
+        await asyncio.sleep(0.05)
+        queue.submit(make_alert(title="noisy 1", severity="info", service="noisy"))
+        queue.submit(make_alert(title="noisy 2", severity="info", service="noisy"))
+        queue.submit(make_alert(title="quiet", severity="info", service="quiet"))
+        queue.submit(make_alert(title="outage", severity="critical"))
+        release.set()
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert handled == ["in flight", "outage", "noisy 1", "quiet", "noisy 2"]
+
+
+def test_reserved_worker_keeps_critical_alerts_from_waiting_behind_a_burst(make_alert):
+    release = threading.Event()
+    started = {}
+    mock_alert_service = MagicMock()
+
+    def handle_alert(alert, alert_id):
+        started[alert.title] = time.monotonic()
+        if alert.severity == "info":
+            release.wait(5)
+
+    mock_alert_service.handle_alert.side_effect = handle_alert
+
+    async def scenario():
+        queue = AlertQueue(alert_service=mock_alert_service, max_size=20, num_workers=2, reserved_workers=1)
+        await queue.start()
+        for index in range(10):
+            queue.submit(make_alert(title=f"info {index}", severity="info"))
+        await asyncio.sleep(0.05)
+        # Only one worker took a low priority alert; the other stays free.
+        stats = queue.stats()
+        submitted = time.monotonic()
+        queue.submit(make_alert(title="outage", severity="critical"))
+        while "outage" not in started:
+            await asyncio.sleep(0.01)
+        release.set()
+        await queue.join()
+        await queue.stop()
+        return stats, submitted
+
+    stats, submitted = asyncio.run(scenario())
+
+    assert stats["busy_workers"] == 1
+    assert stats["depth_by_priority"]["low"] == 9
+    assert started["outage"] - submitted < 0.5
+
+
+def test_full_queue_still_admits_more_urgent_alerts(make_alert):
+    release = threading.Event()
+    mock_alert_service = MagicMock()
+    mock_alert_service.handle_alert.side_effect = lambda alert, alert_id: release.wait(5)
+
+    async def scenario():
+        queue = AlertQueue(alert_service=mock_alert_service, max_size=2, num_workers=1)
+        await queue.start()
+        queue.submit(make_alert(title="in flight", severity="info"))
+        await asyncio.sleep(0.05)
+        queue.submit(make_alert(title="low 1", severity="info"))
+        queue.submit(make_alert(title="low 2", severity="info"))
+        with pytest.raises(AlertQueueFullError):
+            queue.submit(make_alert(title="low 3", severity="info"))
+        queue.submit(make_alert(title="outage", severity="critical"))
+        release.set()
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert mock_alert_service.handle_alert.call_count == 4
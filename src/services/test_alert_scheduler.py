@@ -0,0 +1,58 @@
+import pytest
+
+from services.alert_scheduler import PriorityFairQueue, alert_priority
+
+
+@pytest.mark.parametrize("severity, priority", [
+    ("Critical", 0), ("P1", 0), ("high", 1), ("error", 1),
+    ("warning", 2), ("average", 2), ("info", 3), (" LOW ", 3), ("", 2), (None, 2), ("unheard-of", 2),
+])
+def test_alert_priority(severity, priority):
+    assert alert_priority(severity) == priority
+
+
+def drain(queue: PriorityFairQueue) -> list:
+    items = []
+    while len(queue):
+        items.append(queue.pop())
+    return items
+
+
+def test_more_urgent_priorities_are_served_first():
+    queue = PriorityFairQueue()
+    queue.push("low", 3, ("team", "a"))
+    queue.push("medium", 2, ("team", "a"))
+    queue.push("critical", 0, ("team", "a"))
+
+    assert queue.peek_priority() == 0
+    assert drain(queue) == ["critical", "medium", "low"]
+
+
+def test_flows_take_turns_within_a_priority():
+    queue = PriorityFairQueue()
+    for index in range(4):
+        queue.push(f"noisy-{index}", 2, ("team", "noisy"))
+    queue.push("quiet-0", 2, ("team", "quiet"))
+    queue.push("quiet-1", 2, ("team", "quiet"))
+
+    assert drain(queue) == ["noisy-0", "quiet-0", "noisy-1", "quiet-1", "noisy-2", "noisy-3"]
+
+
+def test_new_flow_does_not_jump_ahead_of_served_flows():
+    queue = PriorityFairQueue()
+    for index in range(3):
+        queue.push(f"a-{index}", 1, ("team", "a"))
+    assert queue.pop() == "a-0"
+    assert queue.pop() == "a-1"
+
+    # A flow arriving now starts at the current virtual time, not at zero, so it
+    # gets no credit for the turns it was not waiting for.
+    for index in range(3):
+        queue.push(f"b-{index}", 1, ("team", "b"))
+
+    assert drain(queue) == ["b-0", "a-2", "b-1", "b-2"]
+
+
+def test_pop_from_empty_queue_raises():
+    with pytest.raises(IndexError):
+        PriorityFairQueue().pop()
@@ -1,8 +1,11 @@
+import asyncio
+import threading
 from unittest.mock import MagicMock, patch
 
 from pydantic.networks import HttpUrl
 from models.canonical import AlertDetails, CanonicalAlert
-from services.alert_service import AlertService
+from services.alert_queue import AlertQueue
+from services.alert_service import RESOLVED_BEFORE_INVESTIGATION, AlertService
 
 
 def test_process_alert():
@@ -39,5 +42,244 @@ def test_process_alert():
 
     # Assert
     mock_ingestion_adapter.normalize.assert_called_once_with(raw_alert)
-    mock_graph_service.run.assert_called_once_with(canonical_alert)
-    mock_notification_adapter.send.assert_called_once_with(canonical_alert, explanation)
\ No newline at end of file
+    mock_graph_service.run.assert_called_once_with(canonical_alert, alert_id=None)
+    mock_notification_adapter.send.assert_called_once_with(canonical_alert, explanation, occurrences=1)
+
+def test_handle_alert_skips_normalization():
+    # Arrange
+    mock_ingestion_adapter = MagicMock()
+    mock_notification_adapter = MagicMock()
+    mock_graph_service = MagicMock()
+
+    canonical_alert = CanonicalAlert(
+        title="Test Alert",
+        environment="test",
+        service="test-service",
+        severity="critical",
+        status="firing",
+        timestamp="2025-07-03T12:00:00Z",
+        details=AlertDetails(metric="test"),
+        link_to_source=HttpUrl("http://example.com/source"),
+        raw_payload={}
+    )
+    mock_graph_service.run.return_value = "explanation"
+
+    alert_service = AlertService(
+        ingestion_adapter=mock_ingestion_adapter,
+        notification_adapter=mock_notification_adapter,
+        graph_service=mock_graph_service,
+    )
+
+    # Act
+    alert_service.handle_alert(canonical_alert, alert_id="abc123")
+
+    # Assert
+    mock_ingestion_adapter.normalize.assert_not_called()
+    mock_graph_service.run.assert_called_once_with(canonical_alert, alert_id="abc123")
+    mock_notification_adapter.send.assert_called_once_with(canonical_alert, "explanation", occurrences=1)
+
+
+def test_duplicate_alerts_share_one_investigation(make_alert):
+    # Arrange
+    mock_notification_adapter = MagicMock()
+    mock_graph_service = MagicMock()
+    mock_graph_service.run.return_value = "explanation"
+
+    alert_service = AlertService(
+        ingestion_adapter=MagicMock(),
+        notification_adapter=mock_notification_adapter,
+        graph_service=mock_graph_service,
+    )
+
+    def make_alert(current_value: str) -> CanonicalAlert:
+        return CanonicalAlert(
+            title="Test Alert",
+            environment="test",
+            service="test-service",
+            severity="critical",
+            status="firing",
+            timestamp="2025-07-03T12:00:00Z",
+            details=AlertDetails(metric="test", current_value=current_value),
+            link_to_source=HttpUrl("http://example.com/source"),
+            raw_payload={}
+        )
+
+    # Act
+    first = alert_service.handle_alert(make_alert("91%"), alert_id="a1")
+    second = alert_service.handle_alert(make_alert("93%"), alert_id="a2")
+
+    # Assert
+    assert first == second == "explanation"
+    mock_graph_service.run.assert_called_once()
+    mock_notification_adapter.send.assert_called_once()
+
+
+
+def test_handle_alert_closes_and_aliases_streams():
+    # Arrange
+    mock_graph_service = MagicMock()
+    mock_graph_service.run.return_value = "explanation"
+    mock_stream_broker = MagicMock()
+
+    alert_service = AlertService(
+        ingestion_adapter=MagicMock(),
+        notification_adapter=MagicMock(),
+        graph_service=mock_graph_service,
+        stream_broker=mock_stream_broker,
+    )
+    canonical_alert = CanonicalAlert(
+        title="Test Alert",
+        environment="test",
+        service="test-service",
+        severity="critical",
+        status="firing",
+        timestamp="2025-07-03T12:00:00Z",
+        details=AlertDetails(metric="test"),
+        link_to_source=HttpUrl("http://example.com/source"),
+        raw_payload={}
+    )
+
+    # Act
+    alert_service.handle_alert(canonical_alert, alert_id="a1")
+    alert_service.handle_alert(canonical_alert, alert_id="a2")
+
+    # Assert
+    mock_stream_broker.close.assert_called_once_with("a1", "explanation")
+    mock_stream_broker.alias.assert_called_once_with("a2", "a1")
+
+
+def test_resolution_skips_the_investigation(make_alert):
+    # Arrange
+    mock_notification_adapter = MagicMock()
+    mock_graph_service = MagicMock()
+    mock_graph_service.run.return_value = "explanation"
+
+    alert_service = AlertService(
+        ingestion_adapter=MagicMock(),
+        notification_adapter=mock_notification_adapter,
+        graph_service=mock_graph_service,
+        public_base_url="https://alerts.example.com/",
+    )
+    alert_service.handle_alert(make_alert(status="firing", timestamp="2025-07-03T12:00:00Z"), alert_id="a1")
+    resolved = make_alert(status="resolved", timestamp="2025-07-03T13:05:00Z")
+
+    # Act
+    notice = alert_service.handle_alert(resolved, alert_id="a2")
+
+    # Assert
+    mock_graph_service.run.assert_called_once()
+    assert notice.startswith("Resolved 1h 5m after firing")
+    assert "https://alerts.example.com/api/v1/webhook/alerts/a1/explanation" in notice
+    mock_notification_adapter.send_status_change.assert_called_once_with(resolved, notice)
+    # The firing alert is forgotten once resolved, but its explanation stays linkable.
+    assert alert_service.handle_alert(resolved, alert_id="a3").startswith("Resolved. No investigation")
+    assert alert_service.firing_alerts.get("a1").explanation == "explanation"
+    # Firing again after the resolution starts a new investigation.
+    alert_service.handle_alert(make_alert(status="firing", timestamp="2025-07-03T13:10:00Z"), alert_id="a4")
+    assert mock_graph_service.run.call_count == 2
+
+
+def test_acknowledgement_keeps_the_firing_alert(make_alert):
+    # Arrange
+    mock_graph_service = MagicMock()
+    mock_graph_service.run.return_value = "explanation"
+    mock_stream_broker = MagicMock()
+
+    alert_service = AlertService(
+        ingestion_adapter=MagicMock(),
+        notification_adapter=MagicMock(),
+        graph_service=mock_graph_service,
+        stream_broker=mock_stream_broker,
+        public_base_url="",
+    )
+    alert_service.handle_alert(make_alert(status="firing", timestamp="2025-07-03T12:00:00Z"), alert_id="a1")
+
+    # Act
+    notice = alert_service.handle_alert(make_alert(status="ACK", timestamp="2025-07-03T12:03:20Z"), alert_id="a2")
+
+    # Assert
+    assert notice == "Acknowledged 3m 20s after firing (fired at 2025-07-03 12:00:00 UTC)."
+    mock_stream_broker.close.assert_called_with("a2", notice)
+    assert alert_service.firing_alerts.get("a1").acknowledged
+    resolved = alert_service.handle_alert(make_alert(status="ok", timestamp="2025-07-03T12:10:00Z"), alert_id="a3")
+    assert resolved.startswith("Resolved 10m 0s after firing")
+    mock_graph_service.run.assert_called_once()
+
+
+def test_resolution_during_the_investigation_suppresses_its_notification(make_alert):
+    # Arrange
+    mock_notification_adapter = MagicMock()
+    mock_graph_service = MagicMock()
+    alert_service = AlertService(
+        ingestion_adapter=MagicMock(),
+        notification_adapter=mock_notification_adapter,
+        graph_service=mock_graph_service,
+        public_base_url="https://alerts.example.com",
+    )
+    resolved = make_alert(status="resolved", timestamp="2025-07-03T12:02:00Z")
+    notices = []
+
+    def run(alert, alert_id):
+        # The resolution arrives while the investigation is running.
+        notices.append(alert_service.handle_alert(resolved, alert_id="a2"))
+        return "explanation"
+
+    mock_graph_service.run.side_effect = run
+
+    # Act
+    alert_service.handle_alert(make_alert(status="firing", timestamp="2025-07-03T12:00:00Z"), alert_id="a1")
+
+    # Assert
+    assert notices[0].startswith("Resolved 2m 0s after firing")
+    assert "had not finished" in notices[0]
+    assert "https://alerts.example.com/api/v1/webhook/alerts/a1/explanation" in notices[0]
+    mock_notification_adapter.send_status_change.assert_called_once_with(resolved, notices[0])
+    mock_notification_adapter.send.assert_not_called()
+    firing = alert_service.firing_alerts.get("a1")
+    assert firing.resolved and firing.explanation == "explanation"
+    # The resolved alert is no longer firing, and firing again is investigated anew.
+    assert alert_service.handle_alert(resolved, alert_id="a3").startswith("Resolved. No investigation")
+    mock_graph_service.run.side_effect = None
+    mock_graph_service.run.return_value = "explanation"
+    alert_service.handle_alert(make_alert(status="firing", timestamp="2025-07-03T12:10:00Z"), alert_id="a4")
+    assert mock_graph_service.run.call_count == 2
+    mock_notification_adapter.send.assert_called_once()
+
+
+def test_resolution_of_a_queued_alert_skips_its_investigation(make_alert):
+    # Arrange
+    release = threading.Event()
+    mock_notification_adapter = MagicMock()
+    mock_graph_service = MagicMock()
+    mock_graph_service.run.side_effect = lambda alert, alert_id: release.wait(5) and "explanation"
+    alert_service = AlertService(
+        ingestion_adapter=MagicMock(),
+        notification_adapter=mock_notification_adapter,
+        graph_service=mock_graph_service,
+        public_base_url="https://alerts.example.com",
+    )
+    resolved = make_alert(status="resolved", timestamp="2025-07-03T12:02:00Z")
+
+    async def scenario():
+        queue = AlertQueue(alert_service=alert_service, num_workers=1)
+        await queue.start()
+        queue.submit(make_alert(title="in flight"))
+        await asyncio.sleep(0.05)  # let the worker pick up the first alert
+        alert_id = queue.submit(make_alert())
+        # Act: the second alert resolves before the worker picks it up.
+        notice = alert_service.handle_alert(resolved, alert_id="r1")
+        release.set()
+        await queue.join()
+        await queue.stop()
+        return alert_id, notice
+
+    alert_id, notice = asyncio.run(scenario())
+
+    # Assert
+    assert notice.startswith("Resolved 2m 0s after firing")
+    assert f"https://alerts.example.com/api/v1/webhook/alerts/{alert_id}/explanation" in notice
+    mock_graph_service.run.assert_called_once()
+    assert mock_graph_service.run.call_args.args[0].title == "in flight"
+    mock_notification_adapter.send.assert_called_once()
+    assert alert_service.firing_alerts.get(alert_id).explanation == RESOLVED_BEFORE_INVESTIGATION
+    assert alert_service.handle_alert(resolved, alert_id="r2").startswith("Resolved. No investigation")
@@ -0,0 +1,72 @@
+import pytest
+
+from src.models.knowledge_base import KnowledgeBaseArticle
+from src.services.chunking import ArticleChunker, count_tokens, html_to_sections, split_into_windows
+
+STORAGE_FORMAT_PAGE = """
+<ac:structured-macro ac:name="toc"><ac:parameter ac:name="maxLevel">2</ac:parameter></ac:structured-macro>
+<p>Runbook for the <strong>auth-api</strong> &amp; its database.</p>
+<h2>High CPU</h2>
+<ul><li>Check the pods.</li><li>Scale the deployment.</li></ul>
+<ac:structured-macro ac:name="code">
+  <ac:parameter ac:name="language">bash</ac:parameter>
+  <ac:plain-text-body><![CDATA[kubectl top pods -n auth]]></ac:plain-text-body>
+</ac:structured-macro>
+<h2>Contacts</h2>
+<table><tr><th>Team</th><th>Channel</th></tr><tr><td>backend</td><td>#backend-oncall</td></tr></table>
+"""
+
+
+def test_html_to_sections_strips_markup_and_macros():
+    sections = html_to_sections(STORAGE_FORMAT_PAGE)
+
+    assert sections == [
+        ("", "Runbook for the auth-api & its database."),
+        ("High CPU", "- Check the pods.\n- Scale the deployment.\nkubectl top pods -n auth"),
+        ("Contacts", "Team | Channel\nbackend | #backend-oncall"),
+    ]
+
+
+def test_split_into_windows_is_bounded_and_overlaps():
+    text = " ".join(f"word{i}" for i in range(100))
+
+    windows = split_into_windows(text, max_tokens=30, overlap_tokens=5)
+
+    assert all(count_tokens(window) <= 30 for window in windows)
+    assert windows[0].split()[-5:] == windows[1].split()[:5]
+    assert windows[-1].split()[-1] == "word99"
+
+
+def test_split_into_windows_keeps_short_lines_together():
+    windows = split_into_windows("first line\nsecond line", max_tokens=10, overlap_tokens=2)
+
+    assert windows == ["first line\nsecond line"]
+
+
+def test_chunker_links_chunks_to_parent():
+    article = KnowledgeBaseArticle(
+        id="42",
+        source="Confluence",
+        title="Auth API Runbook",
+        content=STORAGE_FORMAT_PAGE,
+        metadata={"version": 3},
+    )
+
+    chunks = ArticleChunker(max_tokens=50, overlap_tokens=10).chunk(article)
+
+    assert [chunk.id for chunk in chunks] == ["42::chunk-0", "42::chunk-1", "42::chunk-2"]
+    assert chunks[1].content.startswith("Auth API Runbook > High CPU\n")
+    assert chunks[1].metadata == {"version": 3, "parent_id": "42", "chunk_index": 1, "section": "High CPU"}
+    assert all(chunk.title == article.title for chunk in chunks)
+    assert all(count_tokens(chunk.content) <= 50 for chunk in chunks)
+
+
+def test_chunker_skips_empty_articles():
+    article = KnowledgeBaseArticle(id="1", source="Confluence", title="Empty", content="<p> </p>")
+
+    assert ArticleChunker().chunk(article) == []
+
+
+def test_chunker_rejects_overlap_larger_than_window():
+    with pytest.raises(ValueError):
+        ArticleChunker(max_tokens=10, overlap_tokens=10)
@@ -0,0 +1,82 @@
+from models.canonical import AlertDetails
+from services.coalescing_service import AlertCoalescer
+from services.fingerprint import compute_fingerprint
+
+
+def test_fingerprint_ignores_volatile_and_cosmetic_differences(make_alert):
+    alert = make_alert(
+        title="Disk usage high",
+        severity="warning",
+        details=AlertDetails(metric="DiskUsage", current_value="91%"),
+    )
+    duplicate = make_alert(
+        title="  disk usage HIGH ",
+        timestamp="2025-07-03T12:05:00Z",
+        severity="critical",
+        details=AlertDetails(metric="DiskUsage", current_value="97%"),
+    )
+
+    assert compute_fingerprint(alert) == compute_fingerprint(duplicate)
+
+
+def test_fingerprint_differs_by_identifying_fields(make_alert):
+    alert = make_alert()
+
+    assert compute_fingerprint(alert) != compute_fingerprint(make_alert(service="auth-api"))
+    assert compute_fingerprint(alert) != compute_fingerprint(make_alert(environment="staging"))
+    assert compute_fingerprint(alert) != compute_fingerprint(
+        make_alert(details=AlertDetails(metric="InodeUsage"))
+    )
+    assert compute_fingerprint(alert) != compute_fingerprint(alert, salt="v2")
+
+
+def test_duplicates_attach_to_in_flight_investigation(make_alert, fake_clock):
+    coalescer = AlertCoalescer(window_seconds=60, clock=fake_clock())
+
+    leader, leader_is_new = coalescer.attach(make_alert(), "a1")
+    follower, follower_is_new = coalescer.attach(make_alert(), "a2")
+
+    assert leader_is_new is True
+    assert follower_is_new is False
+    assert follower is leader
+    assert leader.occurrences == 2
+    assert leader.alert_id == "a1"
+
+
+def test_finished_investigation_is_reused_within_window(make_alert, fake_clock):
+    clock = fake_clock()
+    coalescer = AlertCoalescer(window_seconds=60, clock=clock)
+
+    investigation, _ = coalescer.attach(make_alert(), "a1")
+    coalescer.complete(investigation, "explanation")
+
+    clock.now = 59
+    reused, is_new = coalescer.attach(make_alert(), "a2")
+    assert is_new is False
+    assert reused.explanation == "explanation"
+
+    clock.now = 61
+    fresh, is_new = coalescer.attach(make_alert(), "a3")
+    assert is_new is True
+    assert fresh is not investigation
+
+
+def test_in_flight_investigation_outlives_window(make_alert, fake_clock):
+    clock = fake_clock()
+    coalescer = AlertCoalescer(window_seconds=60, clock=clock)
+
+    coalescer.attach(make_alert(), "a1")
+    clock.now = 600
+
+    _, is_new = coalescer.attach(make_alert(), "a2")
+    assert is_new is False
+
+
+def test_failed_investigation_is_retried(make_alert, fake_clock):
+    coalescer = AlertCoalescer(window_seconds=60, clock=fake_clock())
+
+    investigation, _ = coalescer.attach(make_alert(), "a1")
+    coalescer.fail(investigation)
+
+    _, is_new = coalescer.attach(make_alert(), "a2")
+    assert is_new is True
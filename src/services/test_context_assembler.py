@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+from services.context_assembler import (
+    TRUNCATION_MARKER,
+    ContextAssembler,
+    _WordPieceTokenizer,
+    load_tokenizer,
+)
+from services.retrieval_planner import RetrievedDocument
+
+TOKENIZER = _WordPieceTokenizer()
+
+
+def make_assembler(**overrides) -> ContextAssembler:
+    settings = dict(token_budget=200, max_plan_tokens=50, max_document_tokens=80, tokenizer=TOKENIZER)
+    settings.update(overrides)
+    return ContextAssembler(**settings)
+
+
+def words(count: int, word: str = "cpu") -> str:
+    return " ".join(f"{word}{index}" for index in range(count))
+
+
+def test_documents_are_ranked_by_distance_within_the_budget():
+    documents = [
+        RetrievedDocument(id="far", text=words(70, "far"), distance=0.9),
+        RetrievedDocument(id="near", text=words(70, "near"), distance=0.1),
+        RetrievedDocument(id="middle", text=words(70, "middle"), distance=0.5),
+    ]
+
+    context = make_assembler(token_budget=150).assemble([], documents)
+
+    assert [document.split()[0] for document in context.documents] == ["near0", "middle0"]
+    assert context.dropped_documents == 1
+    assert context.tokens <= 150
+
+
+def test_long_documents_are_truncated():
+    context = make_assembler().assemble([], [RetrievedDocument(id="1", text=words(500))])
+
+    [document] = context.documents
+    assert document.endswith(TRUNCATION_MARKER)
+    assert TOKENIZER.count(document) <= 80
+
+
+def test_duplicate_passages_are_dropped():
+    shared = "Escalate to the owning team if the alert keeps firing."
+    documents = [
+        RetrievedDocument(id="1", text=f"Check the pods.\n\n{shared}", distance=0.1),
+        RetrievedDocument(id="2", text=f"Check the database.\n\n{shared.upper()}", distance=0.2),
+        RetrievedDocument(id="3", text=shared, distance=0.3),
+    ]
+
+    context = make_assembler().assemble([], documents)
+
+    assert context.documents == [f"Check the pods.\n\n{shared}", "Check the database."]
+
+
+def test_passages_cut_off_by_truncation_are_not_deduplicated():
+    steps = words(40, "step")
+    documents = [
+        RetrievedDocument(id="1", text=f"Check the pods.\n\n{steps}", distance=0.1),
+        RetrievedDocument(id="2", text=f"Check the pods.\n\n{steps}", distance=0.2),
+    ]
+
+    context = make_assembler(max_document_tokens=40).assemble([], documents)
+
+    assert context.documents[0].startswith("Check the pods.\n\nstep0")
+    assert context.documents[0].endswith(TRUNCATION_MARKER)
+    # The cut passage is offered again by the next document; the kept one is not.
+    assert context.documents[1].startswith("step0")
+
+
+def test_plan_is_compacted_to_assistant_and_tool_text():
+    tool_call = SimpleNamespace(function=SimpleNamespace(name="search_knowledge_base", arguments='{"query": "cpu"}'))
+    plan = [
+        {"role": "system", "content": "You are a senior on-call engineer."},
+        {"role": "user", "content": "Alert Details: ..."},
+        SimpleNamespace(role="assistant", content=None, tool_calls=[tool_call]),
+        {"role": "tool", "name": "search_knowledge_base", "tool_call_id": "call_1", "content": "['runbook']"},
+        SimpleNamespace(role="assistant", content="1. Check the pods.", tool_calls=None),
+    ]
+
+    context = make_assembler().assemble(plan, [])
+
+    assert context.plan == (
+        'assistant: called search_knowledge_base({"query": "cpu"})\n'
+        "tool search_knowledge_base: (documents listed in the knowledge base context)\n"
+        "assistant: 1. Check the pods."
+    )
+
+
+def test_plan_is_capped():
+    plan = [{"role": "assistant", "content": words(500)}]
+
+    context = make_assembler().assemble(plan, [RetrievedDocument(id="1", text="Check the pods.")])
+
+    assert context.plan_tokens <= 50
+    assert context.documents == ["Check the pods."]
+
+
+def test_unknown_models_fall_back_to_word_estimate():
+    assert isinstance(load_tokenizer("not-a-known-model", encoding=""), _WordPieceTokenizer)
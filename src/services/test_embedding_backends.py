@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+from services.embedding_backends import (
+    OnnxEmbeddingFunction,
+    create_embedding_function,
+    embedding_namespace,
+)
+
+VOCAB = {"[PAD]": 0, "[UNK]": 1, "cpu": 2, "memory": 3, "disk": 4}
+
+
+@pytest.fixture
+def tokenizer_path(tmp_path):
+    tokenizer = Tokenizer(WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    path = tmp_path / "tokenizer.json"
+    tokenizer.save(str(path))
+    return str(path)
+
+
+class OneHotSession:
+    """Stands in for the model: the embedding of a token is the one-hot vector of its id."""
+
+    def __init__(self):
+        self.batch_shapes = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=name) for name in ("input_ids", "attention_mask", "token_type_ids")]
+
+    def run(self, output_names, feeds):
+        self.batch_shapes.append(feeds["input_ids"].shape)
+        return [np.eye(len(VOCAB), dtype=np.float32)[feeds["input_ids"]]]
+
+
+@pytest.fixture
+def onnx_embedding_function(tokenizer_path):
+    session = OneHotSession()
+    with patch("onnxruntime.InferenceSession", return_value=session):
+        embedding_function = OnnxEmbeddingFunction("model.onnx", tokenizer_path, batch_size=2)
+    return embedding_function, session
+
+
+def test_onnx_embeddings_are_mean_pooled_and_normalized(onnx_embedding_function):
+    embedding_function, _ = onnx_embedding_function
+
+    cpu_memory, cpu = embedding_function(["cpu memory", "cpu"])
+
+    # Padding must not count towards the mean of the shorter text.
+    np.testing.assert_allclose(cpu, [0, 0, 1, 0, 0], atol=1e-6)
+    np.testing.assert_allclose(cpu_memory, np.array([0, 0, 1, 1, 0]) / np.sqrt(2), atol=1e-6)
+
+
+def test_onnx_batches_texts_of_similar_length(onnx_embedding_function):
+    embedding_function, session = onnx_embedding_function
+
+    embeddings = embedding_function(["cpu memory disk", "disk", "cpu memory", "memory"])
+
+    # Sorted by length, the two single words share a batch without padding.
+    assert session.batch_shapes == [(2, 1), (2, 3)]
+    np.testing.assert_allclose(embeddings[1], [0, 0, 0, 0, 1], atol=1e-6)
+    np.testing.assert_allclose(embeddings[3], [0, 0, 0, 1, 0], atol=1e-6)
+
+
+def test_create_embedding_function_rejects_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        create_embedding_function("word2vec")
+
+
+def test_backends_do_not_share_cached_embeddings():
+    assert embedding_namespace("sentence-transformers") == "all-MiniLM-L6-v2"
+    assert embedding_namespace("onnx-int8") != embedding_namespace("sentence-transformers")
@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from src.services.embedding_cache import CachedEmbeddingFunction, EmbeddingStore, make_embedding_key
+
+
+def fake_model(dimension=4):
+    """A stand-in embedding function returning a vector derived from each text."""
+    def embed(texts):
+        return [np.full(dimension, float(len(text)), dtype=np.float32) for text in texts]
+
+    model = MagicMock(side_effect=embed)
+    model.embed_query.side_effect = embed
+    return model
+
+
+def test_make_embedding_key_depends_on_namespace():
+    assert make_embedding_key("text", "model-a") == make_embedding_key("text", "model-a")
+    assert make_embedding_key("text", "model-a") != make_embedding_key("text", "model-b")
+
+
+def test_store_round_trip_survives_reopen(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.put_many({"a": np.array([1, 2, 3], dtype=np.float32)})
+    store.put_many({"b": np.array([4, 5, 6], dtype=np.float32), "a": np.zeros(3)})
+    store.close()
+
+    reopened = EmbeddingStore(str(tmp_path))
+    found = reopened.get_many(["a", "b", "missing"])
+
+    assert len(reopened) == 2
+    assert set(found) == {"a", "b"}
+    np.testing.assert_array_equal(found["a"], [1, 2, 3])
+    np.testing.assert_array_equal(found["b"], [4, 5, 6])
+
+
+def test_store_recovers_from_a_torn_append(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.put_many({"a": np.array([1, 2, 3], dtype=np.float32)})
+    store.close()
+    # A writer died halfway through appending an unindexed row.
+    with open(store.vectors_path, "ab") as f:
+        f.write(b"\x00" * 6)
+
+    reopened = EmbeddingStore(str(tmp_path))
+    reopened.put_many({"b": np.array([4, 5, 6], dtype=np.float32)})
+    found = reopened.get_many(["a", "b"])
+
+    np.testing.assert_array_equal(found["a"], [1, 2, 3])
+    np.testing.assert_array_equal(found["b"], [4, 5, 6])
+
+
+def test_store_errors_count_as_misses():
+    model = fake_model()
+    store = MagicMock()
+    store.get_many.side_effect = ValueError("cannot reshape")
+    store.put_many.side_effect = OSError("disk full")
+    cache = CachedEmbeddingFunction(model, store=store)
+
+    assert len(cache(["text"])) == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_store_skips_vectors_of_another_dimension(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.put_many({"a": np.ones(3, dtype=np.float32)})
+    store.put_many({"b": np.ones(5, dtype=np.float32)})
+
+    assert store.get_many(["b"]) == {}
+
+
+def test_repeated_queries_are_served_from_memory():
+    model = fake_model()
+    cache = CachedEmbeddingFunction(model, namespace="test")
+
+    first = cache.embed_query(["cpu usage high"])
+    second = cache.embed_query(["cpu usage high"])
+
+    model.embed_query.assert_called_once_with(["cpu usage high"])
+    np.testing.assert_array_equal(first[0], second[0])
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_only_missing_texts_are_embedded():
+    model = fake_model()
+    cache = CachedEmbeddingFunction(model, namespace="test")
+    cache(["doc one"])
+
+    embeddings = cache(["doc one", "doc two", "doc two"])
+
+    assert model.call_args_list[-1][0][0] == ["doc two"]
+    assert len(embeddings) == 3
+    assert cache.stats()["hits"] == 1
+
+
+def test_document_embeddings_are_reused_after_restart(tmp_path):
+    first_model = fake_model()
+    CachedEmbeddingFunction(first_model, store=EmbeddingStore(str(tmp_path)))(["article"])
+
+    second_model = fake_model()
+    cache = CachedEmbeddingFunction(second_model, store=EmbeddingStore(str(tmp_path)))
+    embeddings = cache(["article"])
+
+    second_model.assert_not_called()
+    np.testing.assert_array_equal(embeddings[0], np.full(4, 7.0))
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_query_embeddings_are_not_persisted(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    cache = CachedEmbeddingFunction(fake_model(), store=store)
+
+    cache.embed_query(["transient query"])
+
+    assert len(store) == 0
+
+
+def test_memory_tier_is_bounded():
+    model = fake_model()
+    cache = CachedEmbeddingFunction(model, memory_size=2)
+
+    cache(["a", "bb", "ccc"])
+    cache(["a"])
+
+    assert model.call_count == 2
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_wrapper_is_not_persisted_by_chroma():
+    cache = CachedEmbeddingFunction(fake_model())
+
+    # Chroma calls name() on the class and rebuilds only non-legacy functions.
+    assert CachedEmbeddingFunction.name() == "cached_embedding_function"
+    assert cache.is_legacy()
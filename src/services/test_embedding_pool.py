@@ -0,0 +1,27 @@
+import functools
+
+import numpy as np
+
+from benchmarks.stubs import HashEmbeddingFunction
+from services.embedding_pool import EmbeddingPool
+
+
+def test_pool_embeds_in_worker_processes_in_order():
+    texts = [f"chunk {i}" for i in range(25)]
+    pool = EmbeddingPool(functools.partial(HashEmbeddingFunction, dimension=8), workers=2, chunk_size=4)
+    try:
+        embeddings = pool(texts)
+    finally:
+        pool.close()
+
+    expected = HashEmbeddingFunction(dimension=8)(texts)
+    assert len(embeddings) == 25
+    for actual, wanted in zip(embeddings, expected):
+        np.testing.assert_allclose(actual, wanted)
+
+
+def test_pool_with_no_texts_starts_no_workers():
+    pool = EmbeddingPool(HashEmbeddingFunction, workers=2)
+
+    assert pool([]) == []
+    assert pool._executor is None
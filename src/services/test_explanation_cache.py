@@ -0,0 +1,90 @@
+import pytest
+
+from models.canonical import AlertDetails
+from services.explanation_cache import ExplanationCache, make_cache_key
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(1000.0)
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ExplanationCache(
+        db_path=str(tmp_path / "explanations.sqlite3"),
+        memory_size=2,
+        max_entries=3,
+        ttl_seconds=60,
+        clock=clock,
+    )
+    cache.ensure_version("v1")
+    yield cache
+    cache.close()
+
+
+def test_cache_key_ignores_volatile_fields(make_alert):
+    nightly = make_alert(details=AlertDetails(metric="DiskFree", current_value="9%", threshold="10%"))
+    next_night = make_alert(
+        timestamp="2025-07-04T02:00:00Z",
+        details=AlertDetails(metric="DiskFree", current_value="8%", threshold="10%"),
+    )
+
+    assert make_cache_key(nightly, "v1") == make_cache_key(next_night, "v1")
+    assert make_cache_key(nightly, "v1") != make_cache_key(nightly, "v2")
+    assert make_cache_key(nightly, "v1") != make_cache_key(make_alert(severity="warning"), "v1")
+
+
+def test_get_and_set_count_hits_and_misses(cache):
+    assert cache.get("key") is None
+    cache.set("key", "explanation")
+
+    assert cache.get("key") == "explanation"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_entries_survive_restart(tmp_path, clock, cache):
+    cache.set("key", "explanation")
+    cache.close()
+
+    restarted = ExplanationCache(db_path=str(tmp_path / "explanations.sqlite3"), clock=clock)
+    restarted.ensure_version("v1")
+
+    assert restarted.get("key") == "explanation"
+    assert restarted.stats()["disk_hits"] == 1
+    restarted.close()
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("key", "explanation")
+    clock.now += 61
+
+    assert cache.get("key") is None
+
+
+def test_size_based_eviction(cache, clock):
+    for index in range(4):
+        clock.now += 1
+        cache.set(f"key{index}", f"explanation{index}")
+
+    # The oldest entry was evicted from memory (size 2) and from disk (size 3).
+    assert cache.get("key0") is None
+    assert cache.get("key1") == "explanation1"
+    assert cache.get("key3") == "explanation3"
+
+
+def test_version_change_invalidates_entries(cache):
+    cache.set("key", "explanation")
+
+    cache.ensure_version("v2")
+
+    assert cache.get("key") is None
+
+
+def test_memory_only_cache(clock):
+    cache = ExplanationCache(db_path="", clock=clock)
+    cache.set("key", "explanation")
+
+    assert cache.get("key") == "explanation"
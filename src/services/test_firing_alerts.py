@@ -0,0 +1,73 @@
+from services.firing_alerts import (
+    ACKNOWLEDGED,
+    FIRING,
+    RESOLVED,
+    FiringAlertRegistry,
+    alert_state,
+)
+
+
+def test_alert_state_recognizes_status_spellings():
+    assert alert_state("Resolved") == RESOLVED
+    assert alert_state(" OK ") == RESOLVED
+    assert alert_state("acked") == ACKNOWLEDGED
+    assert alert_state("firing") == FIRING
+    assert alert_state("triggered") == FIRING
+    assert alert_state(None) == FIRING
+
+
+def test_resolution_matches_the_firing_alert_by_fingerprint(make_alert):
+    registry = FiringAlertRegistry()
+    registry.record(make_alert(), "a1", "explanation")
+
+    assert registry.resolve(make_alert(title="Other")) is None
+    entry = registry.resolve(make_alert(status="resolved"))
+
+    assert entry.alert_id == "a1"
+    assert registry.resolve(make_alert(status="resolved")) is None
+    assert registry.get("a1") is entry
+
+
+def test_started_alert_is_resolvable_before_its_explanation(make_alert):
+    registry = FiringAlertRegistry()
+    entry = registry.start(make_alert(), "a1")
+
+    assert registry.resolve(make_alert(status="resolved")) is entry
+    assert entry.investigating and entry.resolved
+    registry.complete(entry, "explanation")
+    assert registry.get("a1").explanation == "explanation"
+    assert registry.resolve(make_alert(status="resolved")) is None
+
+
+def test_failed_investigation_is_forgotten(make_alert):
+    registry = FiringAlertRegistry()
+    registry.fail(registry.start(make_alert(), "a1"))
+
+    assert registry.get("a1") is None
+    assert registry.resolve(make_alert(status="resolved")) is None
+
+
+def test_registry_is_bounded_and_expires_entries(make_alert, fake_clock):
+    clock = fake_clock()
+    registry = FiringAlertRegistry(max_entries=2, ttl_seconds=60, clock=clock)
+    for index in range(3):
+        registry.record(make_alert(title=f"Alert {index}"), f"a{index}", "explanation")
+
+    assert registry.get("a0") is None
+    assert registry.acknowledge(make_alert(title="Alert 1")).alert_id == "a1"
+
+    clock.now = 61
+    assert registry.get("a2") is None
+    assert registry.resolve(make_alert(title="Alert 2")) is None
+
+
+def test_duplicates_share_the_entry_of_an_unfinished_investigation(make_alert):
+    registry = FiringAlertRegistry()
+    entry = registry.start(make_alert(), "a1")
+
+    assert registry.start(make_alert(), "a2") is entry
+    assert registry.resolve(make_alert(status="resolved")) is entry
+    assert registry.get("a2").resolved
+    registry.complete(entry, "explanation")
+    # An alert firing again once the investigation finished gets a new entry.
+    assert registry.start(make_alert(), "a3") is not entry
@@ -0,0 +1,57 @@
+from services.graph_checkpoints import GraphCheckpointStore
+
+
+def put_checkpoint(store: GraphCheckpointStore, thread_id: str) -> None:
+    from langgraph.checkpoint.base import empty_checkpoint
+
+    store.saver.put({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}, empty_checkpoint(), {}, {})
+
+
+def has_checkpoint(store: GraphCheckpointStore, thread_id: str) -> bool:
+    return store.saver.get_tuple({"configurable": {"thread_id": thread_id}}) is not None
+
+
+def test_checkpoints_expire_after_the_ttl(tmp_path, fake_clock):
+    clock = fake_clock(1000.0)
+    store = GraphCheckpointStore(db_path=str(tmp_path / "checkpoints.sqlite3"), ttl_seconds=60, clock=clock)
+    store.touch("old")
+    put_checkpoint(store, "old")
+
+    clock.now += 30
+    store.touch("new")
+    put_checkpoint(store, "new")
+    clock.now += 31
+
+    assert store.prune() == 1
+    assert not has_checkpoint(store, "old")
+    assert has_checkpoint(store, "new")
+
+
+def test_checkpoints_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "checkpoints.sqlite3")
+    store = GraphCheckpointStore(db_path=db_path)
+    store.touch("a1")
+    put_checkpoint(store, "a1")
+    store.close()
+
+    reopened = GraphCheckpointStore(db_path=db_path)
+
+    assert has_checkpoint(reopened, "a1")
+    reopened.delete("a1")
+    assert not has_checkpoint(reopened, "a1")
+
+
+def test_only_failed_runs_can_be_claimed(tmp_path):
+    db_path = str(tmp_path / "checkpoints.sqlite3")
+    store = GraphCheckpointStore(db_path=db_path)
+    store.touch("a1")
+
+    assert store.status("a1") == "running"
+    assert not store.claim("a1")
+    store.fail("a1")
+    assert store.claim("a1")
+    assert not store.claim("a1")
+    store.close()
+
+    # A run still marked running when the store opens was interrupted.
+    assert GraphCheckpointStore(db_path=db_path).status("a1") == "failed"
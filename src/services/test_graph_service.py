@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.services.graph_service import GraphService
 from src.models.canonical import CanonicalAlert
 
@@ -15,7 +16,7 @@ def mock_llm():
     """Mocks the llm module functions."""
     with patch('src.services.graph_service.get_plan') as mock_get_plan, \
          patch('src.services.graph_service.generate_response') as mock_generate_response:
-        mock_get_plan.return_value = [{"role": "assistant", "content": "Test plan"}]
+        mock_get_plan.return_value = ([{"role": "assistant", "content": "Test plan"}], [])
         mock_generate_response.return_value = "Test response"
         yield mock_get_plan, mock_generate_response
 
@@ -46,7 +47,279 @@ def test_run(graph_service, mock_vector_db_service, mock_llm):
     response = graph_service.run(alert)
 
     mock_get_plan.assert_called_once_with(alert)
-    mock_vector_db_service.query_documents.assert_called_once()
+    # Two documents are fewer than the planner's minimum, so every scope is
+    # searched, starting with the alert's service and environment.
+    scopes = [call.kwargs.get("where") for call in mock_vector_db_service.query_documents.call_args_list]
+    assert scopes[0] == {
+        "$and": [
+            {"$or": [{"service": "Test Service"}, {"tag:test service": True}]},
+            {"tag:test env": True},
+        ]
+    }
+    assert scopes[-1] is None
+    # The same documents found in every scope are passed on once.
+    assert mock_generate_response.call_args.args[1] == ["doc1", "doc2"]
+
+    assert response == "Test response"
+
+def test_run_uses_explanation_cache(mock_vector_db_service, mock_llm):
+    """Tests that a cached explanation skips the workflow."""
+    from src.services.explanation_cache import ExplanationCache
+
+    mock_get_plan, mock_generate_response = mock_llm
+    mock_vector_db_service.get_collection_version.return_value = "v1"
+    graph_service = GraphService(
+        vector_db_service=mock_vector_db_service,
+        explanation_cache=ExplanationCache(db_path=""),
+    )
+    alert = CanonicalAlert(
+        title="Test Alert",
+        service="Test Service",
+        severity="High",
+        environment="Test Env",
+        status="firing",
+        timestamp="2025-07-10T10:00:00Z",
+        details={},
+        link_to_source="http://example.com",
+        raw_payload={}
+    )
+
+    first = graph_service.run(alert)
+    second = graph_service.run(alert)
+
+    assert first == second == "Test response"
+    mock_get_plan.assert_called_once_with(alert)
     mock_generate_response.assert_called_once()
+    assert graph_service.explanation_cache.stats()["hits"] == 1
+
+
+def test_arun(graph_service, mock_vector_db_service):
+    """Tests that arun executes the coroutine version of every node."""
+    alert = CanonicalAlert(
+        title="Test Alert",
+        service="Test Service",
+        severity="High",
+        environment="Test Env",
+        status="firing",
+        timestamp="2025-07-10T10:00:00Z",
+        details={},
+        link_to_source="http://example.com",
+        raw_payload={}
+    )
+
+    with patch('src.services.graph_service.aget_plan', new_callable=AsyncMock) as mock_aget_plan, \
+         patch('src.services.graph_service.agenerate_response', new_callable=AsyncMock) as mock_agenerate_response, \
+         patch('src.services.graph_service.get_plan') as mock_get_plan:
+        mock_aget_plan.return_value = ([{"role": "assistant", "content": "Test plan"}], [])
+        mock_agenerate_response.return_value = "Async response"
+
+        response = asyncio.run(graph_service.arun(alert))
+
+    assert response == "Async response"
+    mock_aget_plan.assert_awaited_once_with(alert)
+    mock_get_plan.assert_not_called()
+    mock_vector_db_service.query_documents.assert_called()
+    mock_agenerate_response.assert_awaited_once()
+
+
+def test_run_streams_response_tokens(mock_vector_db_service, mock_llm):
+    """Tests that the response is published token by token when an alert id is given."""
+    _, mock_generate_response = mock_llm
+    mock_generate_response.return_value = iter(["Test ", "response"])
+    mock_stream_broker = MagicMock()
+    graph_service = GraphService(
+        vector_db_service=mock_vector_db_service, stream_broker=mock_stream_broker
+    )
+    alert = CanonicalAlert(
+        title="Test Alert",
+        service="Test Service",
+        severity="High",
+        environment="Test Env",
+        status="firing",
+        timestamp="2025-07-10T10:00:00Z",
+        details={},
+        link_to_source="http://example.com",
+        raw_payload={}
+    )
+
+    response = graph_service.run(alert, alert_id="a1")
+
+    assert response == "Test response"
+    assert mock_generate_response.call_args[1] == {"stream": True}
+    assert [c.args for c in mock_stream_broker.publish.call_args_list] == [("a1", "Test "), ("a1", "response")]
+
+
+def tool_plan(texts):
+    from src.services.retrieval_planner import RetrievedDocument
+
+    documents = [RetrievedDocument(id=text, text=text) for text in texts]
+    plan = [
+        {"role": "assistant", "content": None},
+        {"role": "tool", "name": "search_knowledge_base", "tool_call_id": "call_1", "content": str(texts)},
+        {"role": "assistant", "content": "Test plan"},
+    ]
+    return plan, documents
+
+
+def test_run_reuses_documents_retrieved_by_the_plan(mock_vector_db_service, mock_llm, make_alert):
+    """Tests that retrieve_context is skipped when the tool calls found enough documents."""
+    mock_get_plan, mock_generate_response = mock_llm
+    mock_get_plan.return_value = tool_plan(["doc1", "doc2"])
+    graph_service = GraphService(vector_db_service=mock_vector_db_service, reuse_min_documents=2)
+
+    graph_service.run(make_alert())
+
+    mock_vector_db_service.query_documents.assert_not_called()
+    alert, context_documents, plan = mock_generate_response.call_args.args
+    assert context_documents == ["doc1", "doc2"]
+    # The documents are in the prompt once: the tool result points to the context.
+    assert "doc1" not in plan
+
+
+def test_run_merges_retrieved_documents_by_id(mock_vector_db_service, mock_llm, make_alert):
+    """Tests that too few tool documents are topped up by retrieve_context without duplicates."""
+    mock_get_plan, mock_generate_response = mock_llm
+    mock_get_plan.return_value = tool_plan(["doc2"])
+    graph_service = GraphService(vector_db_service=mock_vector_db_service, reuse_min_documents=2)
+
+    graph_service.run(make_alert())
+
+    query_text = mock_vector_db_service.query_documents.call_args.kwargs["query_texts"][0]
+    assert query_text == "Test Alert test-service Test plan"
+    assert mock_generate_response.call_args.args[1] == ["doc2", "doc1"]
+
+
+def test_run_resumes_from_the_last_completed_node(mock_vector_db_service, mock_llm, make_alert):
+    """Tests that a retry after a failed response generation plans and retrieves only once."""
+    from src.services.graph_checkpoints import GraphCheckpointStore
+
+    mock_get_plan, mock_generate_response = mock_llm
+    mock_generate_response.side_effect = [TimeoutError("LLM timed out"), "Test response"]
+    graph_service = GraphService(
+        vector_db_service=mock_vector_db_service, checkpoint_store=GraphCheckpointStore(db_path="")
+    )
+    alert = make_alert()
+
+    with pytest.raises(TimeoutError):
+        graph_service.run(alert, alert_id="a1")
+    assert graph_service.pending_alert("a1") == alert
+    queries = mock_vector_db_service.query_documents.call_count
+
+    response = graph_service.run(alert, alert_id="a1")
+
+    assert response == "Test response"
+    mock_get_plan.assert_called_once()
+    assert mock_vector_db_service.query_documents.call_count == queries
+    assert mock_generate_response.call_count == 2
+    # Finished runs drop their checkpoints; a later run starts afresh.
+    assert graph_service.pending_alert("a1") is None
+
+
+def test_running_investigation_cannot_be_retried(mock_vector_db_service, mock_llm, make_alert):
+    """Tests that only a failed run is offered for a retry, and only once."""
+    from src.services.graph_checkpoints import GraphCheckpointStore
+
+    _, mock_generate_response = mock_llm
+    graph_service = GraphService(
+        vector_db_service=mock_vector_db_service, checkpoint_store=GraphCheckpointStore(db_path="")
+    )
+    alert = make_alert()
+    while_running = []
+
+    def generate_response(*args, **kwargs):
+        while_running.append((graph_service.run_active("a1"), graph_service.claim_retry("a1")))
+        raise TimeoutError("LLM timed out")
+
+    mock_generate_response.side_effect = generate_response
+
+    with pytest.raises(TimeoutError):
+        graph_service.run(alert, alert_id="a1")
+
+    assert while_running == [(True, None)]
+    assert not graph_service.run_active("a1")
+    assert graph_service.claim_retry("a1") == alert
+    assert graph_service.run_active("a1")
+    assert graph_service.claim_retry("a1") is None
+
+
+def test_arun_resumes_from_the_last_completed_node(mock_vector_db_service, make_alert):
+    """Tests that arun continues a checkpointed run as well."""
+    from src.services.graph_checkpoints import GraphCheckpointStore
+
+    graph_service = GraphService(
+        vector_db_service=mock_vector_db_service, checkpoint_store=GraphCheckpointStore(db_path="")
+    )
+    alert = make_alert()
+
+    with patch('src.services.graph_service.aget_plan', new_callable=AsyncMock) as mock_aget_plan, \
+         patch('src.services.graph_service.agenerate_response', new_callable=AsyncMock) as mock_agenerate_response:
+        mock_aget_plan.return_value = ([{"role": "assistant", "content": "Test plan"}], [])
+        mock_agenerate_response.side_effect = [TimeoutError("LLM timed out"), "Async response"]
+
+        with pytest.raises(TimeoutError):
+            asyncio.run(graph_service.arun(alert, alert_id="a1"))
+        response = asyncio.run(graph_service.arun(alert, alert_id="a1"))
+
+    assert response == "Async response"
+    mock_aget_plan.assert_awaited_once()
+
+
+def similar_incident():
+    from services.incident_history import SimilarIncident
+
+    return SimilarIncident(
+        alert_id="a0", title="Test Alert", similarity=0.95, explanation="Past report",
+        plan_summary="", fired_at="2025-07-09T10:00:00Z", investigated_at="2025-07-09T10:01:00Z",
+    )
+
+
+def test_run_answers_from_a_similar_incident(mock_vector_db_service, mock_llm, make_alert):
+    """Tests that a similar past incident skips planning and retrieval for one short LLM call."""
+    mock_get_plan, mock_generate_response = mock_llm
+    mock_history = MagicMock()
+    mock_history.find_similar.return_value = similar_incident()
+    graph_service = GraphService(vector_db_service=mock_vector_db_service, incident_history=mock_history)
+    alert = make_alert()
+
+    with patch('src.services.graph_service.generate_similar_incident_response') as mock_reuse:
+        mock_reuse.return_value = "Short report"
+        response = graph_service.run(alert, alert_id="a1")
+
+    assert response == "Short report"
+    mock_reuse.assert_called_once_with(alert, mock_history.find_similar.return_value)
+    mock_get_plan.assert_not_called()
+    mock_generate_response.assert_not_called()
+    mock_vector_db_service.query_documents.assert_not_called()
+    # Answers derived from the history are not added to it.
+    mock_history.record.assert_not_called()
+
+
+def test_run_quotes_a_similar_incident_without_the_llm(mock_vector_db_service, mock_llm, make_alert):
+    """Tests that reuse can skip the LLM entirely."""
+    mock_history = MagicMock()
+    mock_history.find_similar.return_value = similar_incident()
+    graph_service = GraphService(
+        vector_db_service=mock_vector_db_service, incident_history=mock_history, incident_reuse_llm=False
+    )
+
+    with patch('src.services.graph_service.generate_similar_incident_response') as mock_reuse:
+        response = graph_service.run(make_alert())
+
+    mock_reuse.assert_not_called()
+    assert "95% similar" in response
+    assert response.endswith("Past report")
+
+
+def test_run_records_full_investigations(mock_vector_db_service, mock_llm, make_alert):
+    """Tests that an investigation without a similar incident runs in full and is recorded."""
+    mock_get_plan, _ = mock_llm
+    mock_history = MagicMock()
+    mock_history.find_similar.return_value = None
+    graph_service = GraphService(vector_db_service=mock_vector_db_service, incident_history=mock_history)
+    alert = make_alert()
+
+    response = graph_service.run(alert, alert_id="a1")
 
-    assert response == "Test response"
\ No newline at end of file
+    mock_get_plan.assert_called_once()
+    mock_history.record.assert_called_once_with(alert, "a1", "assistant: Test plan", "Test response")
+    assert response == "Test response"
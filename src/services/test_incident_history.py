@@ -0,0 +1,53 @@
+import pytest
+
+from benchmarks.stubs import HashEmbeddingFunction
+from models.canonical import AlertDetails
+from services.incident_history import IncidentHistory, incident_text, similar_incident_notice
+from services.vector_db_service import VectorDBService
+
+
+def cpu_usage(value: str = "91%") -> AlertDetails:
+    return AlertDetails(metric="cpu", current_value=value, threshold="80%")
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = VectorDBService(
+        db_path=str(tmp_path / "chroma"), collection_name="knowledge-base",
+        embedding_cache_path="", embedding_function=HashEmbeddingFunction(),
+    )
+    yield service
+    service.close()
+
+
+def test_incident_text_leaves_out_volatile_values(make_alert):
+    assert incident_text(make_alert(details=cpu_usage("91%"))) == incident_text(make_alert(details=cpu_usage("97%")))
+    assert "cpu 80%" in incident_text(make_alert(details=cpu_usage()))
+
+
+def test_recurring_incident_is_found_until_it_is_too_old(service, make_alert, fake_clock):
+    clock = fake_clock(1_750_000_000.0)
+    history = IncidentHistory(service, similarity_threshold=0.9, max_age_seconds=3600, clock=clock)
+    history.record(make_alert(details=cpu_usage()), "a1", "assistant: check the CPU", "Runaway cron job.")
+
+    incident = history.find_similar(make_alert(details=cpu_usage("97%")))
+
+    assert incident.alert_id == "a1"
+    assert incident.similarity == pytest.approx(1.0)
+    assert incident.explanation == "Runaway cron job."
+    assert incident.plan_summary == "assistant: check the CPU"
+    assert "Runaway cron job." in similar_incident_notice(incident)
+
+    assert history.find_similar(make_alert(title="Disk almost full", details=cpu_usage())) is None
+    assert history.find_similar(make_alert(service="billing", details=cpu_usage())) is None
+    assert history.find_similar(make_alert(environment="staging", details=cpu_usage())) is None
+    clock.now += 3601
+    assert history.find_similar(make_alert(details=cpu_usage())) is None
+
+
+def test_empty_history_and_disabled_threshold(service, make_alert):
+    assert IncidentHistory(service).find_similar(make_alert(details=cpu_usage())) is None
+
+    history = IncidentHistory(service, similarity_threshold=1.1)
+    history.record(make_alert(details=cpu_usage()), "a1", "", "Runaway cron job.")
+    assert history.find_similar(make_alert(details=cpu_usage())) is None
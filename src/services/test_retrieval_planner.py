@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+
+from services.retrieval_planner import RetrievalPlanner
+
+
+def make_service(*responses):
+    service = MagicMock()
+    service.query_documents.side_effect = list(responses)
+    return service
+
+
+def test_scopes_are_ordered_narrowest_first(make_alert):
+    scopes = RetrievalPlanner().scopes(make_alert(owner_team="identity"))
+
+    assert [scope.name for scope in scopes] == ["service+environment", "service", "team", "global"]
+    assert scopes[1].where == {"$or": [{"service": "test-service"}, {"tag:test-service": True}]}
+    assert scopes[2].where == {"owner_team": "identity"}
+    assert scopes[3].where is None
+
+
+def test_scopes_without_alert_search_everything():
+    scopes = RetrievalPlanner().scopes(None)
+
+    assert [scope.name for scope in scopes] == ["global"]
+
+
+def test_search_stops_at_first_scope_with_enough_results(make_alert):
+    service = make_service({"ids": [["a", "b", "c"]], "documents": [["A", "B", "C"]]})
+
+    results = RetrievalPlanner(min_results=3, n_results=5).search(service, ["cpu"], make_alert())
+
+    assert results == [["A", "B", "C"]]
+    service.query_documents.assert_called_once()
+    assert "$and" in service.query_documents.call_args.kwargs["where"]
+
+
+def test_search_widens_and_deduplicates(make_alert):
+    service = make_service(
+        {"ids": [["a"]], "documents": [["A"]]},
+        {"ids": [["a", "b"]], "documents": [["A", "B"]]},
+        {"ids": [["b", "c", "d"]], "documents": [["B", "C", "D"]]},
+    )
+    planner = RetrievalPlanner(min_results=3, n_results=3)
+
+    results = planner.search(service, ["cpu"], make_alert(owner_team=None))
+
+    assert results == [["A", "B", "C"]]
+    wheres = [call.kwargs.get("where") for call in service.query_documents.call_args_list]
+    assert wheres[1] == {"$or": [{"service": "test-service"}, {"tag:test-service": True}]}
+    assert wheres[2] is None
+
+
+def test_search_only_widens_queries_that_lack_results(make_alert):
+    service = make_service(
+        {"ids": [["a", "b"], ["c"]], "documents": [["A", "B"], ["C"]]},
+        {"ids": [["d"]], "documents": [["D"]]},
+    )
+    planner = RetrievalPlanner(min_results=2, n_results=5)
+
+    results = planner.search(service, ["cpu", "disk"], make_alert(environment="", owner_team=None))
+
+    assert results == [["A", "B"], ["C", "D"]]
+    assert service.query_documents.call_args_list[1].kwargs["query_texts"] == ["disk"]
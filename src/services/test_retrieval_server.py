@@ -0,0 +1,107 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from benchmarks.stubs import HashEmbeddingFunction
+from models.knowledge_base import KnowledgeBaseArticle
+from services.retrieval_client import RetrievalClient, parse_server_url
+from services.retrieval_server import QueryBatcher, RetrievalServer
+from services.vector_db_service import VectorDBService
+
+
+def make_articles():
+    return [
+        KnowledgeBaseArticle(id=str(index), source="test", title=f"Runbook {index}", content=content)
+        for index, content in enumerate(["high cpu usage on auth-api", "disk almost full", "certificate expiry"])
+    ]
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = VectorDBService(
+        db_path=str(tmp_path / "chroma"), collection_name="retrieval-test",
+        embedding_cache_path="", embedding_function=HashEmbeddingFunction(),
+    )
+    yield service
+    service.close()
+
+
+@pytest.mark.parametrize("transport", ["unix", "http"])
+def test_client_queries_and_writes_through_the_server(service, tmp_path, transport):
+    url = f"unix://{tmp_path}/retrieval.sock" if transport == "unix" else "http://127.0.0.1:0"
+    server = RetrievalServer(service, url).start()
+    client = RetrievalClient(server.address)
+    try:
+        client.warm_up()
+        stats = client.bulk_upsert(make_articles(), batch_size=2)
+        version = client.get_collection_version()
+        results = client.query_documents(["disk almost full"], n_results=1)
+        client.delete_articles(["1"])
+        after_delete = client.query_documents(["disk almost full"], n_results=3)
+    finally:
+        client.close()
+        server.stop()
+
+    assert stats["documents"] == 3
+    # The upsert was written, so the knowledge base has a version.
+    assert version
+    assert results["ids"] == [["1"]]
+    assert results["documents"] == [["disk almost full"]]
+    assert "1" not in after_delete["ids"][0]
+
+
+def test_batcher_embeds_concurrent_queries_together():
+    service = MagicMock()
+    service.embed_queries.side_effect = lambda texts: [[float(index)] for index, _ in enumerate(texts)]
+
+    def query_documents(query_texts, n_results, where, query_embeddings):
+        return {"ids": [[f"{text}-{where}"] for text in query_texts], "distances": [[0.1]] * len(query_texts), "included": ["distances"]}
+
+    service.query_documents.side_effect = query_documents
+    batcher = QueryBatcher(service, window_seconds=0.2, max_batch=64)
+    results = {}
+
+    def query(text, where):
+        results[text] = batcher.query([text], n_results=1, where=where)
+
+    threads = [
+        threading.Thread(target=query, args=(text, where))
+        for text, where in [("a", None), ("b", None), ("c", {"service": "x"})]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    service.embed_queries.assert_called_once()
+    assert sorted(service.embed_queries.call_args.args[0]) == ["a", "b", "c"]
+    # Queries with the same filter share a Chroma query.
+    assert service.query_documents.call_count == 2
+    assert results["a"]["ids"] == [["a-None"]]
+    assert results["c"]["ids"] == [["c-{'service': 'x'}"]]
+    assert results["b"]["included"] == ["distances"]
+    assert batcher.stats()["queries_per_batch"] == 3
+
+
+def test_parse_server_url():
+    assert parse_server_url("unix:///run/retrieval.sock") == ("/run/retrieval.sock", "http://retrieval-server")
+    assert parse_server_url("http://127.0.0.1:8765/") == (None, "http://127.0.0.1:8765")
+    with pytest.raises(ValueError):
+        parse_server_url("tcp://127.0.0.1:8765")
+
+
+def test_client_records_and_queries_incidents(service, tmp_path):
+    server = RetrievalServer(service, f"unix://{tmp_path}/retrieval.sock").start()
+    client = RetrievalClient(server.address)
+    try:
+        client.add_incident("a1", "High CPU usage on auth-api", {"service": "auth-api", "explanation": "Cron job."})
+        results = client.query_incidents("High CPU usage on auth-api", where={"service": "auth-api"})
+    finally:
+        client.close()
+        server.stop()
+
+    assert results["ids"] == [["a1"]]
+    assert results["metadatas"][0][0]["explanation"] == "Cron job."
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.stream_broker import ExplanationStreamBroker
+
+
+async def collect(broker: ExplanationStreamBroker, alert_id: str) -> list:
+    return [event async for event in broker.subscribe(alert_id)]
+
+
+def test_subscriber_receives_replay_and_live_tokens():
+    broker = ExplanationStreamBroker()
+    broker.open("a1")
+    broker.publish("a1", "Disk ")
+
+    async def scenario():
+        subscriber = asyncio.create_task(collect(broker, "a1"))
+        await asyncio.sleep(0.01)
+
+        def worker():
+            broker.publish("a1", "is full.")
+            broker.close("a1", "Disk is full.")
+
+        await asyncio.to_thread(worker)
+        return await asyncio.wait_for(subscriber, timeout=5)
+
+    events = asyncio.run(scenario())
+
+    assert events == [
+        ("token", "Disk "),
+        ("token", "is full."),
+        ("done", "Disk is full."),
+    ]
+
+
+def test_close_without_tokens_sends_full_text():
+    broker = ExplanationStreamBroker()
+    broker.open("a1")
+    broker.close("a1", "Cached explanation.")
+
+    events = asyncio.run(collect(broker, "a1"))
+
+    assert events == [("token", "Cached explanation."), ("done", "Cached explanation.")]
+
+
+def test_failed_stream_ends_with_error():
+    broker = ExplanationStreamBroker()
+    broker.open("a1")
+    broker.fail("a1", "LLM timeout")
+
+    assert asyncio.run(collect(broker, "a1")) == [("error", "LLM timeout")]
+
+
+def test_coalesced_alert_streams_leader_explanation():
+    broker = ExplanationStreamBroker()
+    broker.open("leader")
+    broker.open("follower")
+
+    async def scenario():
+        subscriber = asyncio.create_task(collect(broker, "follower"))
+        await asyncio.sleep(0.01)
+        broker.alias("follower", "leader")
+        broker.publish("leader", "Shared ")
+        broker.close("leader", "Shared explanation")
+        return await asyncio.wait_for(subscriber, timeout=5)
+
+    events = asyncio.run(scenario())
+
+    assert events == [("token", "Shared "), ("done", "Shared explanation")]
+    assert broker.has("follower")
+
+
+def test_unknown_and_expired_channels(fake_clock):
+    clock = fake_clock()
+    broker = ExplanationStreamBroker(retention_seconds=60, clock=clock)
+    broker.open("a1")
+    broker.close("a1", "done")
+
+    assert broker.has("a1")
+    with pytest.raises(KeyError):
+        asyncio.run(collect(broker, "unknown"))
+
+    clock.now = 61
+    broker.open("a2")
+    assert not broker.has("a1")
+
+
+def test_reopening_a_failed_stream_starts_afresh():
+    broker = ExplanationStreamBroker()
+    broker.open("a1")
+    broker.publish("a1", "Disk ")
+    broker.fail("a1", "LLM timed out")
+
+    broker.open("a1")
+    broker.close("a1", "Disk is full.")
+
+    assert asyncio.run(collect(broker, "a1")) == [
+        ("token", "Disk is full."),
+        ("done", "Disk is full."),
+    ]
@@ -0,0 +1,32 @@
+import datetime
+
+from src.models.knowledge_base import SyncCheckpoint
+from src.services.sync_checkpoint import SyncCheckpointStore
+
+
+def test_load_returns_empty_checkpoint_for_unknown_source(tmp_path):
+    store = SyncCheckpointStore(str(tmp_path))
+
+    checkpoint = store.load("confluence-OPS")
+
+    assert checkpoint.source_key == "confluence-OPS"
+    assert checkpoint.last_sync is None
+    assert checkpoint.versions == {}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = SyncCheckpointStore(str(tmp_path / "sync"))
+    last_sync = datetime.datetime(2025, 7, 9, 12, 0, tzinfo=datetime.timezone.utc)
+    store.save(SyncCheckpoint(source_key="confluence-OPS", last_sync=last_sync, versions={"1": 2}))
+
+    checkpoint = store.load("confluence-OPS")
+
+    assert checkpoint.last_sync == last_sync
+    assert checkpoint.versions == {"1": 2}
+
+
+def test_unreadable_checkpoint_is_ignored(tmp_path):
+    (tmp_path / "confluence-OPS.json").write_text("not json")
+    store = SyncCheckpointStore(str(tmp_path))
+
+    assert store.load("confluence-OPS").versions == {}
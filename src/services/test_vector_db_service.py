@@ -1,14 +1,21 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from src.services.vector_db_service import VectorDBService
+from src.services import vector_db_service as vector_db_module
+from src.services.vector_db_service import VectorDBService, get_vector_db_service, to_chroma_metadata
 from src.models.knowledge_base import KnowledgeBaseArticle
 
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """Keeps the default embedding cache directory out of the working tree."""
+    monkeypatch.chdir(tmp_path)
+
 @pytest.fixture
 def mock_chromadb_client():
     """Mocks the chromadb.PersistentClient and its methods."""
     with patch('chromadb.PersistentClient') as mock_client_constructor:
         mock_client_instance = MagicMock()
         mock_collection = MagicMock()
+        mock_collection.metadata = {"embedding_model": "all-MiniLM-L6-v2"}
         mock_client_instance.get_or_create_collection.return_value = mock_collection
         mock_client_constructor.return_value = mock_client_instance
         yield mock_client_constructor, mock_client_instance, mock_collection
@@ -68,7 +75,8 @@ def test_add_documents_upserts_correctly(vector_db_service):
     expected_ids = ["1", "2"]
     expected_documents = ["This is the content of article 1.", "This is the content of article 2."]
     expected_metadatas = [
-        article.model_dump(exclude={"id", "content"}) for article in articles
+        {"source": "Confluence", "url": "http://example.com/1", "title": "Test Article 1"},
+        {"source": "Confluence", "url": "http://example.com/2", "title": "Test Article 2"},
     ]
 
     # Verify that the collection's upsert method was called correctly
@@ -78,6 +86,25 @@ def test_add_documents_upserts_correctly(vector_db_service):
         metadatas=expected_metadatas
     )
 
+def test_add_documents_bumps_collection_version(vector_db_service):
+    """Tests that writing documents changes the version stored in the collection metadata."""
+    vector_db_service.collection.metadata = {"hnsw:space": "l2"}
+    articles = [
+        KnowledgeBaseArticle(id="1", source="Confluence", title="Test", content="content")
+    ]
+
+    vector_db_service.add_documents(articles)
+
+    metadata = vector_db_service.collection.modify.call_args[1]["metadata"]
+    assert metadata["kb_version"]
+    assert "hnsw:space" not in metadata
+
+def test_get_collection_version(vector_db_service):
+    """Tests that the version is read from the collection metadata."""
+    vector_db_service.client.get_collection.return_value.metadata = {"kb_version": "123"}
+
+    assert vector_db_service.get_collection_version() == "123"
+
 def test_add_documents_with_no_articles(vector_db_service):
     """Tests that add_documents handles an empty list of articles gracefully."""
     vector_db_service.add_documents([])
@@ -103,4 +130,124 @@ def test_initialization_failure(db_path, collection_name):
     """Tests that initialization raises an exception if dependencies fail."""
     with patch('chromadb.PersistentClient', side_effect=Exception("Connection failed")):
         with pytest.raises(Exception, match="Connection failed"):
-            VectorDBService()
\ No newline at end of file
+            VectorDBService()
+
+def test_get_vector_db_service_is_shared(mock_chromadb_client, mock_embedding_function, monkeypatch):
+    """Tests that the shared service is created once and reused."""
+    mock_client_constructor, _, _ = mock_chromadb_client
+    monkeypatch.setattr(vector_db_module, "_shared_service", None)
+
+    first = get_vector_db_service()
+    second = get_vector_db_service()
+
+    assert first is second
+    mock_client_constructor.assert_called_once()
+    mock_embedding_function.assert_called_once()
+
+def test_warm_up_runs_embedding(vector_db_service):
+    """Tests that warm_up loads the embedding model and the index with dummy inputs."""
+    vector_db_service.warm_up()
+
+    vector_db_service.embedding_function.assert_called_once_with(["warm-up"])
+    vector_db_service.collection.query.assert_called_once_with(query_texts=["warm-up"], n_results=1)
+
+def test_collection_embeds_through_cache(mock_chromadb_client, mock_embedding_function):
+    """Tests that the collection uses the caching wrapper around the model."""
+    _, mock_client_instance, _ = mock_chromadb_client
+
+    service = VectorDBService(embedding_cache_path="")
+
+    embedding_function = mock_client_instance.get_or_create_collection.call_args[1]['embedding_function']
+    assert embedding_function is service.embedding_cache
+    assert service.embedding_cache.embedding_function is service.embedding_function
+    assert service.embedding_cache.store is None
+
+def test_delete_documents(vector_db_service):
+    """Tests that delete_documents removes the ids and bumps the version."""
+    vector_db_service.collection.metadata = {}
+
+    vector_db_service.delete_documents(["1", "2"])
+
+    vector_db_service.collection.delete.assert_called_once_with(ids=["1", "2"])
+    vector_db_service.collection.modify.assert_called_once()
+
+def test_to_chroma_metadata_flattens_and_serializes():
+    """Tests that article fields are converted into values Chroma accepts."""
+    import datetime
+    article = KnowledgeBaseArticle(
+        id="1::chunk-0",
+        source="Confluence",
+        title="Test",
+        content="content",
+        tags=["database"],
+        last_updated=datetime.datetime(2025, 7, 8, 10, 0, tzinfo=datetime.timezone.utc),
+        metadata={"parent_id": "1", "chunk_index": 0, "nested": {"a": 1}},
+    )
+
+    metadata = to_chroma_metadata(article)
+
+    assert metadata == {
+        "source": "Confluence",
+        "title": "Test",
+        "tags": ["database"],
+        "tag:database": True,
+        "last_updated": "2025-07-08T10:00:00Z",
+        "parent_id": "1",
+        "chunk_index": 0,
+    }
+
+def test_delete_articles_removes_chunks_by_parent(vector_db_service):
+    """Tests that delete_articles deletes every chunk of the given articles."""
+    vector_db_service.collection.metadata = {}
+
+    vector_db_service.delete_articles(["1"])
+
+    vector_db_service.collection.delete.assert_any_call(where={"parent_id": {"$in": ["1"]}})
+
+def test_bulk_upsert_batches_and_reports_throughput(mock_chromadb_client, mock_embedding_function):
+    """Tests that bulk_upsert writes precomputed embeddings in bounded batches."""
+    from benchmarks.stubs import HashEmbeddingFunction
+    service = VectorDBService(embedding_cache_path="", embedding_workers=1)
+    service.embedding_cache.embedding_function = HashEmbeddingFunction(dimension=4)
+    service.collection.metadata = {}
+    articles = (
+        KnowledgeBaseArticle(id=str(i), source="Confluence", title="T", content=f"content {i % 3}")
+        for i in range(5)
+    )
+
+    stats = service.bulk_upsert(articles, batch_size=2)
+
+    upserts = service.collection.upsert.call_args_list
+    assert [call[1]["ids"] for call in upserts] == [["0", "1"], ["2", "3"], ["4"]]
+    assert len(upserts[0][1]["embeddings"]) == 2
+    assert stats["documents"] == 5
+    # Only the three distinct texts need to be embedded.
+    assert stats["embedded"] == 3
+    assert stats["documents_per_second"] > 0
+    service.collection.modify.assert_called_once()
+
+def test_query_documents_with_filter(vector_db_service):
+    """Tests that a metadata filter is passed to the collection query."""
+    vector_db_service.query_documents(["cpu"], n_results=2, where={"service": "auth-api"})
+
+    vector_db_service.collection.query.assert_called_once_with(
+        query_texts=["cpu"], n_results=2, where={"service": "auth-api"}
+    )
+
+def test_new_collection_records_embedding_model(mock_chromadb_client, mock_embedding_function):
+    """Tests that the embedding model is stored with a collection that has none."""
+    _, _, mock_collection = mock_chromadb_client
+    mock_collection.metadata = {}
+
+    VectorDBService(embedding_cache_path="")
+
+    metadata = mock_collection.modify.call_args[1]["metadata"]
+    assert metadata["embedding_model"] == "all-MiniLM-L6-v2"
+
+def test_collection_of_another_embedding_model_is_refused(mock_chromadb_client, mock_embedding_function):
+    """Tests that a collection embedded by another backend is not opened."""
+    _, _, mock_collection = mock_chromadb_client
+    mock_collection.metadata = {"embedding_model": "all-MiniLM-L6-v2:onnx-int8"}
+
+    with pytest.raises(ValueError, match="onnx-int8"):
+        VectorDBService(embedding_cache_path="")
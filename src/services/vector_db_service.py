@@ -1,15 +1,76 @@
+import itertools
 import logging
-from typing import List
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
 
 import chromadb
-from chromadb.utils import embedding_functions
+from chromadb.api.types import EmbeddingFunction
 
-from core.config import DB_PATH, DB_COLLECTION_NAME
+from core.config import (
+    DB_COLLECTION_NAME,
+    DB_PATH,
+    EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_WORKERS,
+    INCIDENT_HISTORY_COLLECTION_NAME,
+    RETRIEVAL_SERVER_URL,
+    UPSERT_BATCH_SIZE,
+)
+from core.telemetry import VECTOR_QUERY_DURATION, timed
 from models.knowledge_base import KnowledgeBaseArticle
+from services.embedding_backends import (
+    create_embedding_function,
+    embedding_function_factory,
+    embedding_namespace,
+)
+from services.embedding_cache import CachedEmbeddingFunction, EmbeddingStore
+from services.embedding_pool import EmbeddingPool
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Collection metadata key holding the knowledge base version. It changes every
+# time documents are written, so derived data (e.g. cached explanations) can
+# detect a re-ingestion.
+VERSION_METADATA_KEY = "kb_version"
+
+# Collection metadata key naming the model the documents were embedded with.
+# Chroma cannot record the model behind the caching wrapper, so the service
+# keeps track of it to refuse queries with vectors from another model.
+EMBEDDING_METADATA_KEY = "embedding_model"
+
+# Metadata key linking a chunk to the article it was cut from.
+PARENT_ID_METADATA_KEY = "parent_id"
+
+# Prefix of the boolean metadata keys that flatten an article's tags.
+TAG_METADATA_PREFIX = "tag:"
+
+
+def tag_metadata_key(tag: str) -> str:
+    """Returns the metadata key marking an article with `tag`, e.g. `tag:auth-api`."""
+    return f"{TAG_METADATA_PREFIX}{tag.strip().lower()}"
+
+
+def to_chroma_metadata(article: KnowledgeBaseArticle) -> Dict[str, Any]:
+    """
+    Converts an article's fields into metadata Chroma accepts.
+
+    Entries of `article.metadata` become top-level keys so they can be filtered
+    on, and every tag is also stored as a `tag:<tag>` flag so that `where`
+    filters can match single tags. URLs and datetimes are stored as strings;
+    empty values are left out.
+    """
+    metadata = article.model_dump(mode="json", exclude={"id", "content", "metadata"})
+    metadata.update(article.metadata)
+    metadata.update({tag_metadata_key(tag): True for tag in article.tags if tag.strip()})
+    return {
+        key: value
+        for key, value in metadata.items()
+        if isinstance(value, (str, int, float, bool)) or (isinstance(value, list) and value)
+    }
+
 
 class VectorDBService:
     """
@@ -19,24 +80,62 @@ class VectorDBService:
     adding, upserting, and querying.
     """
 
-    def __init__(self, db_path: str = DB_PATH, collection_name: str = DB_COLLECTION_NAME):
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        collection_name: str = DB_COLLECTION_NAME,
+        embedding_cache_path: Optional[str] = EMBEDDING_CACHE_PATH,
+        embedding_workers: int = EMBEDDING_WORKERS,
+        embedding_backend: str = EMBEDDING_BACKEND,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        incident_collection_name: str = INCIDENT_HISTORY_COLLECTION_NAME,
+    ):
         """
         Initializes the VectorDBService.
 
         Args:
             db_path (str): The file path to the persistent ChromaDB database.
             collection_name (str): The name of the collection to interact with.
+            embedding_cache_path (Optional[str]): Directory of the persistent embedding
+                cache. An empty value keeps cached embeddings in memory only.
+            embedding_workers (int): Worker processes used by `bulk_upsert`
+                (0 = one per CPU core, 1 = embed in-process).
+            embedding_backend (str): The model computing embeddings, a key of
+                `EMBEDDING_BACKENDS`. A collection keeps the backend it was
+                created with.
+            embedding_function (Optional[EmbeddingFunction]): A loaded model to use
+                instead of the backend's, e.g. an offline stand-in. It always runs
+                in-process.
+            incident_collection_name (str): The collection holding past
+                investigations, created on first use.
         """
+        self.collection_name = collection_name
+        self.incident_collection_name = incident_collection_name
+        self._incident_collection = None
+        self._incident_lock = threading.Lock()
+        self.embedding_backend = embedding_backend
+        self.embedding_workers = (
+            1 if embedding_function is not None else embedding_workers or os.cpu_count() or 1
+        )
+        self._embedding_pool: Optional[EmbeddingPool] = None
         try:
             self.client = chromadb.PersistentClient(path=db_path)
-            self.embedding_function = (
-                embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name="all-MiniLM-L6-v2"
-                )
+            if embedding_function is not None:
+                self.embedding_function = embedding_function
+                namespace = embedding_function.name()
+            else:
+                self.embedding_function = create_embedding_function(embedding_backend)
+                namespace = embedding_namespace(embedding_backend)
+            self.embedding_cache = CachedEmbeddingFunction(
+                self.embedding_function,
+                store=EmbeddingStore(embedding_cache_path) if embedding_cache_path else None,
+                namespace=namespace,
             )
             self.collection = self.client.get_or_create_collection(
-                name=collection_name, embedding_function=self.embedding_function
+                name=collection_name, embedding_function=self.embedding_cache
             )
+            self._embedding_namespace = namespace
+            self._check_embedding_model(namespace)
             logger.info(
                 f"VectorDBService initialized. Collection '{collection_name}' is ready."
             )
@@ -62,27 +161,214 @@ class VectorDBService:
 
         ids = [article.id for article in articles]
         documents = [article.content for article in articles]
-        metadatas = [
-            article.model_dump(exclude={"id", "content"}) for article in articles
-        ]
+        metadatas = [to_chroma_metadata(article) for article in articles]
 
         try:
             # Use upsert for idempotency
             self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
             logger.info(f"Successfully upserted {len(articles)} documents.")
+            self._bump_version()
         except Exception as e:
             logger.exception(f"Failed to upsert documents into ChromaDB. Error: {e}")
             # Depending on the use case, you might want to handle this more gracefully
             # or re-raise the exception to signal a failure in the ingestion pipeline.
             raise
 
-    def query_documents(self, query_texts: List[str], n_results: int = 5) -> List[dict]:
+    def bulk_upsert(
+        self, articles: Iterable[KnowledgeBaseArticle], batch_size: int = UPSERT_BATCH_SIZE
+    ) -> Dict[str, float]:
+        """
+        Upserts a stream of articles in batches, with bounded memory.
+
+        Unlike `add_documents`, the embeddings are computed before the upsert:
+        cached ones are reused and the rest are spread over the embedding worker
+        processes. Only one batch is held in memory at a time.
+
+        Args:
+            articles (Iterable[KnowledgeBaseArticle]): The articles (or chunks) to store.
+            batch_size (int): Number of documents per Chroma upsert.
+
+        Returns:
+            Dict[str, float]: The number of documents written and of embeddings
+                computed, the elapsed seconds and the resulting rates.
+        """
+        started = time.monotonic()
+        misses_before = self.embedding_cache.misses
+        pool = self._get_embedding_pool()
+        documents = 0
+        articles = iter(articles)
+        try:
+            while True:
+                batch = list(itertools.islice(articles, batch_size))
+                if not batch:
+                    break
+                texts = [article.content for article in batch]
+                embeddings = self.embedding_cache.embed_documents(texts, pool)
+                self.collection.upsert(
+                    ids=[article.id for article in batch],
+                    embeddings=embeddings,
+                    documents=texts,
+                    metadatas=[to_chroma_metadata(article) for article in batch],
+                )
+                documents += len(batch)
+        except Exception as e:
+            logger.exception(f"Failed to bulk upsert documents into ChromaDB. Error: {e}")
+            raise
+        finally:
+            if documents:
+                self._bump_version()
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        embedded = self.embedding_cache.misses - misses_before
+        stats = {
+            "documents": documents,
+            "embedded": embedded,
+            "seconds": elapsed,
+            "documents_per_second": documents / elapsed,
+            "embeddings_per_second": embedded / elapsed,
+        }
+        logger.info(
+            f"Upserted {documents} documents in {elapsed:.1f}s "
+            f"({stats['documents_per_second']:.1f} docs/s, {embedded} embeddings computed "
+            f"at {stats['embeddings_per_second']:.1f}/s)."
+        )
+        return stats
+
+    def close(self):
+        """
+        Stops the embedding worker processes, if they were started.
+        """
+        if self._embedding_pool is not None:
+            self._embedding_pool.close()
+            self._embedding_pool = None
+
+    def _get_embedding_pool(self) -> Optional[EmbeddingPool]:
+        if self.embedding_workers <= 1:
+            return None
+        if self._embedding_pool is None:
+            # Every worker process is one core's worth of model threads.
+            self._embedding_pool = EmbeddingPool(
+                embedding_function_factory(self.embedding_backend, threads=1),
+                workers=self.embedding_workers,
+            )
+        return self._embedding_pool
+
+    def delete_documents(self, ids: List[str]):
+        """
+        Removes documents from the collection, e.g. articles deleted at the source.
+
+        Args:
+            ids (List[str]): The ids of the documents to delete.
+        """
+        if not ids:
+            return
+
+        try:
+            self.collection.delete(ids=ids)
+            logger.info(f"Successfully deleted {len(ids)} documents.")
+            self._bump_version()
+        except Exception as e:
+            logger.exception(f"Failed to delete documents from ChromaDB. Error: {e}")
+            raise
+
+    def delete_articles(self, parent_ids: List[str]):
+        """
+        Removes every chunk of the given articles from the collection.
+
+        Args:
+            parent_ids (List[str]): The ids of the source articles.
+        """
+        if not parent_ids:
+            return
+
+        try:
+            # Articles indexed before chunking was introduced are stored under their own id.
+            self.collection.delete(ids=parent_ids)
+            self.collection.delete(where={PARENT_ID_METADATA_KEY: {"$in": parent_ids}})
+            logger.info(f"Successfully deleted the chunks of {len(parent_ids)} articles.")
+            self._bump_version()
+        except Exception as e:
+            logger.exception(f"Failed to delete article chunks from ChromaDB. Error: {e}")
+            raise
+
+    def warm_up(self):
+        """
+        Runs a dummy embedding and a dummy query, so that neither the model nor
+        the collection's index is loaded by the first real query.
+        """
+        self.embedding_function(["warm-up"])
+        self.collection.query(query_texts=["warm-up"], n_results=1)
+        logger.info("VectorDBService embedding model and index are warm.")
+
+    def get_collection_version(self) -> str:
+        """
+        Returns the current knowledge base version of the collection.
+
+        The metadata is re-read from the database so that writes made by another
+        process (e.g. the ingestion script) are picked up.
+
+        Returns:
+            str: The version, or an empty string if the collection was never written.
+        """
+        try:
+            metadata = self.client.get_collection(name=self.collection_name).metadata or {}
+        except Exception as e:
+            logger.warning(f"Failed to read the collection version. Error: {e}")
+            metadata = self.collection.metadata or {}
+        return str(metadata.get(VERSION_METADATA_KEY, ""))
+
+    def _bump_version(self):
+        self._update_metadata({VERSION_METADATA_KEY: str(time.time_ns())})
+
+    def _update_metadata(self, values: Dict[str, Any]):
+        # Chroma rejects metadata updates that touch the index configuration.
+        metadata = {
+            key: value
+            for key, value in (self.collection.metadata or {}).items()
+            if not key.startswith("hnsw:")
+        }
+        metadata.update(values)
+        self.collection.modify(metadata=metadata)
+
+    def _check_embedding_model(self, model: str):
+        stored = (self.collection.metadata or {}).get(EMBEDDING_METADATA_KEY)
+        if stored is None:
+            self._update_metadata({EMBEDDING_METADATA_KEY: model})
+        elif stored != model:
+            raise ValueError(
+                f"Collection '{self.collection_name}' was embedded with '{stored}', not '{model}'. "
+                f"Use a new collection (DB_COLLECTION_NAME) and re-ingest to switch embedding backends."
+            )
+
+    def embed_queries(self, query_texts: List[str]) -> List[Any]:
+        """
+        Embeds query texts through the embedding cache, in one model call.
+
+        Args:
+            query_texts (List[str]): The texts to embed.
+
+        Returns:
+            List[Any]: One embedding per text, for `query_documents`.
+        """
+        return self.embedding_cache.embed_query(query_texts)
+
+    def query_documents(
+        self,
+        query_texts: List[str],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[List[Any]] = None,
+    ) -> List[dict]:
         """
         Queries the collection for documents similar to the query texts.
 
         Args:
             query_texts (List[str]): The text(s) to search for.
             n_results (int): The number of results to return per query.
+            where (Optional[Dict[str, Any]]): A Chroma metadata filter restricting
+                the candidate documents.
+            query_embeddings (Optional[List[Any]]): The embeddings of the query
+                texts, when they were computed beforehand (see `embed_queries`).
 
         Returns:
             List[dict]: A list of query results.
@@ -93,10 +379,104 @@ class VectorDBService:
             )
 
         try:
-            results = self.collection.query(
-                query_texts=query_texts, n_results=n_results
-            )
+            kwargs: Dict[str, Any] = {"where": where} if where is not None else {}
+            if query_embeddings is not None:
+                kwargs["query_embeddings"] = query_embeddings
+            else:
+                kwargs["query_texts"] = query_texts
+            with timed("vector.query", VECTOR_QUERY_DURATION) as fields:
+                fields.update(queries=len(query_texts), filtered=where is not None)
+                results = self.collection.query(n_results=n_results, **kwargs)
             return results
         except Exception as e:
             logger.exception(f"Failed to query documents from ChromaDB. Error: {e}")
             raise
+
+    def _get_incident_collection(self):
+        if self._incident_collection is None:
+            with self._incident_lock:
+                if self._incident_collection is None:
+                    # Similarities between incidents are compared against a threshold,
+                    # so the collection uses cosine distance rather than Chroma's L2.
+                    metadata = {"hnsw:space": "cosine", EMBEDDING_METADATA_KEY: self._embedding_namespace}
+                    collection = self.client.get_or_create_collection(
+                        name=self.incident_collection_name,
+                        embedding_function=self.embedding_cache,
+                        metadata=metadata,
+                    )
+                    stored = (collection.metadata or {}).get(EMBEDDING_METADATA_KEY)
+                    if stored != self._embedding_namespace:
+                        # The history is derived data: start over rather than mix models.
+                        logger.warning(
+                            f"Incident history was embedded with '{stored}'. "
+                            f"Starting a new history for '{self._embedding_namespace}'."
+                        )
+                        self.client.delete_collection(name=self.incident_collection_name)
+                        collection = self.client.create_collection(
+                            name=self.incident_collection_name,
+                            embedding_function=self.embedding_cache,
+                            metadata=metadata,
+                        )
+                    self._incident_collection = collection
+        return self._incident_collection
+
+    def add_incident(self, incident_id: str, text: str, metadata: Dict[str, Any]):
+        """
+        Stores a finished investigation in the incident history.
+
+        Args:
+            incident_id (str): The id of the incident, e.g. the alert id.
+            text (str): The description of the alert, which is embedded.
+            metadata (Dict[str, Any]): The investigation's results and timestamps.
+        """
+        try:
+            self._get_incident_collection().upsert(ids=[incident_id], documents=[text], metadatas=[metadata])
+        except Exception as e:
+            logger.exception(f"Failed to store incident {incident_id}. Error: {e}")
+            raise
+
+    def query_incidents(
+        self, text: str, n_results: int = 1, where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Queries the incident history for the incidents most similar to an alert.
+
+        Args:
+            text (str): The description of the alert.
+            n_results (int): The number of incidents to return.
+            where (Optional[Dict[str, Any]]): A Chroma metadata filter.
+
+        Returns:
+            Dict[str, Any]: The Chroma query result; distances are cosine distances.
+        """
+        kwargs: Dict[str, Any] = {"where": where} if where is not None else {}
+        return self._get_incident_collection().query(query_texts=[text], n_results=n_results, **kwargs)
+
+
+_shared_service: Optional[VectorDBService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_vector_db_service() -> VectorDBService:
+    """
+    Returns the process-wide VectorDBService, creating it on first use.
+
+    Constructing the service opens the Chroma client and loads the embedding model,
+    so it must happen once per process rather than once per query. Initialization
+    is guarded by a lock so concurrent first callers share a single instance.
+    With RETRIEVAL_SERVER_URL set, a RetrievalClient for the retrieval server is
+    returned instead, and neither is loaded in this process.
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                if RETRIEVAL_SERVER_URL:
+                    from services.retrieval_client import RetrievalClient
+
+                    _shared_service = RetrievalClient(RETRIEVAL_SERVER_URL)
+                else:
+                    _shared_service = VectorDBService(
+                        db_path=DB_PATH, collection_name=DB_COLLECTION_NAME
+                    )
+    return _shared_service
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+from core.config import IMPORT_TIME_BUDGET_SECONDS
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that are slow to import or load models; the services import them
+# when the API starts, not when it is imported.
+HEAVY_MODULES = ["chromadb", "langgraph", "openai", "sentence_transformers", "torch", "onnxruntime"]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+started = time.perf_counter()
+import main
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "loaded": [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def import_main(tmp_path, **environment) -> dict:
+    env = {**os.environ, "PYTHONPATH": SRC_DIR, **environment}
+    env = {key: value for key, value in env.items() if value is not None}
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_stays_within_budget(tmp_path):
+    result = import_main(tmp_path)
+
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_TIME_BUDGET_SECONDS
+    # Nothing is opened or written on import.
+    assert os.listdir(tmp_path) == []
+
+
+def test_import_succeeds_without_configuration(tmp_path):
+    result = import_main(tmp_path, LLM_API_KEY=None)
+
+    assert result["loaded"] == []